@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 import os
+import tempfile
 from datetime import timedelta
 from logging.handlers import RotatingFileHandler
 from typing import TYPE_CHECKING, Any, Mapping, cast
@@ -43,6 +44,7 @@ from app.webfinger import webfinger_bp
 from app.notifications import notifications_bp
 from app.push import push_bp
 from app.tasks import init_queue
+from app.commands import register_commands
 from app.activitypub_utils import ap_bp
 from app.ai import ai_bp
 from app.models import db
@@ -74,6 +76,8 @@ if TYPE_CHECKING:
                         
 login_manager = LoginManager()
 csrf = CSRFProtect()
+# Endpoints whose responses are shared by every viewer; they must not read the session.
+PUBLIC_CACHE_ENDPOINTS = frozenset({"quests.public_album"})
 # Default lightweight stub to avoid heavy imports during tests; swapped in create_app.
 humanify: HumanifyStub = HumanifyStub()
 
@@ -158,6 +162,13 @@ def create_app(config_overrides: Mapping[str, Any] | None = None) -> Flask:
         "TASKCSV": inscopeconfig.main.TASKCSV,
         "LOCAL_DOMAIN": inscopeconfig.main.LOCAL_DOMAIN,
         "FFMPEG_PATH": inscopeconfig.main.FFMPEG_PATH,
+        "FFMPEG_THREADS": inscopeconfig.main.FFMPEG_THREADS,
+        "VIDEO_TRANSCODE_WORKERS": inscopeconfig.main.VIDEO_TRANSCODE_WORKERS,
+        "RESIZE_CACHE_DIR": inscopeconfig.main.RESIZE_CACHE_DIR,
+        "RESIZE_CACHE_MAX_BYTES": inscopeconfig.main.RESIZE_CACHE_MAX_MB * 1024 * 1024,
+        "UPLOAD_SESSION_DIR": inscopeconfig.main.UPLOAD_SESSION_DIR,
+        "ALBUM_CACHE_MAX_AGE": inscopeconfig.main.ALBUM_CACHE_MAX_AGE,
+        "ALBUM_CDN_MAX_AGE": inscopeconfig.main.ALBUM_CDN_MAX_AGE,
         "PLACEHOLDER_IMAGE": inscopeconfig.main.PLACEHOLDER_IMAGE,
         "GCS_BUCKET": inscopeconfig.main.GCS_BUCKET,
         "GCS_BASE_URL": inscopeconfig.main.GCS_BASE_URL,
@@ -213,6 +224,14 @@ def create_app(config_overrides: Mapping[str, Any] | None = None) -> Flask:
         app.config.setdefault("PREFERRED_URL_SCHEME", "http")
         app.config.setdefault("APPLICATION_ROOT", "/")
         app.config.setdefault("USE_TASK_QUEUE", False)
+        if not app.config.get("RESIZE_CACHE_DIR"):
+            app.config["RESIZE_CACHE_DIR"] = os.path.join(
+                tempfile.gettempdir(), "questbycycle_resize_cache"
+            )
+        if not app.config.get("UPLOAD_SESSION_DIR"):
+            app.config["UPLOAD_SESSION_DIR"] = os.path.join(
+                tempfile.gettempdir(), "questbycycle_uploads"
+            )
         # Force in-memory SQLite for tests unless caller explicitly set a URI
         if not (config_overrides and "SQLALCHEMY_DATABASE_URI" in config_overrides):
             app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
@@ -291,12 +310,14 @@ def create_app(config_overrides: Mapping[str, Any] | None = None) -> Flask:
     app.register_blueprint(push_bp, url_prefix="/push")
     app.register_blueprint(webfinger_bp)
     app.register_blueprint(main_bp)
+    register_commands(app)
     if app.config.get("ENV") != "production":
         from app.docs import docs_bp
 
         app.register_blueprint(docs_bp)
 
     csrf.exempt(ap_bp)
+    csrf.exempt("app.quests.direct_upload_put")
 
     @app.before_request
     def enforce_csrf_header() -> None:  # pyright: ignore[reportUnusedFunction]
@@ -313,6 +334,9 @@ def create_app(config_overrides: Mapping[str, Any] | None = None) -> Flask:
     @app.before_request
     def expire_admin_if_needed() -> None:  # pyright: ignore[reportUnusedFunction]
         """Downgrade admin users when their subscription has expired."""
+        if request.endpoint in PUBLIC_CACHE_ENDPOINTS:
+            # Reading the session adds ``Vary: Cookie`` and defeats shared caches.
+            return
         if current_user.is_authenticated:
             was_admin = current_user.is_admin
             current_user.revoke_admin_if_expired()
@@ -458,6 +458,7 @@ def inbox(username):
                     sid = None
                 if sid is not None:
                     from app.models.quest import SubmissionReply
+                    from app.utils.submission_counts import adjust_submission_counts
 
                     reply = SubmissionReply(
                         submission_id=sid,
@@ -465,6 +466,7 @@ def inbox(username):
                         content=obj.get('content', '')
                     )
                     db.session.add(reply)
+                    adjust_submission_counts(sid, replies=1)
                     db.session.commit()
 
                     sub = db.session.get(QuestSubmission, sid)
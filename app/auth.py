@@ -53,6 +53,7 @@ from app.forms import (
 from app.utils.email_utils import send_email
 from app import limiter
 from app.utils.rate_limit import email_or_ip
+from app.utils.game_scores import mark_game_changed
 from app.tasks import enqueue_email
 from app.activitypub_utils import create_activitypub_actor
 
@@ -147,6 +148,7 @@ def _join_game_if_provided(user, game_id: str | None = None):
         if game:
             if game not in user.participated_games:
                 user.participated_games.append(game)
+                mark_game_changed(game.id)
 
             user.selected_game_id = game.id
             try:
@@ -222,6 +224,7 @@ def _ensure_demo_game(user):
         )
         if demo_game:
             user.participated_games.append(demo_game)
+            mark_game_changed(demo_game.id)
             try:
                 db.session.commit()
             except SQLAlchemyError as exc:
@@ -18,15 +18,19 @@ from flask import (
 from flask_login import login_required, current_user
 from markupsafe import escape
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 
 from app.decorators import require_admin
 from app.utils import get_int_param
+from app.utils.badge_rules import describe_badge, get_badge_rules, load_completions, quest_rule
+from app.utils.image_derivatives import image_srcsets
 from .forms import BadgeForm
-from .models import db, Quest, Badge, UserQuest, Game
+from .models import db, Quest, Badge, Game
 from .utils import save_badge_image
 from app import limiter
 from app.utils.rate_limit import user_or_ip
+from app.tasks import enqueue_badge_recompute
 
 badges_bp = Blueprint('badges', __name__, template_folder='templates')
 logger = logging.getLogger(__name__)
@@ -85,66 +89,33 @@ def get_badges():
         game = db.session.get(Game, game_id)
         if not game:
             return jsonify(error="Game not found"), 404
-        badges = Badge.query.filter_by(game_id=game_id).all()
+        rules = get_badge_rules(game_id)
+        catalog = [(badge, rules.awarding_quests(badge.id)) for badge in rules.badges.values()]
     else:
-        badges = Badge.query.all()
-    
+        badges = Badge.query.options(joinedload(Badge.quests)).all()
+        catalog = [
+            (badge, [rule for rule in map(quest_rule, badge.quests) if rule.awards_individually])
+            for badge in badges
+        ]
+
+    completions = None
+    if current_user.is_authenticated:
+        quest_ids = {quest.quest_id for _, quests in catalog for quest in quests}
+        completions = load_completions(current_user.id, quest_ids=quest_ids)
+
+    image_paths = {
+        badge.id: 'images/badge_images/' + badge.image
+        for badge, _ in catalog if badge.image
+    }
+    srcsets = image_srcsets(image_paths.values())
+
     badges_data = []
-    for badge in badges:
-
-        if game_id:
-            awarding_quests = [
-                quest
-                for quest in badge.quests
-                if quest.game_id == game_id and quest.badge_option in ("individual", "both")
-            ]
-        else:
-            awarding_quests = [
-                quest
-                for quest in badge.quests
-                if quest.badge_option in ("individual", "both")
-            ]
-
-        if awarding_quests:
-            task_names = ", ".join(quest.title for quest in awarding_quests)
-            task_ids = ", ".join(str(quest.id) for quest in awarding_quests)
-            badge_awarded_counts = ", ".join(str(quest.badge_awarded) for quest in awarding_quests)
-        else:
-            task_names = None
-            task_ids = None
-            badge_awarded_counts = "1"
-        
-                                       
-                                                                                        
-        is_complete = False
-                                                                                  
-                                                                
-        user_completions_total = 0
-        if awarding_quests and current_user.is_authenticated:
-            completions_list = []
-            for quest in awarding_quests:
-                user_quest = UserQuest.query.filter_by(user_id=current_user.id, quest_id=quest.id).first()
-                completions = user_quest.completions if user_quest else 0
-                completions_list.append(completions)
-                                                                                                       
-                if completions >= quest.badge_awarded:
-                    is_complete = True
-            user_completions_total = max(completions_list) if completions_list else 0
-        else:
-            user_completions_total = 0
-        
-        badges_data.append({
-            'id': badge.id,
-            'name': badge.name,
-            'description': badge.description,
-            'image': url_for('static', filename='images/badge_images/' + badge.image) if badge.image else None,
-            'category': badge.category,
-            'task_names': task_names,
-            'task_ids': task_ids,
-            'badge_awarded_counts': badge_awarded_counts,
-            'is_complete': is_complete,
-            'user_completions': user_completions_total
-        })
+    for badge, awarding_quests in catalog:
+        card = describe_badge(badge, awarding_quests, completions, empty=None)
+        image_path = image_paths.get(badge.id)
+        card['image'] = url_for('static', filename=image_path) if image_path else None
+        card['image_srcset'] = srcsets.get(image_path)
+        badges_data.append(card)
     
     return jsonify(badges=badges_data)
 
@@ -229,6 +200,7 @@ def update_badge(badge_id):
     if form.validate_on_submit():
 
                                                        
+        previous_category = badge.category
         badge.name = sanitize_html(form.name.data)
         badge.description = sanitize_html(form.description.data)
         badge.category = sanitize_html(form.category.data)
@@ -244,6 +216,8 @@ def update_badge(badge_id):
                 badge.image = save_badge_image(image_file)
                                         
         db.session.commit()
+        if badge.category != previous_category and badge.game_id:
+            enqueue_badge_recompute(badge.game_id)
         return jsonify({'success': True, 'message': 'Badge updated successfully'})
 
     return jsonify({'success': False, 'message': 'Invalid form data', 'errors': form.errors})
@@ -0,0 +1,72 @@
+"""Flask CLI maintenance commands."""
+from __future__ import annotations
+
+import click
+from flask import Flask
+
+from app.utils.game_scores import rebuild_game_scores
+from app.utils.image_derivatives import backfill_derivatives
+from app.utils.quest_scoring import (
+    backfill_badge_awards,
+    recompute_game_badges,
+    reconcile_user_scores,
+)
+from app.utils.submission_counts import repair_submission_counts
+
+
+@click.command("rebuild-scores")
+@click.option("--game-id", type=int, default=None, help="Only rebuild this game.")
+def rebuild_scores_command(game_id: int | None) -> None:
+    """Recompute the materialized game_user_score and game_score_total tables."""
+    written = rebuild_game_scores(game_id)
+    click.echo(f"Rebuilt {written} user score rows.")
+
+
+@click.command("reconcile-user-scores")
+def reconcile_user_scores_command() -> None:
+    """Fix users whose stored score differs from their awarded points."""
+    fixed = reconcile_user_scores()
+    click.echo(f"Corrected {fixed} user scores.")
+
+
+@click.command("backfill-badge-awards")
+def backfill_badge_awards_command() -> None:
+    """Create badge_award rows for badges awarded before the ledger existed."""
+    created, linked = backfill_badge_awards()
+    click.echo(f"Created {created} badge awards and linked {linked} messages.")
+
+
+@click.command("recompute-badges")
+@click.option("--game-id", type=int, required=True, help="Game to recompute.")
+def recompute_badges_command(game_id: int) -> None:
+    """Award and revoke badges for every participant of a game."""
+    result = recompute_game_badges(game_id)
+    click.echo(
+        f"Evaluated {result['users']} users: awarded {result['awarded']} "
+        f"badges, revoked {result['revoked']}."
+    )
+
+
+@click.command("generate-image-derivatives")
+def generate_image_derivatives_command() -> None:
+    """Create responsive widths for uploaded images that have none yet."""
+    generated = backfill_derivatives()
+    click.echo(f"Generated derivatives for {generated} images.")
+
+
+@click.command("repair-submission-counts")
+@click.option("--submission-id", type=int, default=None, help="Only repair this submission.")
+def repair_submission_counts_command(submission_id: int | None) -> None:
+    """Recompute quest_submission like_count and reply_count."""
+    fixed = repair_submission_counts(submission_id)
+    click.echo(f"Corrected counters of {fixed} submissions.")
+
+
+def register_commands(app: Flask) -> None:
+    """Attach the maintenance commands to ``app.cli``."""
+    app.cli.add_command(rebuild_scores_command)
+    app.cli.add_command(reconcile_user_scores_command)
+    app.cli.add_command(backfill_badge_awards_command)
+    app.cli.add_command(recompute_badges_command)
+    app.cli.add_command(generate_image_derivatives_command)
+    app.cli.add_command(repair_submission_counts_command)
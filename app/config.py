@@ -121,6 +121,13 @@ class MainConfig:
     TASKCSV: str
     LOCAL_DOMAIN: str
     FFMPEG_PATH: str
+    FFMPEG_THREADS: int
+    VIDEO_TRANSCODE_WORKERS: int
+    RESIZE_CACHE_DIR: str | None
+    RESIZE_CACHE_MAX_MB: int
+    UPLOAD_SESSION_DIR: str | None
+    ALBUM_CACHE_MAX_AGE: int
+    ALBUM_CDN_MAX_AGE: int
     PLACEHOLDER_IMAGE: str
     SQLALCHEMY_ECHO: bool
     GCS_BUCKET: str | None
@@ -239,6 +246,13 @@ def load_config() -> AppConfig:
             TASKCSV=_get_env("TASKCSV", "csv"),
             LOCAL_DOMAIN=_get_env("LOCAL_DOMAIN", "localhost:5000"),
             FFMPEG_PATH=_get_env("FFMPEG_PATH", "ffmpeg"),
+            FFMPEG_THREADS=_get_env_integer("FFMPEG_THREADS", 2),
+            VIDEO_TRANSCODE_WORKERS=_get_env_integer("VIDEO_TRANSCODE_WORKERS", 2),
+            RESIZE_CACHE_DIR=_get_env_nullable("RESIZE_CACHE_DIR"),
+            RESIZE_CACHE_MAX_MB=_get_env_integer("RESIZE_CACHE_MAX_MB", 512),
+            UPLOAD_SESSION_DIR=_get_env_nullable("UPLOAD_SESSION_DIR"),
+            ALBUM_CACHE_MAX_AGE=_get_env_integer("ALBUM_CACHE_MAX_AGE", 60),
+            ALBUM_CDN_MAX_AGE=_get_env_integer("ALBUM_CDN_MAX_AGE", 600),
             PLACEHOLDER_IMAGE=_get_env("PLACEHOLDER_IMAGE", "images/default-placeholder.webp"),
             SQLALCHEMY_ECHO=_get_env_boolean("SQLALCHEMY_ECHO", False),
             GCS_BUCKET=_get_env_nullable("GCS_BUCKET"),
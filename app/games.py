@@ -25,6 +25,7 @@ from app.models import db, user_games
 from app.models.game import Game
 from app.models.quest import Quest
 from app.models.user import User, UserQuest
+from app.models.score import GameScoreTotal
 from app.forms import GameForm
 from app.schemas import QuestListQuerySchema
 from app.utils.file_uploads import (
@@ -36,6 +37,8 @@ from app.utils.file_uploads import (
 )
 from app.utils.email_utils import send_social_media_liaison_email
 from app.utils import sanitize_html, format_db_error
+from app.utils.game_scores import get_game_version, mark_game_changed
+from app.utils.http_cache import apply_etag, etag_matches, not_modified
 from io import BytesIO
 
 
@@ -338,6 +341,7 @@ def register_game(game_id):
             stmt = user_games.insert().values(user_id=current_user.id,
                                               game_id=game_id)
             db.session.execute(stmt)
+            mark_game_changed(game_id)
             db.session.commit()
             flash('You have successfully joined the game.', 'success')
         else:
@@ -414,18 +418,23 @@ def get_game_points(game_id):
     """
     Get the total points awarded for a specific game along with its goal.
     """
-    total_game_points = db.session.query(
-        db.func.sum(UserQuest.points_awarded)
-    ).join(
-        Quest, UserQuest.quest_id == Quest.id
-    ).filter(
-        Quest.game_id == game_id
+    game = db.session.get(Game, game_id)
+    if game is None:
+        abort(404)
+
+    etag = f"game-points-{game_id}-v{get_game_version(game_id)}"
+    if etag_matches(etag):
+        return not_modified(etag)
+
+    total_game_points = db.session.query(GameScoreTotal.total_points).filter_by(
+        game_id=game_id
     ).scalar() or 0
 
-    game = db.session.get(Game, game_id)
     game_goal = game.game_goal
 
-    return jsonify(total_game_points=total_game_points, game_goal=game_goal)
+    return apply_etag(
+        jsonify(total_game_points=total_game_points, game_goal=game_goal), etag
+    )
 
 
 @games_bp.route('/game/<int:game_id>/details')
@@ -490,6 +499,7 @@ def join_custom_game():
     db.session.execute(
         user_games.insert().values(user_id=current_user.id, game_id=game.id)
     )
+    mark_game_changed(game.id)
     current_user.selected_game_id = game.id
     db.session.commit()
 
@@ -515,6 +525,7 @@ def join_demo():
         db.session.execute(
             user_games.insert().values(user_id=current_user.id, game_id=demo.id)
         )
+        mark_game_changed(demo.id)
 
                
     current_user.selected_game_id = demo.id
@@ -32,8 +32,7 @@ from werkzeug.utils import secure_filename
 from flask_login import current_user, login_required
 from pydantic import ValidationError
 from flask_wtf.csrf import generate_csrf
-from sqlalchemy import func, and_
-from sqlalchemy.orm import joinedload
+from sqlalchemy import String, and_, cast
 from typing import Any, List
 from datetime import datetime, timedelta
 from PIL import Image, UnidentifiedImageError, features
@@ -51,6 +50,7 @@ from app.models.game import Game, ShoutBoardMessage
 from app.models.user import User, UserQuest, ProfileWallMessage
 from app.models.quest import Quest, QuestSubmission
 from app.models.badge import Badge
+from app.models.score import GameUserScore, GameScoreTotal
 from app.forms import (
     ProfileForm,
     ShoutBoardForm,
@@ -66,11 +66,32 @@ from app.forms import (
 from app.utils.file_uploads import (
     save_profile_picture,
     save_bicycle_picture,
-    correct_image_orientation,
     public_media_url,
 )
 from app.utils import sanitize_html, get_int_param
 from app.utils.calendar_utils import _parse_calendar_tz
+from app.utils.quest_stats import annotate_quest_stats
+from app.utils import image_cache, image_resize
+from app.utils.image_derivatives import local_derivative
+from app.utils.badge_rules import describe_badge, get_badge_rules, load_completions
+from app.utils.game_scores import get_game_version, mark_game_changed
+from app.utils.http_cache import apply_etag, etag_matches, not_modified
+from app.utils.leaderboard import (
+    DEFAULT_AROUND,
+    DEFAULT_TOP_N,
+    MAX_AROUND,
+    MAX_TOP_N,
+    get_leaderboard_window,
+    serialize_entries,
+)
+from app.utils.activity_feed import (
+    ACTIVITY_PAGE_SIZE,
+    MAX_ACTIVITY_PAGE_SIZE,
+    decode_cursor,
+    load_activity_page,
+    load_pinned_messages,
+    serialize_activity,
+)
 from app.schemas import TimezoneSchema
 from .config import load_config, AppConfig
 from app.tasks import enqueue_email
@@ -133,6 +154,7 @@ def _select_game(game_id):
                 game_id=game.id
             )
             db.session.execute(stmt)
+            mark_game_changed(game.id)
             db.session.commit()
         if current_user.selected_game_id != game_id:
             current_user.selected_game_id = game_id
@@ -144,123 +166,36 @@ def _prepare_quests(game, user_id, user_quests, now):
     """
     Prepare quest-related data for display.
     Modifies each quest by setting completion counts, eligibility, and timestamps.
-    Returns a list of quests and sorted activities.
+    Returns a list of quests, the first page of sorted activities and the
+    cursor of the next page.
     """
     quests = Quest.query.filter_by(game_id=game.id, enabled=True).all() if game else []
-    completed_quests = UserQuest.query.filter(UserQuest.completions > 0).order_by(UserQuest.completed_at.desc()).all()
-
-    for quest in quests:
-        quest.total_completions = QuestSubmission.query.filter_by(quest_id=quest.id).count()
-        quest.personal_completions = QuestSubmission.query.filter_by(
-            quest_id=quest.id, user_id=user_id).count() if user_id else 0
-        quest.completions_within_period = 0
-        quest.can_verify = False
-        quest.last_completion = None
-        quest.first_completion_in_period = None
-        quest.next_eligible_time = None
-        quest.completion_timestamps = []
-
-        if user_id:
-            period_start = now - FREQUENCY_DELTA.get(quest.frequency, timedelta(days=1))
-            submissions = QuestSubmission.query.filter(
-                QuestSubmission.user_id == user_id,
-                QuestSubmission.quest_id == quest.id,
-                QuestSubmission.timestamp >= period_start
-            ).all()
-
-            if submissions:
-                quest.completions_within_period = len(submissions)
-                quest.first_completion_in_period = min(submissions, key=lambda x: x.timestamp).timestamp
-                quest.completion_timestamps = [sub.timestamp for sub in submissions]
-
-            relevant_user_quests = [ut for ut in user_quests if ut.quest_id == quest.id]
-            quest.last_completion = max((ut.completed_at for ut in relevant_user_quests), default=None)
-
-            if quest.personal_completions < quest.completion_limit:
-                start = quest.calendar_event_start
-                if start and not start.tzinfo:
-                    start = start.replace(tzinfo=UTC)
-                if quest.from_calendar and start and now < start:
-                    quest.next_eligible_time = start
-                    quest.can_verify = False
-                else:
-                    quest.can_verify = True
-            else:
-                last_submission = max(submissions, key=lambda x: x.timestamp, default=None)
-                if last_submission:
-                    quest.next_eligible_time = last_submission.timestamp + FREQUENCY_DELTA.get(quest.frequency, timedelta(days=1))
+
+    annotate_quest_stats(quests, game.id if game else None, user_id, user_quests, now)
 
                                                                   
     if game is not None:
-        pinned_messages = ShoutBoardMessage.query.filter_by(is_pinned=True, game_id=game.id).order_by(
-            ShoutBoardMessage.timestamp.desc()).all()
-        unpinned_messages = ShoutBoardMessage.query.filter_by(is_pinned=False, game_id=game.id).order_by(
-            ShoutBoardMessage.timestamp.desc()).all()
-        activities = pinned_messages + (unpinned_messages + [ut for ut in completed_quests if ut.quest.game_id == game.id])
+        page, activity_cursor = load_activity_page(game.id)
+        activities = load_pinned_messages(game.id) + page
     else:
-        activities = []
-    activities.sort(key=get_datetime, reverse=True)
+        activities, activity_cursor = [], None
 
                                                                      
     quests.sort(key=lambda x: (-x.is_sponsored, -x.personal_completions, -x.total_completions))
-    return quests, activities
+    return quests, activities, activity_cursor
   
 
 def _prepare_user_data(game_id, profile):
-                                                             
-    badges = (
-        Badge.query
-            .options(joinedload(Badge.quests))
-            .join(Quest)
-            .filter(
-                Badge.game_id == game_id,
-                Quest.badge_id.isnot(None),
-                Badge.image.isnot(None)
-            )
-            .distinct()
-            .all()
-    )
-
-                                                        
-    completions = (
-        db.session.query(
-            UserQuest.quest_id,
-            func.max(UserQuest.completions).label('completions')
-        )
-        .filter(UserQuest.user_id == profile.id)
-        .group_by(UserQuest.quest_id)
-        .all()
-    )
-    user_completions_map = {q_id: c for q_id, c in completions}
-
-                                 
-    enhanced_badges = []
-    for badge in badges:
-                                        
-        awarding = [q for q in badge.quests if q.game_id == game_id]
-        task_names            = ", ".join(q.title for q in awarding)
-        task_ids              = ", ".join(str(q.id) for q in awarding)
-        badge_awarded_counts  = ", ".join(str(q.badge_awarded) for q in awarding)
+    if not game_id:
+        return [], []
+    rules = get_badge_rules(game_id)
+    completions = load_completions(profile.id, game_id)
+    enhanced_badges = [
+        describe_badge(badge, rules.badge_quests[badge.id], completions)
+        for badge in rules.badges.values()
+        if badge.image is not None and badge.id in rules.badge_quests
+    ]
 
-                                                                    
-        user_counts = [user_completions_map.get(q.id, 0) for q in awarding]
-        is_complete = any(c >= q.badge_awarded for q, c in zip(awarding, user_counts))
-        max_completion = max(user_counts, default=0)
-
-        enhanced_badges.append({
-            'id':                    badge.id,
-            'name':                  badge.name,
-            'description':           badge.description,
-            'image':                 badge.image,
-            'category':              badge.category,
-            'task_names':            task_names,
-            'task_ids':              task_ids,
-            'badge_awarded_counts':  badge_awarded_counts,
-            'user_completions':      max_completion,
-            'is_complete':           is_complete
-        })
-
-                                           
     earned = [b for b in enhanced_badges if b['is_complete']]
     unearned = [b for b in enhanced_badges if not b['is_complete']]
 
@@ -423,7 +358,7 @@ def index(game_id, quest_id, user_id):
         user_games_list = []
 
                                    
-    quests, activities = _prepare_quests(game, user_id, user_quests, now)
+    quests, activities, activity_cursor = _prepare_quests(game, user_id, user_quests, now)
     calendar_quests = [q for q in quests if getattr(q, 'from_calendar', False)]
     calendar_quests = _sort_calendar_quests(calendar_quests, now)
     def _is_past_event(q):
@@ -508,6 +443,7 @@ def index(game_id, quest_id, user_id):
         game=game,
         user_games=user_games_list,
         activities=activities,
+        activity_cursor=activity_cursor,
         quests=quests,
         upcoming_calendar_quests=upcoming_calendar_quests,
         past_calendar_quests=past_calendar_quests,
@@ -524,7 +460,6 @@ def index(game_id, quest_id, user_id):
         profile=profile,
         user_quests=user_quests,
         total_points=total_points,
-        completions=UserQuest.query.filter(UserQuest.completions > 0).order_by(UserQuest.completed_at.desc()).all(),
         open_games=open_games,
         closed_games=closed_games,
         demo_game=demo_game,
@@ -638,11 +573,80 @@ def shout_board_messages(game_id):
 
 
 
+@main_bp.route('/activity-feed/<int:game_id>')
+@login_required
+def activity_feed(game_id):
+    """
+    Return JSON: { pinned: [...], activities: [...], next_cursor: str|null }.
+
+    Pinned messages are only included on the first page (no cursor).
+    """
+    game = db.session.get(Game, game_id)
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+
+    limit = min(
+        get_int_param('limit', default=ACTIVITY_PAGE_SIZE, min_value=1),
+        MAX_ACTIVITY_PAGE_SIZE,
+    )
+    try:
+        cursor = decode_cursor(request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    pinned = load_pinned_messages(game_id) if cursor is None else []
+    items, next_cursor = load_activity_page(game_id, cursor, limit)
+
+    return jsonify({
+        'pinned': [serialize_activity(m) for m in pinned],
+        'activities': [serialize_activity(a) for a in items],
+        'next_cursor': next_cursor,
+    })
+
+
+@main_bp.route('/leaderboard/<int:game_id>')
+@login_required
+def leaderboard(game_id):
+    """
+    Return a page of the leaderboard with the current user's rank.
+
+    Query parameters: ``offset`` and ``limit`` page through the ranking,
+    ``around`` sets how many ranks either side of the user are included in
+    ``around_me``.
+    """
+    game = db.session.get(Game, game_id)
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+
+    offset = get_int_param('offset', default=0, min_value=0)
+    limit = min(get_int_param('limit', default=DEFAULT_TOP_N, min_value=1), MAX_TOP_N)
+    around = min(get_int_param('around', default=DEFAULT_AROUND, min_value=0), MAX_AROUND)
+
+    window = get_leaderboard_window(game_id, current_user.id, offset, limit, around)
+    me = None
+    if window['me'] is not None:
+        rank, points = window['me']
+        me = {'rank': rank, 'total_points': points}
+    next_offset = offset + limit if offset + limit < window['total'] else None
+
+    return jsonify({
+        'game_id': game_id,
+        'total_participants': window['total'],
+        'entries': serialize_entries(game_id, window['entries']),
+        'next_offset': next_offset,
+        'me': me,
+        'around_me': serialize_entries(game_id, window['around_me'] or []),
+    })
+
+
 @main_bp.route('/leaderboard_partial')
 @login_required
 def leaderboard_partial():
     """
     Provide leaderboard data for a specific game.
+
+    With ``summary=1`` only the game totals are returned; the ranking itself
+    is paged from ``/leaderboard/<game_id>``.
     """
     selected_game_id = get_int_param('game_id')
     if not selected_game_id:
@@ -652,69 +656,53 @@ def leaderboard_partial():
     if not game:
         return jsonify({'error': 'Game not found'}), 404
 
-    has_badges = Badge.query.filter_by(game_id=selected_game_id).count() > 0
+    summary = request.args.get('summary') == '1'
+    etag = f"leaderboard-{selected_game_id}-v{get_game_version(selected_game_id)}"
+    if summary:
+        etag += "-summary"
+    if etag_matches(etag):
+        return not_modified(etag)
 
-    badge_counts = (
-        db.session.query(
-            user_badges.c.user_id.label("uid"),
-            db.func.count(db.distinct(user_badges.c.badge_id)).label("badge_count")
-        )
-        .join(Badge, and_(Badge.id == user_badges.c.badge_id, Badge.game_id == selected_game_id))
-        .join(
-            Quest,
-            and_(
-                Quest.badge_id == Badge.id,
-                Quest.game_id == selected_game_id,
-                Quest.badge_option.in_(["individual", "both"]),
-            ),
-        )
-        .group_by(user_badges.c.user_id)
-        .subquery()
-    )
+    has_badges = Badge.query.filter_by(game_id=selected_game_id).count() > 0
 
-    top_users_query = (
-        db.session.query(
-            User.id,
-            User.username,
-            User.display_name,
-            db.func.sum(UserQuest.points_awarded).label("total_points"),
-            db.func.sum(
-                db.case((UserQuest.completions > 0, 1), else_=0)
-            ).label("completed_quests"),
-            badge_counts.c.badge_count.label("badges_awarded"),
+    top_users = None
+    if not summary:
+        top_users_query = (
+            db.session.query(
+                User.id,
+                User.username,
+                User.display_name,
+                GameUserScore.points,
+                GameUserScore.completed_quests,
+                GameUserScore.badge_count,
+            )
+            .join(User, User.id == GameUserScore.user_id)
+            .filter(GameUserScore.game_id == selected_game_id)
+            .order_by(GameUserScore.points.desc(), cast(GameUserScore.user_id, String).desc())
+            .all()
         )
-        .join(UserQuest, UserQuest.user_id == User.id)
-        .join(Quest, Quest.id == UserQuest.quest_id)
-        .outerjoin(badge_counts, badge_counts.c.uid == User.id)
-        .filter(Quest.game_id == selected_game_id)
-        .group_by(User.id, User.username, User.display_name, badge_counts.c.badge_count)
-        .order_by(db.func.sum(UserQuest.points_awarded).desc())
-        .all()
-    )
 
-    top_users = [
-        {
-            "user_id": uid,
-            "username": username,
-            "display_name": display_name,
-            "total_points": total_points,
-            "completed_quests": completed_quests,
-            "badges_awarded": badges_awarded,
-        }
-        for (
-            uid,
-            username,
-            display_name,
-            total_points,
-            completed_quests,
-            badges_awarded,
-        ) in top_users_query
-    ]
-
-    total_game_points = db.session.query(
-        db.func.sum(UserQuest.points_awarded)
-    ).join(Quest, UserQuest.quest_id == Quest.id
-    ).filter(Quest.game_id == selected_game_id
+        top_users = [
+            {
+                "user_id": uid,
+                "username": username,
+                "display_name": display_name,
+                "total_points": total_points,
+                "completed_quests": completed_quests,
+                "badges_awarded": badges_awarded or None,
+            }
+            for (
+                uid,
+                username,
+                display_name,
+                total_points,
+                completed_quests,
+                badges_awarded,
+            ) in top_users_query
+        ]
+
+    total_game_points = db.session.query(GameScoreTotal.total_points).filter_by(
+        game_id=selected_game_id
     ).scalar() or 0
 
     # Use the user_games association to count participants. Older
@@ -729,13 +717,15 @@ def leaderboard_partial():
         {"label": "Avg Points", "value": avg_points},
     ]
 
-    return jsonify({
-        'top_users': top_users,
+    payload = {
         'total_game_points': total_game_points,
         'game_goal': game.game_goal if game.game_goal else None,
         'secondary_stats': secondary_stats,
         'has_badges': has_badges
-    })
+    }
+    if top_users is not None:
+        payload['top_users'] = top_users
+    return apply_etag(jsonify(payload), etag)
 
 
 @main_bp.route('/profile/<int:user_id>')
@@ -1069,6 +1059,13 @@ def refresh_csrf():
     return response
 
 
+def _resized_image_response(response, etag):
+    """Mark a ``/resize_image`` response as cacheable per ``Accept`` header."""
+    apply_etag(response, etag, image_cache.IMMUTABLE)
+    response.vary.add('Accept')
+    return response
+
+
 @main_bp.route('/resize_image')
 def resize_image():
     """Resize an image while honoring the client's accepted formats."""
@@ -1098,38 +1095,56 @@ def resize_image():
             current_app.logger.warning("File not found: %s", full_image_path)
             return jsonify({'error': 'File not found'}), 404
 
-        with Image.open(full_image_path) as img:
-            img = correct_image_orientation(img)
-            ratio = width / float(img.width)
-            height = int(img.height * ratio)
-            img_resized = img.resize((width, height), Image.Resampling.LANCZOS)
-
-            accept = request.headers.get('Accept', '').lower()
-            supports_avif = 'image/avif' in accept and features.check('avif')
-            supports_webp = 'image/webp' in accept
-
-            if supports_avif:
-                fmt = 'AVIF'
-                mime = 'image/avif'
-            elif supports_webp:
-                fmt = 'WEBP'
-                mime = 'image/webp'
-            else:
-                fmt = 'JPEG'
-                mime = 'image/jpeg'
-
-            has_alpha = img_resized.mode in ('RGBA', 'LA') or (
-                img_resized.mode == 'P' and 'transparency' in img_resized.info
+        accept = request.headers.get('Accept', '').lower()
+        supports_avif = 'image/avif' in accept and features.check('avif')
+        supports_webp = 'image/webp' in accept
+
+        if supports_avif:
+            fmt, mime, ext = 'AVIF', 'image/avif', 'avif'
+        elif supports_webp:
+            fmt, mime, ext = 'WEBP', 'image/webp', 'webp'
+        else:
+            fmt, mime, ext = 'JPEG', 'image/jpeg', 'jpg'
+
+        width = image_resize.bucket_width(width)
+        derivative = local_derivative(image_path, width, accept)
+        if derivative is not None:
+            # A stored derivative differs from the on-the-fly resize, so it is
+            # tagged by its own file.
+            derivative_file, derivative_mime = derivative
+            etag = image_cache.cache_key(
+                os.path.relpath(derivative_file, current_app.static_folder),
+                os.stat(derivative_file),
+                width,
+                derivative_mime,
             )
-            if supports_avif or supports_webp:
-                img_resized = img_resized.convert('RGBA' if has_alpha else 'RGB')
-            else:
-                img_resized = img_resized.convert('RGB')
-
-            img_io = io.BytesIO()
-            img_resized.save(img_io, fmt)
-            img_io.seek(0)
-            return send_file(img_io, mimetype=mime)
+            if etag_matches(etag):
+                return _resized_image_response(not_modified(etag, image_cache.IMMUTABLE), etag)
+            return _resized_image_response(
+                send_file(derivative_file, mimetype=derivative_mime, etag=False, conditional=False),
+                etag,
+            )
+
+        etag = image_cache.cache_key(image_path, os.stat(full_image_path), width, fmt)
+        if etag_matches(etag):
+            return _resized_image_response(not_modified(etag, image_cache.IMMUTABLE), etag)
+
+        cached = image_cache.lookup(etag, ext)
+        if cached is not None:
+            return _resized_image_response(
+                send_file(cached, mimetype=mime, etag=False, conditional=False), etag
+            )
+
+        with Image.open(full_image_path) as img:
+            data = image_resize.encode(image_resize.load_scaled(img, width), fmt)
+
+        try:
+            image_cache.store(etag, ext, data)
+        except OSError as exc:
+            current_app.logger.warning("Could not cache resized image: %s", exc)
+        return _resized_image_response(
+            send_file(io.BytesIO(data), mimetype=mime, etag=False, conditional=False), etag
+        )
 
     except UnidentifiedImageError:
         current_app.logger.error(
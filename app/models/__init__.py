@@ -36,7 +36,7 @@ followers = db.Table(
 )
 
 from .federation import ForeignActor, RemoteFollower
-from .badge import Badge
+from .badge import Badge, BadgeAward
 from .user import (
     User,
     UserQuest,
@@ -46,12 +46,22 @@ from .user import (
     ProfileWallMessage,
     PushSubscription,
 )
-from .quest import Quest, QuestLike, QuestSubmission, SubmissionLike, SubmissionReply
+from .quest import (
+    Quest,
+    QuestLike,
+    QuestSubmission,
+    SubmissionLike,
+    SubmissionReply,
+    SubmissionStage,
+)
 from .game import Game, ShoutBoardMessage, Sponsor
+from .score import GameUserScore, GameScoreTotal
+from .media import ImageDerivative, MediaObject, UploadSession
 
 __all__ = [
     'db',
     'Badge',
+    'BadgeAward',
     'UserQuest',
     'User',
     'Notification',
@@ -62,11 +72,17 @@ __all__ = [
     'Quest',
     'QuestLike',
     'QuestSubmission',
+    'SubmissionStage',
     'SubmissionLike',
     'SubmissionReply',
     'Game',
     'ShoutBoardMessage',
     'Sponsor',
+    'GameUserScore',
+    'GameScoreTotal',
+    'ImageDerivative',
+    'MediaObject',
+    'UploadSession',
     'ForeignActor',
     'RemoteFollower',
     'user_badges',
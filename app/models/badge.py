@@ -1,3 +1,6 @@
+from datetime import datetime
+
+from app.constants import UTC
 from . import db
 
 class Badge(db.Model):
@@ -13,3 +16,30 @@ class Badge(db.Model):
     game = db.relationship('Game', back_populates='badges')
 
 
+class BadgeAward(db.Model):
+    """Ledger row recording that a user was awarded a badge."""
+    __tablename__ = 'badge_award'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False
+    )
+    badge_id = db.Column(
+        db.Integer, db.ForeignKey('badge.id', ondelete='CASCADE'),
+        nullable=False, index=True
+    )
+    game_id = db.Column(
+        db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'),
+        nullable=True, index=True
+    )
+    quest_id = db.Column(
+        db.Integer, db.ForeignKey('quest.id', ondelete='SET NULL'), nullable=True
+    )
+    awarded_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+    badge = db.relationship('Badge')
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'badge_id', name='uq_badge_award_user_badge'),
+    )
@@ -176,6 +176,10 @@ class ShoutBoardMessage(db.Model):
         db.DateTime(timezone=True), index=True, default=lambda: datetime.now(UTC)
     )
     is_pinned = db.Column(db.Boolean, default=False)
+    badge_award_id = db.Column(
+        db.Integer, db.ForeignKey('badge_award.id', ondelete='CASCADE'),
+        nullable=True, index=True
+    )
 
 
 class Sponsor(db.Model):
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from app.constants import UTC
+from . import db
+
+
+class ImageDerivative(db.Model):
+    """Resized copies generated for an uploaded image.
+
+    ``path`` is the stored value of the original (a static path or an
+    absolute storage URL). Each width in ``widths`` exists in every format
+    in ``formats`` at the location given by
+    :func:`app.utils.image_derivatives.derivative_path`.
+    """
+    __tablename__ = 'image_derivative'
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), nullable=False, unique=True, index=True)
+    source_width = db.Column(db.Integer, nullable=False)
+    widths = db.Column(db.JSON, nullable=False, default=list)
+    formats = db.Column(db.JSON, nullable=False, default=list)
+    created_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
+class UploadSession(db.Model):
+    """A resumable upload in progress.
+
+    Bytes received so far live in ``<id>.part`` inside the upload directory,
+    see :mod:`app.utils.resumable_uploads`. ``received`` is the offset the
+    next chunk must start at; the upload is complete once it equals ``size``.
+    """
+    __tablename__ = 'upload_session'
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True
+    )
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+        index=True,
+    )
+
+    @property
+    def complete(self) -> bool:
+        return self.received >= self.size
+
+
+class MediaObject(db.Model):
+    """A stored upload addressed by the SHA-256 of its bytes.
+
+    ``key`` is ``<subpath>/<sha256>.<ext>`` and ``path`` the value stored on
+    the records that use it (a static path or an absolute storage URL).
+    ``ref_count`` counts those records; see :mod:`app.utils.media_dedup`.
+    """
+    __tablename__ = 'media_object'
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False, unique=True)
+    path = db.Column(db.String(500), nullable=False, index=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(
+        db.DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
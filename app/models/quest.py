@@ -91,6 +91,9 @@ class QuestSubmission(db.Model):
     )
     image_url = db.Column(db.String(500), nullable=True)
     video_url = db.Column(db.String(500), nullable=True)
+    # ``pending`` until the uploaded video is transcoded, then ``ready``
+    # or ``failed``; ``None`` for submissions without a video.
+    video_status = db.Column(db.String(16), nullable=True)
     comment = db.Column(db.String(1000), nullable=True)
     timestamp = db.Column(
         db.DateTime(timezone=True), index=True, default=lambda: datetime.now(UTC)
@@ -98,6 +101,10 @@ class QuestSubmission(db.Model):
     twitter_url = db.Column(db.String(1024), nullable=True)
     fb_url = db.Column(db.String(1024), nullable=True)
     instagram_url = db.Column(db.String(1024), nullable=True)
+    # Maintained by ``app.utils.submission_counts`` alongside inserts and
+    # deletes of likes and replies; ``flask repair-submission-counts`` fixes drift.
+    like_count = db.Column(db.Integer, nullable=False, default=0)
+    reply_count = db.Column(db.Integer, nullable=False, default=0)
 
     quest = db.relationship(
         'Quest', back_populates='submissions'
@@ -105,6 +112,47 @@ class QuestSubmission(db.Model):
     user = db.relationship(
         'User', back_populates='quest_submissions', overlaps='submitter'
     )
+    stages = db.relationship(
+        'SubmissionStage',
+        back_populates='submission',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        order_by='SubmissionStage.id',
+    )
+
+    __table_args__ = (
+        # Keyset pagination walks submissions by ``(timestamp, id)``.
+        db.Index('ix_quest_submission_timestamp_id', 'timestamp', 'id'),
+    )
+
+
+class SubmissionStage(db.Model):
+    """Progress of one background post-processing stage of a submission."""
+    __tablename__ = 'submission_stage'
+
+    id = db.Column(db.Integer, primary_key=True)
+    submission_id = db.Column(
+        db.Integer,
+        db.ForeignKey('quest_submission.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    stage = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+
+    submission = db.relationship('QuestSubmission', back_populates='stages')
+
+    __table_args__ = (
+        db.UniqueConstraint('submission_id', 'stage', name='uq_submission_stage'),
+    )
 
 
 class SubmissionLike(db.Model):
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from sqlalchemy import event, update
+
+from app.constants import UTC
+from . import db
+from .badge import Badge
+from .game import Game
+from .quest import Quest
+
+
+class GameUserScore(db.Model):
+    """Materialized per-game score for a user."""
+    __tablename__ = 'game_user_score'
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(
+        db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), nullable=False
+    )
+    user_id = db.Column(
+        db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'),
+        nullable=False, index=True
+    )
+    points = db.Column(db.BigInteger, nullable=False, default=0)
+    completed_quests = db.Column(db.Integer, nullable=False, default=0)
+    badge_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+
+    user = db.relationship('User')
+
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'user_id', name='uq_game_user_score'),
+        db.Index('ix_game_user_score_game_points', 'game_id', 'points'),
+    )
+
+
+class GameScoreTotal(db.Model):
+    """Materialized total of all points awarded in a game."""
+    __tablename__ = 'game_score_total'
+    game_id = db.Column(
+        db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), primary_key=True
+    )
+    total_points = db.Column(db.BigInteger, nullable=False, default=0)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    rules_version = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+
+
+def bump_game_version(executor, game_id, rules=False):
+    """Increment the game's version so cached responses are revalidated.
+
+    ``executor`` is either a session or a connection, allowing use from
+    request code and from mapper events alike. With ``rules`` the badge
+    rule version is bumped as well, invalidating compiled badge rules.
+    """
+    if game_id is None:
+        return
+    table = GameScoreTotal.__table__
+    values = {"version": table.c.version + 1}
+    if rules:
+        values["rules_version"] = table.c.rules_version + 1
+    executor.execute(
+        update(table)
+        .where(table.c.game_id == game_id)
+        .values(**values)
+    )
+
+
+def _bump_for_target(mapper, connection, target):
+    bump_game_version(connection, target.game_id, rules=True)
+
+
+def _bump_for_game(mapper, connection, target):
+    bump_game_version(connection, target.id)
+
+
+for _model in (Quest, Badge):
+    for _name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _name, _bump_for_target)
+event.listen(Game, 'after_update', _bump_for_game)
@@ -277,6 +277,8 @@ class User(UserMixin, db.Model):
                     )
 
                 game.admin_id = replacement.id
+        from app.utils.game_scores import remove_user_scores
+        remove_user_scores(self.id)
         for user_quest in self.user_quests:
             db.session.delete(user_quest)
         for quest_like in self.quest_likes:
@@ -306,14 +308,12 @@ class User(UserMixin, db.Model):
 
     def get_score_for_game(self, game_id):
         """Retrieve the user's total score for a specific game."""
-        from .quest import Quest
+        from .score import GameUserScore
+        from app.utils.game_scores import ensure_game_scores
+        ensure_game_scores(game_id)
         total_score = (
-            db.session.query(db.func.sum(UserQuest.points_awarded))
-            .join(Quest, UserQuest.quest_id == Quest.id)
-            .filter(
-                UserQuest.user_id == self.id,
-                Quest.game_id == game_id
-            )
+            db.session.query(GameUserScore.points)
+            .filter_by(user_id=self.id, game_id=game_id)
             .scalar() or 0
         )
         return total_score
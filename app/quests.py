@@ -12,7 +12,6 @@ from datetime import datetime
 from io import BytesIO
 
 import qrcode
-import requests
 from flask import (
     Blueprint,
     abort,
@@ -29,12 +28,12 @@ from flask_login import current_user, login_required
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_content_range_header
 from werkzeug.utils import secure_filename
 
 from app import limiter
 from app.activitypub_utils import (
     post_activitypub_comment_activity,
-    post_activitypub_create_activity,
     post_activitypub_like_activity,
 )
 from app.constants import UTC
@@ -45,9 +44,12 @@ from app.schemas import (
     SubmissionReplySchema,
     UpdateQuestSchema,
 )
-from app.social import post_to_social_media
+from app.tasks import (
+    enqueue_album_refresh,
+    enqueue_badge_recompute,
+    enqueue_submission_pipeline,
+)
 from app.utils import (
-    REQUEST_TIMEOUT,
     delete_media_file,
     format_db_error,
     get_int_param,
@@ -57,19 +59,62 @@ from app.utils.file_uploads import (
     public_media_url,
     save_badge_image,
     save_submission_image,
-    save_submission_video,
+    store_submission_video,
 )
 from app.utils.quest_scoring import (
-    can_complete_quest,
-    check_and_award_badges,
+    apply_user_score_delta,
     check_and_revoke_badges,
     get_last_relevant_completion_time,
-    update_user_score,
+    revoke_quest_points,
+)
+from app.utils.eligibility import quest_eligibility
+from app.utils.game_scores import (
+    apply_score_delta,
+    mark_game_changed,
+    rebuild_game_scores,
+)
+from app.utils.http_cache import apply_etag, etag_matches, not_modified
+from app.utils.public_album import (
+    album_cache_control,
+    album_page,
+    album_version,
+    content_etag,
+    page_etag,
+    resolve_album,
+    surrogate_key,
 )
+from app.utils.direct_uploads import DirectUpload, start_direct_upload
+from app.utils.media_storage import LocalStorage, get_storage
 from app.utils.rate_limit import user_or_ip
+from app.utils.resumable_uploads import (
+    CHUNK_SIZE,
+    claim_upload,
+    create_upload,
+    discard_upload,
+    get_upload,
+    write_chunk,
+)
+from app.utils.image_derivatives import image_srcset, image_srcsets, image_thumbnails
+from app.utils.submission_feed import (
+    MAX_SUBMISSION_PAGE_SIZE,
+    SUBMISSION_PAGE_SIZE,
+    decode_cursor as decode_submission_cursor,
+    liked_submission_ids,
+    load_submission_page,
+)
+from app.utils.submission_counts import adjust_submission_counts
+from app.utils.submission_pipeline import (
+    VIDEO,
+    create_stages,
+    pending_stages,
+    pipeline_status,
+    plan_stages,
+    reset_stage,
+)
 from .models import (
     Badge,
     Game,
+    GameUserScore,
     Notification,
     Quest,
     QuestSubmission,
@@ -217,6 +262,173 @@ def add_quest(game_id):
         in_admin_dashboard=True)
 
 
+def _submission_response(submission, results, payload):
+    """Return the submission JSON, using ``202`` when work is still queued.
+
+    ``results`` holds the stage results when the pipeline ran inline and
+    is ``None`` when it was queued. Clients that send
+    ``Prefer: respond-async`` receive ``202 Accepted`` in the latter case
+    and poll ``status_url``; others get ``200`` with the links still empty.
+    """
+    results = results or {}
+    payload.update({
+        "submission_id": submission.id,
+        "status_url": url_for("quests.submission_status", submission_id=submission.id),
+        "processing": bool(pending_stages(submission.id)),
+        "twitter_url": submission.twitter_url,
+        "fb_url": submission.fb_url,
+        "instagram_url": submission.instagram_url,
+        "mastodon_url": results.get("mastodon_url"),
+        "activity": results.get("activity"),
+    })
+    if payload["processing"] and "respond-async" in request.headers.get("Prefer", ""):
+        return jsonify(payload), 202
+    return jsonify(payload), 200
+
+
+@quests_bp.route("/submission/<int:submission_id>/status", methods=["GET"])
+@login_required
+def submission_status(submission_id):
+    """Report the post-processing progress of a submission."""
+    submission = db.session.get(QuestSubmission, submission_id)
+    if not submission:
+        return jsonify({"success": False, "message": "Submission not found"}), 404
+    if not current_user.is_admin and submission.user_id != current_user.id:
+        return jsonify({"success": False, "message": "Permission denied"}), 403
+    return jsonify(pipeline_status(submission))
+
+
+def _submitted_file(field):
+    """Return the file sent as ``field`` or named by ``<field>_upload_id``.
+
+    ``<field>_object`` names an object uploaded straight to storage instead.
+    Raises ``ValueError`` when the named upload cannot be used.
+    """
+    file = request.files.get(field)
+    if file and file.filename:
+        return file
+    object_key = request.form.get(f"{field}_object")
+    if object_key:
+        return DirectUpload(object_key, current_user.id)
+    return claim_upload(request.form.get(f"{field}_upload_id"), current_user.id) or file
+
+
+def _upload_state(upload):
+    return {
+        "upload_id": upload.id,
+        "offset": upload.received,
+        "size": upload.size,
+        "complete": upload.complete,
+    }
+
+
+@quests_bp.route("/uploads", methods=["POST"])
+@login_required
+@limiter.limit("20/minute", key_func=user_or_ip)
+def create_resumable_upload():
+    """Start a resumable upload of submission media."""
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = create_upload(
+            current_user.id,
+            str(data.get("filename") or ""),
+            str(data.get("content_type") or ""),
+            int(data.get("size") or 0),
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    payload = _upload_state(upload)
+    payload.update({
+        "success": True,
+        "chunk_size": CHUNK_SIZE,
+        "upload_url": url_for("quests.resumable_upload", upload_id=upload.id),
+    })
+    return jsonify(payload), 201
+
+
+@quests_bp.route("/uploads/<upload_id>", methods=["GET", "PUT", "DELETE"])
+@login_required
+def resumable_upload(upload_id):
+    """Report, extend or cancel a resumable upload.
+
+    ``PUT`` carries one chunk with a ``Content-Range: bytes start-end/size``
+    header. A chunk that does not start at or before the stored offset is
+    answered with ``409`` and the offset to resume from.
+    """
+    upload = get_upload(upload_id, current_user.id)
+    if upload is None:
+        return jsonify({"success": False, "message": "Upload not found"}), 404
+
+    if request.method == "DELETE":
+        discard_upload(upload)
+        db.session.commit()
+        return jsonify({"success": True})
+
+    if request.method == "PUT":
+        content_range = parse_content_range_header(request.headers.get("Content-Range"))
+        if (
+            content_range is None
+            or content_range.units != "bytes"
+            or content_range.length != upload.size
+        ):
+            return jsonify({"success": False, "message": "Invalid Content-Range"}), 400
+        if content_range.start > upload.received:
+            payload = _upload_state(upload)
+            payload.update({"success": False, "message": "Chunk out of order"})
+            return jsonify(payload), 409
+        try:
+            write_chunk(
+                upload,
+                content_range.start,
+                request.stream,
+                content_range.stop - content_range.start,
+            )
+        except ValueError as exc:
+            payload = _upload_state(upload)
+            payload.update({"success": False, "message": str(exc)})
+            return jsonify(payload), 400
+
+    payload = _upload_state(upload)
+    payload["success"] = True
+    return jsonify(payload)
+
+
+@quests_bp.route("/direct-uploads", methods=["POST"])
+@login_required
+@limiter.limit("20/minute", key_func=user_or_ip)
+def create_direct_upload():
+    """Issue a signed URL the browser uploads submission media to."""
+    data = request.get_json(silent=True) or {}
+    try:
+        grant = start_direct_upload(
+            current_user.id,
+            str(data.get("filename") or ""),
+            str(data.get("content_type") or ""),
+            int(data.get("size") or 0),
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    grant["success"] = True
+    return jsonify(grant), 201
+
+
+@quests_bp.route("/direct-uploads/<token>", methods=["PUT"])
+def direct_upload_put(token):
+    """Receive a signed upload when media is stored on the local filesystem.
+
+    The signed token authorizes the request, as it does for a bucket, so
+    the view is exempt from CSRF checks.
+    """
+    storage_backend = get_storage()
+    if not isinstance(storage_backend, LocalStorage):
+        abort(404)
+    try:
+        storage_backend.accept_upload(token, request.mimetype, request.stream)
+    except ValueError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    return "", 200
+
+
 @quests_bp.route("/quest/<int:quest_id>/submit", methods=["POST"])
 @login_required
 def submit_quest(quest_id):
@@ -245,17 +457,23 @@ def submit_quest(quest_id):
             "message": "Submissions open once the event begins."
         }), 403
 
-    can_verify, next_eligible_time = can_complete_quest(current_user.id, quest_id)
-    if not can_verify:
+    eligibility = quest_eligibility(current_user.id, quest)
+    if not eligibility.can_verify:
         return jsonify({
             "success": False,
-            "message": f"You cannot submit this quest again until {next_eligible_time}"
+            "message": (
+                "You cannot submit this quest again until "
+                f"{eligibility.next_eligible_time}"
+            ),
         }), 403
 
 
     verification_type = quest.verification_type
-    image_file = request.files.get("image")
-    video_file = request.files.get("video")
+    try:
+        image_file = _submitted_file("image")
+        video_file = _submitted_file("video")
+    except ValueError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
     comment = sanitize_html(request.form.get("verificationComment", ""))
 
                                                     
@@ -297,50 +515,30 @@ def submit_quest(quest_id):
         video_url = None
         if image_file and image_file.filename:
             image_url = save_submission_image(image_file)
-            image_path = os.path.join(current_app.static_folder, image_url)
         elif video_file and video_file.filename:
             current_app.logger.debug(
                 "Attempting to save video file '%s'", video_file.filename
             )
             try:
-                video_url = save_submission_video(video_file)
-                current_app.logger.debug("Video saved to %s", video_url)
+                video_url = store_submission_video(video_file)
+                current_app.logger.debug("Video queued from %s", video_url)
             except ValueError as ve:
                 current_app.logger.error("Error processing video file: %s", str(ve))
                 return jsonify({"success": False, "message": str(ve)}), 400
-            image_path = os.path.join(current_app.static_folder, video_url)
-        else:
-            image_path = None
-
-        display_name = current_user.display_name or current_user.username
-        status_text = f"{display_name} completed '{quest.title}'! #QuestByCycle"
-
-                                                                         
-        twitter_url, fb_url, instagram_url = (None, None, None)
-        if image_url and current_user.upload_to_socials:
-            twitter_url, fb_url, instagram_url = post_to_social_media(
-                image_url, image_path, status_text, game
-            )
-
-                                                                    
-        mastodon_url = None
-        if image_url and current_user.upload_to_mastodon and current_user.mastodon_access_token:
-            mastodon_url = post_to_mastodon_status(image_path, status_text, current_user)
 
         new_submission = QuestSubmission(
             quest_id=quest_id,
             user_id=current_user.id,
             image_url=(image_url if image_url else None),
             video_url=video_url,
+            video_status="pending" if video_url else None,
             comment=comment,
-            twitter_url=twitter_url,
-            fb_url=fb_url,
-            instagram_url=instagram_url,
             timestamp=datetime.now(UTC),
         )
         db.session.add(new_submission)
 
         user_quest = UserQuest.query.filter_by(user_id=current_user.id, quest_id=quest_id).first()
+        newly_completed = not user_quest or not user_quest.completions
         if not user_quest:
             user_quest = UserQuest(
                 user_id=current_user.id,
@@ -355,56 +553,39 @@ def submit_quest(quest_id):
             user_quest.points_awarded += quest.points
             user_quest.completed_at = datetime.now(UTC)
 
+        apply_score_delta(
+            quest.game_id,
+            current_user.id,
+            points=quest.points or 0,
+            completed_quests=1 if newly_completed else 0,
+        )
+        apply_user_score_delta(current_user.id, quest.points or 0)
+        create_stages(new_submission, plan_stages(new_submission, current_user))
         db.session.commit()
 
-        update_user_score(current_user.id)
-        check_and_award_badges(current_user.id, quest_id, quest.game_id)
+        results = enqueue_submission_pipeline(new_submission.id)
 
-        db.session.add(
-            Notification(
-                user_id=current_user.id,
-                type="quest_complete",
-                payload={
-                    "quest_id": quest_id,
-                    "quest_title": quest.title,
-                    "submission_id": new_submission.id,
-                },
-            )
-        )
-        db.session.commit()
-        total_points = db.session.query(
-            db.func.sum(UserQuest.points_awarded)
-        ).join(Quest, UserQuest.quest_id == Quest.id
-        ).filter(
-            UserQuest.user_id == current_user.id,
-            Quest.game_id == quest.game_id
+        total_points = db.session.query(GameUserScore.points).filter_by(
+            game_id=quest.game_id, user_id=current_user.id
         ).scalar() or 0
         total_completion_count = QuestSubmission.query.filter_by(quest_id=quest_id).count()
 
-                                                         
-        activity = None
-        if image_url or video_url:
-            activity = post_activitypub_create_activity(new_submission, current_user, quest)
-
         current_app.logger.debug(
-            "Quest submission successful: image_url=%s, video_url=%s",
+            "Quest submission accepted: image_url=%s, video_url=%s",
             image_url,
             video_url,
         )
 
-        return jsonify({
+        return _submission_response(new_submission, results, {
             "success": True,
             "new_completion_count": user_quest.completions,
             "total_completion_count": total_completion_count,
             "total_points": total_points,
             "image_url": public_media_url(image_url),
-            "video_url": public_media_url(video_url),
+            "image_srcset": image_srcset(image_url),
+            "video_url": public_media_url(new_submission.video_url),
+            "video_status": new_submission.video_status,
             "comment": comment,
-            "twitter_url": twitter_url,
-            "fb_url": fb_url,
-            "instagram_url": instagram_url,
-            "mastodon_url": mastodon_url,
-            "activity": activity                                                             
         })
     except Exception as error:
         current_app.logger.error(
@@ -417,6 +598,11 @@ def submit_quest(quest_id):
         }), 500
 
 
+def _badge_state(quest):
+    """Return the quest attributes that decide which badges it awards."""
+    return (quest.badge_id, quest.badge_awarded, str(quest.badge_option), quest.category)
+
+
 @quests_bp.route("/quest/<int:quest_id>/update", methods=["POST"])
 @login_required
 @require_admin
@@ -434,6 +620,7 @@ def update_quest(quest_id):
 
     raw = request.get_json() or {}
     cleaned = {k: (v if v != "" else None) for k, v in raw.items()}
+    badge_state = _badge_state(quest)
     try:
         payload = UpdateQuestSchema.model_validate(cleaned)
     except ValidationError as exc:
@@ -494,6 +681,7 @@ def update_quest(quest_id):
                 start_dt = start_dt.replace(tzinfo=UTC)
             quest.calendar_event_start = start_dt
 
+    badges_changed = _badge_state(quest) != badge_state
     try:
         db.session.commit()
         if (
@@ -501,6 +689,8 @@ def update_quest(quest_id):
             and quest.calendar_event_start.tzinfo is None
         ):
             quest.calendar_event_start = quest.calendar_event_start.replace(tzinfo=UTC)
+        if badges_changed:
+            enqueue_badge_recompute(quest.game_id)
         return jsonify({"success": True, "message": "Quest updated successfully"})
     except Exception as error:
         db.session.rollback()
@@ -530,10 +720,12 @@ def delete_quest(quest_id):
     game_id = quest_to_delete.game_id
     if not current_user.is_admin_for_game(game_id):
         return jsonify({"success": False, "message": "Permission denied"}), 403
+    revoke_quest_points([quest_id])
     db.session.delete(quest_to_delete)
 
     try:
-        db.session.commit()
+        db.session.flush()
+        rebuild_game_scores(game_id)
         return jsonify({"success": True, "message": "Quest deleted successfully"})
     except Exception as error:
         db.session.rollback()
@@ -668,6 +860,18 @@ def import_quests(game_id):
 
 @quests_bp.route("/quest/<int:quest_id>/submissions")
 def get_quest_submissions(quest_id):
+    """Return the submissions of a quest, newest first.
+
+    Query Parameters:
+        cursor      (str): ``next_cursor`` of the previous page.
+        limit       (int): Number of submissions per page (default 10, max 100).
+        fields      (str): ``thumbnails`` returns only ids and image URLs.
+        album_code  (str): Required for callers outside the game.
+
+    Without ``cursor``, ``limit`` or ``fields`` the response is the legacy
+    bare list, capped at the newest ``MAX_SUBMISSION_PAGE_SIZE`` entries and
+    ordered oldest first as before.
+    """
     quest = Quest.query.get_or_404(quest_id)
     album_code = request.args.get("album_code", "")
     authorized = False
@@ -680,31 +884,81 @@ def get_quest_submissions(quest_id):
     if not authorized and album_code != quest.game.album_code:
         return jsonify({"error": "Invalid album code"}), 403
 
-    submissions = QuestSubmission.query.filter_by(quest_id=quest_id).all()
-    submissions_data = []
-    for sub in submissions:
-        user = db.session.get(User, sub.user_id)
-        submissions_data.append({
-            "id": sub.id,
-            "quest_id": quest_id,
-            "image_url": public_media_url(sub.image_url),
-            "video_url": public_media_url(sub.video_url),
-            "comment": sub.comment,
-            "timestamp": sub.timestamp.strftime("%Y-%m-%d %H:%M"),
-            "user_id": sub.user_id,
-            "user_display_name": user.display_name or user.username,
-            "user_username": user.username,
-            "user_profile_picture": (
-                url_for("static", filename=user.profile_picture)
-                if user.profile_picture
-                else url_for("static", filename=current_app.config["PLACEHOLDER_IMAGE"])
-            ),
-            "twitter_url": sub.twitter_url,
-            "fb_url": sub.fb_url,
-            "instagram_url": sub.instagram_url,
-            "verification_type": quest.verification_type,
-        })
-    return jsonify(submissions_data)
+    fields = request.args.get("fields", "")
+    if fields not in ("", "thumbnails"):
+        return jsonify({"error": "Invalid fields"}), 400
+    paginated = bool(fields) or any(
+        name in request.args for name in ("cursor", "limit")
+    )
+    try:
+        cursor = decode_submission_cursor(request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    limit = get_int_param(
+        "limit",
+        default=SUBMISSION_PAGE_SIZE if paginated else MAX_SUBMISSION_PAGE_SIZE,
+        min_value=1,
+    )
+
+    submissions, next_cursor = load_submission_page(
+        QuestSubmission.query.filter_by(quest_id=quest_id), cursor, limit
+    )
+
+    if fields == "thumbnails":
+        images = [sub.image_url for sub in submissions]
+        srcsets = image_srcsets(images)
+        thumbs = image_thumbnails(images)
+        submissions_data = [
+            {
+                "id": sub.id,
+                "thumbnail_url": thumbs.get(sub.image_url) or public_media_url(sub.image_url),
+                "image_srcset": srcsets.get(sub.image_url),
+                "video_url": public_media_url(sub.video_url),
+                "video_status": sub.video_status,
+            }
+            for sub in submissions
+        ]
+    else:
+        srcsets = image_srcsets(
+            [sub.image_url for sub in submissions]
+            + [sub.user.profile_picture for sub in submissions]
+        )
+        submissions_data = [
+            {
+                "id": sub.id,
+                "quest_id": quest_id,
+                "image_url": public_media_url(sub.image_url),
+                "image_srcset": srcsets.get(sub.image_url),
+                "video_url": public_media_url(sub.video_url),
+                "video_status": sub.video_status,
+                "comment": sub.comment,
+                "timestamp": sub.timestamp.strftime("%Y-%m-%d %H:%M"),
+                "user_id": sub.user_id,
+                "user_display_name": sub.user.display_name or sub.user.username,
+                "user_username": sub.user.username,
+                "user_profile_picture": (
+                    url_for("static", filename=sub.user.profile_picture)
+                    if sub.user.profile_picture
+                    else url_for("static", filename=current_app.config["PLACEHOLDER_IMAGE"])
+                ),
+                "user_profile_picture_srcset": srcsets.get(sub.user.profile_picture),
+                "twitter_url": sub.twitter_url,
+                "fb_url": sub.fb_url,
+                "instagram_url": sub.instagram_url,
+                "verification_type": quest.verification_type,
+            }
+            for sub in submissions
+        ]
+
+    if not paginated:
+        return jsonify(submissions_data[::-1])
+    return jsonify(
+        {
+            "submissions": submissions_data,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @quests_bp.route("/detail/<int:quest_id>/user_completion")
@@ -722,10 +976,10 @@ def quest_user_completion(quest_id):
     user_quest = UserQuest.query.filter_by(
         user_id=current_user.id, quest_id=quest_id
     ).first()
-    can_verify, next_eligible_time = can_complete_quest(current_user.id, quest_id)
-    last_relevant_completion_time = get_last_relevant_completion_time(
-        current_user.id, quest_id
-    )
+    eligibility = quest_eligibility(current_user.id, quest)
+    can_verify = eligibility.can_verify
+    next_eligible_time = eligibility.next_eligible_time
+    last_relevant_completion_time = eligibility.last_relevant_completion
 
     badge_info = (
         {
@@ -855,48 +1109,6 @@ def generate_qr(quest_id):
     return response
 
 
-def post_to_mastodon_status(image_path, status_text, user):
-    """
-    Post a new status on Mastodon using the user's linked account.
-
-    This function first uploads the image to the Mastodon media endpoint,
-    then posts a status (with the media attached) to the Mastodon statuses endpoint.
-    """
-    instance = user.mastodon_instance                          
-    access_token = user.mastodon_access_token
-                  
-                               
-    media_upload_url = f"https://{instance}/api/v1/media"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    with open(image_path, "rb") as image_file:
-        files = {"file": image_file}
-        media_response = requests.post(
-            media_upload_url,
-            headers=headers,
-            files=files,
-            timeout=REQUEST_TIMEOUT,
-        )
-    media_response.raise_for_status()
-    media_data = media_response.json()
-    media_id = media_data.get("id")
-    if not media_id:
-        return None
-
-                                                      
-    statuses_url = f"https://{instance}/api/v1/statuses"
-    payload = {"status": status_text, "media_ids[]": media_id}
-    status_response = requests.post(
-        statuses_url,
-        headers=headers,
-        data=payload,
-        timeout=REQUEST_TIMEOUT,
-    )
-    status_response.raise_for_status()
-    status_data = status_response.json()
-    status_url = status_data.get("url")
-    return status_url
-
-
 @quests_bp.route("/submit_photo/<int:quest_id>", methods=["GET", "POST"])
 @login_required
 def submit_photo(quest_id):
@@ -913,6 +1125,7 @@ def submit_photo(quest_id):
         db.session.execute(
             user_games.insert().values(user_id=current_user.id, game_id=game.id)
         )
+        mark_game_changed(game.id)
         current_user.selected_game_id = game.id
         db.session.commit()
 
@@ -955,13 +1168,19 @@ def submit_photo(quest_id):
             return redirect(url_for("main.index"))
 
     if request.method == "POST":
-        can_verify, next_eligible_time = can_complete_quest(current_user.id, quest_id)
-        if not can_verify:
-            message = f"You cannot submit this quest again until {next_eligible_time}."
+        eligibility = quest_eligibility(current_user.id, quest)
+        if not eligibility.can_verify:
+            message = (
+                "You cannot submit this quest again until "
+                f"{eligibility.next_eligible_time}."
+            )
             return jsonify({"success": False, "message": message}), 400
 
-        photo = request.files.get("photo")
-        video = request.files.get("video")
+        try:
+            photo = _submitted_file("photo")
+            video = _submitted_file("video")
+        except ValueError as exc:
+            return jsonify({"success": False, "message": str(exc)}), 400
         comment = sanitize_html(request.form.get("verificationComment", ""))
 
                                                                              
@@ -976,46 +1195,28 @@ def submit_photo(quest_id):
 
         if photo:
             image_url = save_submission_image(photo)
-            media_path = os.path.join(current_app.static_folder, image_url)
         elif video:
             try:
-                video_url = save_submission_video(video)
+                video_url = store_submission_video(video)
             except ValueError as ve:
                 current_app.logger.error(f"Error processing video: {ve}")
                 return jsonify({"success": False, "message": "An error occurred while processing the video."}), 400
-            media_path = os.path.join(current_app.static_folder, video_url)
         else:
             return jsonify({"success": False, "message": "No media detected, please try again."}), 400
-        display_name = current_user.display_name or current_user.username
-        status_text = f"{display_name} completed '{quest.title}'! #QuestByCycle"
-
-                                                  
-                                                
-        twitter_url, fb_url, instagram_url = (None, None, None)
-        if image_url and current_user.upload_to_socials:
-            twitter_url, fb_url, instagram_url = post_to_social_media(
-                image_url, media_path, status_text, game
-            )
-
-                                                 
-        mastodon_url = None
-        if image_url and current_user.upload_to_mastodon and current_user.mastodon_access_token:
-            mastodon_url = post_to_mastodon_status(media_path, status_text, current_user)
 
         new_submission = QuestSubmission(
             quest_id=quest_id,
             user_id=current_user.id,
             image_url=image_url,
             video_url=video_url if video else None,
+            video_status="pending" if video_url else None,
             comment=comment,
-            twitter_url=twitter_url,
-            fb_url=fb_url,
-            instagram_url=instagram_url,
             timestamp=datetime.now(UTC),
         )
         db.session.add(new_submission)
 
         user_quest = UserQuest.query.filter_by(user_id=current_user.id, quest_id=quest_id).first()
+        newly_completed = not user_quest or not user_quest.completions
         if not user_quest:
             user_quest = UserQuest(
                 user_id=current_user.id,
@@ -1029,22 +1230,25 @@ def submit_photo(quest_id):
             user_quest.points_awarded += quest.points
             user_quest.completed_at = datetime.now(UTC)
 
+        apply_score_delta(
+            quest.game_id,
+            current_user.id,
+            points=quest.points or 0,
+            completed_quests=1 if newly_completed else 0,
+        )
+        apply_user_score_delta(current_user.id, quest.points or 0)
+        create_stages(
+            new_submission, plan_stages(new_submission, current_user, notify=False)
+        )
         db.session.commit()
 
-        update_user_score(current_user.id)
-        check_and_award_badges(current_user.id, quest_id, quest.game_id)
-
-        activity = post_activitypub_create_activity(new_submission, current_user, quest)
-
-        message = "Media submitted successfully!"
+        results = enqueue_submission_pipeline(new_submission.id)
 
-        return jsonify({
+        return _submission_response(new_submission, results, {
             "success": True,
-            "message": message,
+            "message": "Media submitted successfully!",
             "redirect_url": url_for("main.index", game_id=game.id, quest_id=quest_id),
-            "mastodon_url": mastodon_url,
-            "activity": activity
-        }), 200
+        })
 
     return render_template("submit_photo.html", form=form, quest=quest, quest_id=quest_id)
 
@@ -1080,11 +1284,14 @@ def get_user_submissions():
     """Retrieve submissions for the logged in user."""
 
     submissions = QuestSubmission.query.filter_by(user_id=current_user.id).all()
+    srcsets = image_srcsets(submission.image_url for submission in submissions)
     submissions_data = [
         {
             "id": submission.id,
             "image_url": public_media_url(submission.image_url),
+            "image_srcset": srcsets.get(submission.image_url),
             "video_url": public_media_url(submission.video_url),
+            "video_status": submission.video_status,
             "comment": submission.comment,
             "user_id": submission.user_id,
             "quest_id": submission.quest_id,
@@ -1118,12 +1325,23 @@ def delete_submission(submission_id):
 
     if user_quest:
         quest = db.session.get(Quest, submission.quest_id)
+        previous_points = user_quest.points_awarded or 0
+        previous_completions = user_quest.completions or 0
         user_quest.completions = max(user_quest.completions - 1, 0)
         if user_quest.completions == 0:
             user_quest.points_awarded = 0
         else:
             user_quest.points_awarded = max(user_quest.points_awarded - quest.points, 0)
 
+        apply_score_delta(
+            quest.game_id,
+            submission.user_id,
+            points=user_quest.points_awarded - previous_points,
+            completed_quests=-1 if previous_completions and not user_quest.completions else 0,
+        )
+        apply_user_score_delta(
+            submission.user_id, user_quest.points_awarded - previous_points
+        )
         check_and_revoke_badges(submission.user_id, game_id=quest.game_id)
         db.session.commit()
 
@@ -1133,29 +1351,81 @@ def delete_submission(submission_id):
     SubmissionLike.query.filter_by(submission_id=submission.id).delete()
     SubmissionReply.query.filter_by(submission_id=submission.id).delete()
 
+    game_id = submission.quest.game_id
     db.session.delete(submission)
     db.session.commit()
+    enqueue_album_refresh(game_id)
     return jsonify({"success": True})
 
 
+@quests_bp.route("/album/<album_code>", methods=["GET"])
+def public_album(album_code):
+    """Return one page of a game's album for anyone holding its code.
+
+    The response has no per-user fields, so shared caches may store it.
+    Pages come from Redis, precomputed when the game's submissions change.
+
+    Query Parameters:
+        cursor (str): ``next_cursor`` of the previous page, omitted for the first.
+    """
+    game_id = resolve_album(album_code)
+    if game_id is None:
+        return jsonify({"error": "Album not found"}), 404
+
+    cursor = request.args.get("cursor") or None
+    try:
+        decode_submission_cursor(cursor)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    version = album_version(game_id)
+    page = None
+    if version:
+        etag = page_etag(game_id, version, cursor)
+    else:
+        # Without a version, e.g. while Redis is down, only the page itself
+        # tells whether it changed.
+        page = album_page(game_id, version, cursor)
+        etag = content_etag(page)
+    cache_control = album_cache_control()
+    if etag_matches(etag):
+        response = not_modified(etag, cache_control)
+    else:
+        if page is None:
+            page = album_page(game_id, version, cursor)
+        response = apply_etag(
+            current_app.response_class(page, mimetype="application/json"),
+            etag,
+            cache_control,
+        )
+    response.headers["Surrogate-Key"] = surrogate_key(game_id)
+    return response
+
+
 @quests_bp.route("/quest/all_submissions", methods=["GET"])
 def get_all_submissions():
     """Return paginated submissions for a game.
 
     Query Parameters:
         game_id (int): The ID of the game.
-        offset  (int): Starting index for pagination (default 0).
+        cursor  (str): ``next_cursor`` of the previous page, omitted for the first.
+        offset  (int): Legacy starting index, ignored when ``cursor`` is given.
         limit   (int): Number of submissions to return (default 10).
     """
 
     game_id = get_int_param("game_id", min_value=1)
     offset = get_int_param("offset", default=0, min_value=0)
-    limit = get_int_param("limit", default=10, min_value=1)
+    limit = get_int_param("limit", default=SUBMISSION_PAGE_SIZE, min_value=1)
     album_code = request.args.get("album_code", "")
 
     if game_id is None:
         return jsonify({"error": "Missing or invalid game_id"}), 400
 
+    try:
+        cursor = decode_submission_cursor(request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
@@ -1170,24 +1440,24 @@ def get_all_submissions():
     if not authorized and album_code != game.album_code:
         return jsonify({"error": "Invalid album code"}), 403
 
-    limit = max(1, min(limit, 100))
-
     query = (
         QuestSubmission.query
         .join(Quest, QuestSubmission.quest_id == Quest.id)
-        .join(User, QuestSubmission.user_id == User.id)
         .filter(Quest.game_id == game_id)
-        .order_by(QuestSubmission.timestamp.desc())
     )
-
-    submissions = query.offset(offset).limit(limit + 1).all()
-
-    has_more = len(submissions) > limit
-    submissions = submissions[:limit]
+    submissions, next_cursor = load_submission_page(query, cursor, limit, offset)
 
     if not submissions:
-        return jsonify({"submissions": [], "has_more": False, "is_admin": getattr(current_user, "is_admin", False)})
+        return jsonify({"submissions": [], "has_more": False, "next_cursor": None, "is_admin": getattr(current_user, "is_admin", False)})
 
+    liked_ids = liked_submission_ids(
+        [submission.id for submission in submissions],
+        current_user.id if current_user.is_authenticated else None,
+    )
+    srcsets = image_srcsets(
+        [submission.image_url for submission in submissions]
+        + [submission.user.profile_picture for submission in submissions]
+    )
     submissions_data = [
         {
             "id": submission.id,
@@ -1200,21 +1470,19 @@ def get_all_submissions():
                 if submission.user.profile_picture
                 else url_for('static', filename=current_app.config['PLACEHOLDER_IMAGE'])
             ),
+            "user_profile_picture_srcset": srcsets.get(submission.user.profile_picture),
             "image_url": public_media_url(submission.image_url),
+            "image_srcset": srcsets.get(submission.image_url),
             "video_url": public_media_url(submission.video_url),
+            "video_status": submission.video_status,
             "comment": submission.comment,
             "timestamp": submission.timestamp.strftime("%Y-%m-%d %H:%M"),
             "twitter_url": submission.twitter_url,
             "fb_url": submission.fb_url,
             "instagram_url": submission.instagram_url,
-            "like_count": submission.likes.count(),
-            "liked_by_current_user": bool(
-                current_user.is_authenticated
-                and SubmissionLike.query.filter_by(
-                    submission_id=submission.id,
-                    user_id=current_user.id,
-                ).first()
-            ),
+            "like_count": submission.like_count,
+            "reply_count": submission.reply_count,
+            "liked_by_current_user": submission.id in liked_ids,
         }
         for submission in submissions
     ]
@@ -1223,7 +1491,8 @@ def get_all_submissions():
         {
             "submissions": submissions_data,
             "is_admin": getattr(current_user, "is_admin", False),
-            "has_more": has_more,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
         }
     )
 
@@ -1278,8 +1547,11 @@ def delete_all_quests(game_id):
         )
 
     try:
+        revoke_quest_points(
+            quest_id for (quest_id,) in db.session.query(Quest.id).filter_by(game_id=game_id)
+        )
         Quest.query.filter_by(game_id=game_id).delete(synchronize_session=False)
-        db.session.commit()
+        rebuild_game_scores(game_id)
         return jsonify({"success": True, "message": "All quests deleted successfully."}), 200
     except Exception as error:
         db.session.rollback()
@@ -1363,22 +1635,26 @@ def get_submission(submission_id):
             submission_id=submission_id,
             user_id=current_user.id
         ).first())
-    like_count = sub.likes.count()
-    
+    srcsets = image_srcsets([sub.image_url, user.profile_picture])
+
     return jsonify({
         'id': submission_id,
         'url':                  public_media_url(sub.image_url or sub.video_url),
         'image_url':            public_media_url(sub.image_url),
+        'image_srcset':         srcsets.get(sub.image_url),
         'video_url':            public_media_url(sub.video_url),
+        'video_status':         sub.video_status,
         'comment':              sub.comment,
         'user_id':              sub.user_id,
         'user_profile_picture': pic_url,
+        'user_profile_picture_srcset': srcsets.get(user.profile_picture),
         'user_display_name':    display_name,
         'user_username':        user.username,
         'twitter_url':          sub.twitter_url,
         'fb_url':               sub.fb_url,
         'instagram_url':        sub.instagram_url,
-        'like_count':           like_count,
+        'like_count':           sub.like_count,
+        'reply_count':          sub.reply_count,
         'liked_by_current_user': liked
     })
 
@@ -1406,6 +1682,7 @@ def update_submission_comment(submission_id):
         sub.comment = sub.comment[:MAX_LEN]
 
     db.session.commit()
+    enqueue_album_refresh(sub.quest.game_id)
     return jsonify(success=True, comment=sub.comment)
 
 
@@ -1427,10 +1704,13 @@ def submission_like(submission_id):
             )
             db.session.add(like)
             try:
-                db.session.commit()
-                added = True
+                db.session.flush()
             except IntegrityError:
                 db.session.rollback()
+            else:
+                adjust_submission_counts(submission_id, likes=1)
+                db.session.commit()
+                added = True
 
         if added:
             post_activitypub_like_activity(sub, current_user)
@@ -1449,12 +1729,18 @@ def submission_like(submission_id):
         liked = True
     else:
         if existing:
-            db.session.delete(existing)
+            # A concurrent unlike may have removed the row already; only the
+            # request whose DELETE removed it decrements the counter.
+            removed = SubmissionLike.query.filter_by(
+                submission_id=submission_id,
+                user_id=current_user.id
+            ).delete()
+            if removed:
+                adjust_submission_counts(submission_id, likes=-1)
             db.session.commit()
         liked = False
 
-    count = sub.likes.count()
-    return jsonify(success=True, liked=liked, like_count=count)
+    return jsonify(success=True, liked=liked, like_count=sub.like_count)
 
 
 @quests_bp.route('/submission/<int:submission_id>/replies', methods=['GET', 'POST'])
@@ -1495,10 +1781,7 @@ def submission_replies(submission_id):
         content = sanitize_html(payload.content)
 
                                 
-        existing_count = SubmissionReply.query.filter_by(
-            submission_id=submission_id
-        ).count()
-        if existing_count >= 10:
+        if sub.reply_count >= 10:
             return jsonify(success=False,
                            message="Reply limit of 10 reached"), 403
 
@@ -1508,6 +1791,7 @@ def submission_replies(submission_id):
             content=content
         )
         db.session.add(reply)
+        adjust_submission_counts(submission_id, replies=1)
         db.session.commit()
 
     if sub.user_id != current_user.id:
@@ -1550,42 +1834,54 @@ def update_submission_photo(submission_id):
         abort(403)
 
                                 
-    photo = request.files.get('photo')
-    video = request.files.get('video')
+    try:
+        photo = _submitted_file('photo')
+        video = _submitted_file('video')
+    except ValueError as exc:
+        return jsonify(success=False, message=str(exc)), 400
     if photo and photo.filename:
         # Replace with an image: clear any existing video and its file; replace old image file
         old_video = sub.video_url
         old_image = sub.image_url
         new_path = save_submission_image(photo)
         # Remove previous media files if present
-        if old_image and old_image != new_path:
+        if old_image:
             delete_media_file(old_image)
         if old_video:
             delete_media_file(old_video)
         sub.video_url = None
+        sub.video_status = None
         sub.image_url = new_path
     elif video and video.filename:
         try:
             # Replace with a video: clear any existing image and its file; replace old video file
             old_video = sub.video_url
             old_image = sub.image_url
-            new_path = save_submission_video(video)
+            new_path = store_submission_video(video)
         except ValueError as ve:
             current_app.logger.error("Error saving submission video: %s", str(ve))
             return jsonify(success=False, message=str(ve)), 400
         # Remove previous media files if present
-        if old_video and old_video != new_path:
+        if old_video:
             delete_media_file(old_video)
         if old_image:
             delete_media_file(old_image)
         sub.image_url = None
         sub.video_url = new_path
+        sub.video_status = "pending"
+        reset_stage(sub, VIDEO)
     else:
         return jsonify(success=False, message='No file uploaded'), 400
 
     db.session.commit()
+    if sub.video_status == "pending":
+        enqueue_submission_pipeline(sub.id)
+    else:
+        enqueue_album_refresh(sub.quest.game_id)
     return jsonify(
         success=True,
         image_url=public_media_url(sub.image_url),
-        video_url=public_media_url(sub.video_url)
+        video_url=public_media_url(sub.video_url),
+        video_status=sub.video_status,
+        status_url=url_for("quests.submission_status", submission_id=sub.id),
     )
@@ -14,6 +14,9 @@ from app.models import db
 from app.utils import generate_demo_game
 from app.utils.calendar_utils import sync_google_calendar_events
 from app.utils.email_utils import check_and_send_liaison_emails
+from app.utils.quest_scoring import reconcile_user_scores
+from app.utils.direct_uploads import purge_incoming_uploads
+from app.utils.resumable_uploads import purge_stale_uploads
 
 
 def _advisory_lock_key(name: str) -> int:
@@ -106,6 +109,26 @@ def create_scheduler(app):
                 generate_demo_game,
             )
 
+    def _run_reconcile_scores():
+        with app.app_context():
+            _execute_with_advisory_lock(
+                app,
+                "reconcile_scores_job",
+                reconcile_user_scores,
+            )
+
+    def _purge_uploads():
+        purge_stale_uploads()
+        purge_incoming_uploads()
+
+    def _run_purge_uploads():
+        with app.app_context():
+            _execute_with_advisory_lock(
+                app,
+                "purge_uploads_job",
+                _purge_uploads,
+            )
+
     scheduler.add_job(
         func=_run_check_and_send,
         trigger="cron",
@@ -127,9 +150,26 @@ def create_scheduler(app):
         id="generate_demo_game_job",
         replace_existing=True,
     )
+    scheduler.add_job(
+        func=_run_reconcile_scores,
+        trigger="cron",
+        hour="3",
+        minute="30",
+        id="reconcile_scores_job",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        func=_run_purge_uploads,
+        trigger="interval",
+        hours=1,
+        id="purge_uploads_job",
+        replace_existing=True,
+    )
     app.logger.info("Scheduled job 'liaison_email_job'")
     app.logger.info("Scheduled job 'calendar_sync_job'")
     app.logger.info("Scheduled job 'generate_demo_game_job'")
+    app.logger.info("Scheduled job 'reconcile_scores_job'")
+    app.logger.info("Scheduled job 'purge_uploads_job'")
 
     scheduler.start()
     app.logger.info("APScheduler started")
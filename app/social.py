@@ -228,3 +228,45 @@ def post_to_instagram(image_url, caption, user_id, access_token):
         raise Exception(error)
 
     return permalink, None
+
+
+def post_to_mastodon_status(image_path, status_text, user):
+    """
+    Post a new status on Mastodon using the user's linked account.
+
+    This function first uploads the image to the Mastodon media endpoint,
+    then posts a status (with the media attached) to the Mastodon statuses endpoint.
+    """
+    instance = user.mastodon_instance                          
+    access_token = user.mastodon_access_token
+                  
+                               
+    media_upload_url = f"https://{instance}/api/v1/media"
+    headers = {"Authorization": f"Bearer {access_token}"}
+    with open(image_path, "rb") as image_file:
+        files = {"file": image_file}
+        media_response = requests.post(
+            media_upload_url,
+            headers=headers,
+            files=files,
+            timeout=REQUEST_TIMEOUT,
+        )
+    media_response.raise_for_status()
+    media_data = media_response.json()
+    media_id = media_data.get("id")
+    if not media_id:
+        return None
+
+                                                      
+    statuses_url = f"https://{instance}/api/v1/statuses"
+    payload = {"status": status_text, "media_ids[]": media_id}
+    status_response = requests.post(
+        statuses_url,
+        headers=headers,
+        data=payload,
+        timeout=REQUEST_TIMEOUT,
+    )
+    status_response.raise_for_status()
+    status_data = status_response.json()
+    status_url = status_data.get("url")
+    return status_url
@@ -3,7 +3,9 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from redis import Redis
-from rq import Queue
+from redis.exceptions import RedisError
+from rq import Callback, Queue, Retry
+from rq.job import Dependency
 from flask import current_app
 
 from app.models import db, User
@@ -11,11 +13,22 @@ from app.models import db, User
 if TYPE_CHECKING:
     from flask import Flask
 
+#: Upper bound for one transcoding job; ffmpeg is killed with the job.
+VIDEO_JOB_TIMEOUT = 600
+
+
 def init_queue(app: "Flask") -> Queue:
-    """Initialize and attach an RQ queue to the Flask app."""
+    """Initialize and attach the RQ queues to the Flask app.
+
+    Video transcoding gets its own ``video`` queue so that a bounded pool
+    of workers handles the CPU heavy encodes; ``app.task_queue`` remains
+    the queue for everything else.
+    """
     redis_url = app.config.get("REDIS_URL", "redis://localhost:6379/0")
-    queue = Queue('default', connection=Redis.from_url(redis_url))
+    connection = Redis.from_url(redis_url)
+    queue = Queue('default', connection=connection)
     app.task_queue = queue
+    app.video_queue = Queue('video', connection=connection)
     return queue
 
 
@@ -33,6 +46,55 @@ def deliver_activity_task(activity: dict, sender_id: int) -> None:
         deliver_activity(activity, sender)
 
 
+def recompute_game_badges_task(game_id: int) -> dict:
+    """Background job to recompute every participant's badges in a game."""
+    from app.utils.quest_scoring import recompute_game_badges
+    return recompute_game_badges(game_id)
+
+
+def run_submission_stage_task(submission_id: int, stage: str):
+    """Background job running one post-processing stage of a submission."""
+    from app.utils.submission_pipeline import run_stage
+    return run_stage(submission_id, stage)
+
+
+def submission_stage_failed(job, connection, exc_type, exc_value, traceback) -> None:
+    """Failure callback of stage jobs, including timeouts and lost workers."""
+    from app.utils.submission_pipeline import fail_stage
+    submission_id, stage = job.args
+    fail_stage(
+        submission_id,
+        stage,
+        str(exc_value) or exc_type.__name__,
+        final=not job.retries_left,
+    )
+
+
+def generate_image_derivatives_task(path: str) -> None:
+    """Background job writing the responsive widths of an uploaded image."""
+    from app.utils.image_derivatives import generate_derivatives
+    generate_derivatives(path)
+
+
+def offload_media_task(path: str, content_type: str | None, derivatives: bool = False) -> str | None:
+    """Background job moving a locally written upload to the storage backend."""
+    from app.utils.media_offload import offload_media
+    return offload_media(path, content_type, derivatives=derivatives)
+
+
+def delete_media_task(keys: list[str]) -> None:
+    """Background job deleting bucket objects."""
+    from app.utils.file_uploads import _delete_from_gcs
+    for key in keys:
+        _delete_from_gcs(key)
+
+
+def refresh_album_task(game_id: int) -> int:
+    """Background job precomputing the public album pages of a game."""
+    from app.utils.public_album import refresh_album
+    return refresh_album(game_id)
+
+
 def enqueue_email(to: str, subject: str, html_content: str, inline_images=None) -> None:
     """Enqueue an email sending task or run synchronously when disabled."""
     queue = getattr(current_app, "task_queue", None)
@@ -49,3 +111,127 @@ def enqueue_deliver_activity(activity: dict, sender_id: int) -> None:
         queue.enqueue(deliver_activity_task, activity, sender_id)
     else:
         deliver_activity_task(activity, sender_id)
+
+
+def enqueue_badge_recompute(game_id: int) -> None:
+    """Enqueue a game-wide badge recompute or run synchronously when disabled."""
+    queue = getattr(current_app, "task_queue", None)
+    if queue and current_app.config.get("USE_TASK_QUEUE", True):
+        queue.enqueue(recompute_game_badges_task, game_id)
+    else:
+        recompute_game_badges_task(game_id)
+
+
+def enqueue_album_refresh(game_id: int) -> None:
+    """Enqueue rebuilding a game's public album or run synchronously when disabled.
+
+    Call after the change to the game's submissions is committed.
+    """
+    queue = getattr(current_app, "task_queue", None)
+    if queue and current_app.config.get("USE_TASK_QUEUE", True):
+        try:
+            queue.enqueue(refresh_album_task, game_id)
+            return
+        except RedisError as exc:
+            current_app.logger.warning("Queueing album refresh failed: %s", exc)
+            return
+    refresh_album_task(game_id)
+
+
+def enqueue_image_derivatives(path: str) -> None:
+    """Enqueue image derivative generation or run synchronously when disabled."""
+    queue = getattr(current_app, "task_queue", None)
+    if queue and current_app.config.get("USE_TASK_QUEUE", True):
+        queue.enqueue(generate_image_derivatives_task, path)
+    else:
+        generate_image_derivatives_task(path)
+
+
+def enqueue_media_offload(path: str, content_type: str | None, derivatives: bool = False) -> None:
+    """Enqueue moving an upload to the storage backend or move it synchronously.
+
+    Only queued once the path is committed, see :mod:`app.utils.media_offload`;
+    the file is served from the static folder until the job succeeds. Failed
+    jobs are retried after 10, 60 and 300 seconds by the RQ scheduler.
+    """
+    queue = getattr(current_app, "task_queue", None)
+    if queue and current_app.config.get("USE_TASK_QUEUE", True):
+        try:
+            queue.enqueue(
+                offload_media_task,
+                path,
+                content_type,
+                derivatives,
+                retry=Retry(max=3, interval=[10, 60, 300]),
+            )
+            return
+        except RedisError as exc:
+            current_app.logger.warning(
+                "Queueing offload of %s failed, uploading inline: %s", path, exc
+            )
+    # Called from ``after_commit``, where the current session cannot run SQL;
+    # a new app context gets its own session.
+    with current_app.app_context():
+        try:
+            offload_media_task(path, content_type, derivatives)
+        except Exception as exc:
+            current_app.logger.warning(
+                "Offload of %s failed, serving it locally: %s", path, exc
+            )
+
+
+def enqueue_media_delete(keys: list[str]) -> None:
+    """Enqueue deleting bucket objects or delete them synchronously when disabled."""
+    if not keys:
+        return
+    queue = getattr(current_app, "task_queue", None)
+    if queue and current_app.config.get("USE_TASK_QUEUE", True):
+        try:
+            queue.enqueue(delete_media_task, keys)
+            return
+        except RedisError as exc:
+            current_app.logger.warning("Queueing media deletion failed: %s", exc)
+    delete_media_task(keys)
+
+
+def enqueue_submission_pipeline(submission_id: int) -> dict | None:
+    """Chain a submission's pending stages as RQ jobs or run them inline.
+
+    Each stage is retried on failure and later stages still run when an
+    earlier one gives up. Video transcoding goes to the ``video`` queue.
+    Returns the stage results when they ran inline and ``None`` once they
+    are queued.
+    """
+    from app.utils.submission_pipeline import (
+        VIDEO_STAGES,
+        pending_stages,
+        run_pending_stages,
+    )
+
+    queue = getattr(current_app, "task_queue", None)
+    if queue and current_app.config.get("USE_TASK_QUEUE", True):
+        video_queue = getattr(current_app, "video_queue", None) or queue
+        try:
+            previous = None
+            for stage in pending_stages(submission_id):
+                is_video = stage in VIDEO_STAGES
+                previous = (video_queue if is_video else queue).enqueue(
+                    run_submission_stage_task,
+                    submission_id,
+                    stage,
+                    job_id=f"submission-{submission_id}-{stage}",
+                    retry=Retry(max=3, interval=[10, 60, 300]),
+                    on_failure=Callback(submission_stage_failed),
+                    job_timeout=VIDEO_JOB_TIMEOUT if is_video else None,
+                    depends_on=(
+                        Dependency(jobs=[previous], allow_failure=True)
+                        if previous is not None
+                        else None
+                    ),
+                )
+            return None
+        except RedisError as exc:
+            current_app.logger.warning(
+                "Queueing submission %s failed, running inline: %s", submission_id, exc
+            )
+    return run_pending_stages(submission_id)
@@ -356,6 +356,9 @@ from .file_uploads import (
     save_bicycle_picture,
     save_submission_image,
     save_submission_video,
+    store_submission_video,
+    transcode_submission_video,
+    probe_video,
     public_media_url,
     delete_media_file,
     save_sponsor_logo,
@@ -370,11 +373,14 @@ from .email_utils import (
 
 from .quest_scoring import (
     MAX_POINTS_INT,
+    apply_user_score_delta,
+    reconcile_user_scores,
     update_user_score,
     can_complete_quest,
     get_last_relevant_completion_time,
     check_and_award_badges,
     check_and_revoke_badges,
+    recompute_game_badges,
     enhance_badges_with_task_info,
 )
 
@@ -405,6 +411,9 @@ __all__ = [
     "save_bicycle_picture",
     "save_submission_image",
     "save_submission_video",
+    "store_submission_video",
+    "transcode_submission_video",
+    "probe_video",
     "public_media_url",
     "delete_media_file",
     "save_sponsor_logo",
@@ -412,11 +421,14 @@ __all__ = [
     "send_email",
     "send_social_media_liaison_email",
     "check_and_send_liaison_emails",
+    "apply_user_score_delta",
+    "reconcile_user_scores",
     "update_user_score",
     "can_complete_quest",
     "get_last_relevant_completion_time",
     "check_and_award_badges",
     "check_and_revoke_badges",
+    "recompute_game_badges",
     "enhance_badges_with_task_info",
     "generate_demo_game",
     "import_quests_and_badges_from_csv",
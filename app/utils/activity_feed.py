@@ -0,0 +1,161 @@
+"""Game-scoped activity feed merging shouts and quest completions."""
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select, literal, union_all
+from sqlalchemy.orm import joinedload
+
+from ..models import db
+from ..models.game import ShoutBoardMessage
+from ..models.quest import Quest
+from ..models.user import UserQuest
+
+ACTIVITY_PAGE_SIZE = 20
+MAX_ACTIVITY_PAGE_SIZE = 100
+
+KIND_SHOUT = "shout"
+KIND_COMPLETION = "quest"
+
+
+def encode_cursor(timestamp: datetime, kind: str, item_id: int) -> str:
+    """Return an opaque cursor for the activity ``(timestamp, kind, id)``."""
+    raw = f"{timestamp.isoformat()}|{kind}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, str, int] | None:
+    """Decode ``cursor`` produced by :func:`encode_cursor`.
+
+    Returns ``None`` for a missing cursor and raises ``ValueError`` when the
+    cursor is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts_raw, kind, item_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        )
+        if kind not in (KIND_SHOUT, KIND_COMPLETION):
+            raise ValueError(kind)
+        return datetime.fromisoformat(ts_raw), kind, int(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def load_pinned_messages(game_id: int) -> list[ShoutBoardMessage]:
+    """Return the pinned shout board messages for ``game_id``, newest first."""
+    return (
+        ShoutBoardMessage.query
+        .options(joinedload(ShoutBoardMessage.user))
+        .filter_by(game_id=game_id, is_pinned=True)
+        .order_by(ShoutBoardMessage.timestamp.desc())
+        .all()
+    )
+
+
+def load_activity_page(game_id: int, cursor=None, limit: int = ACTIVITY_PAGE_SIZE):
+    """Return one page of unpinned activity for ``game_id``.
+
+    Unpinned shouts and the game's quest completions are merged with a
+    ``UNION ALL`` and ordered by ``(timestamp, kind, id)`` in SQL, so only
+    ``limit`` rows are read per request. ``cursor`` is the decoded tuple of
+    the last row of the previous page. Returns ``(items, next_cursor)``
+    where ``items`` are ORM objects and ``next_cursor`` is ``None`` on the
+    last page.
+    """
+    shouts = select(
+        literal(KIND_SHOUT).label("kind"),
+        ShoutBoardMessage.id.label("id"),
+        ShoutBoardMessage.timestamp.label("ts"),
+    ).where(
+        ShoutBoardMessage.game_id == game_id,
+        ShoutBoardMessage.is_pinned.isnot(True),
+        ShoutBoardMessage.timestamp.isnot(None),
+    )
+    completions = (
+        select(
+            literal(KIND_COMPLETION).label("kind"),
+            UserQuest.id.label("id"),
+            UserQuest.completed_at.label("ts"),
+        )
+        .join(Quest, Quest.id == UserQuest.quest_id)
+        .where(
+            Quest.game_id == game_id,
+            UserQuest.completions > 0,
+            UserQuest.completed_at.isnot(None),
+        )
+    )
+    feed = union_all(shouts, completions).subquery("activity_feed")
+
+    stmt = select(feed.c.kind, feed.c.id, feed.c.ts)
+    if cursor is not None:
+        ts, kind, item_id = cursor
+        stmt = stmt.where(
+            or_(
+                feed.c.ts < ts,
+                and_(feed.c.ts == ts, feed.c.kind < kind),
+                and_(feed.c.ts == ts, feed.c.kind == kind, feed.c.id < item_id),
+            )
+        )
+    stmt = stmt.order_by(
+        feed.c.ts.desc(), feed.c.kind.desc(), feed.c.id.desc()
+    ).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    shout_ids = [row.id for row in rows if row.kind == KIND_SHOUT]
+    completion_ids = [row.id for row in rows if row.kind == KIND_COMPLETION]
+    objects = {}
+    if shout_ids:
+        for msg in (
+            ShoutBoardMessage.query
+            .options(joinedload(ShoutBoardMessage.user))
+            .filter(ShoutBoardMessage.id.in_(shout_ids))
+        ):
+            objects[(KIND_SHOUT, msg.id)] = msg
+    if completion_ids:
+        for uq in (
+            UserQuest.query
+            .options(joinedload(UserQuest.user), joinedload(UserQuest.quest))
+            .filter(UserQuest.id.in_(completion_ids))
+        ):
+            objects[(KIND_COMPLETION, uq.id)] = uq
+
+    items = [objects[(row.kind, row.id)] for row in rows if (row.kind, row.id) in objects]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.ts, last.kind, last.id)
+    return items, next_cursor
+
+
+def serialize_activity(activity) -> dict:
+    """Return a JSON-ready dict for a shout or quest completion."""
+    user = activity.user
+    user_info = {
+        "id": user.id,
+        "display_name": user.display_name or user.username,
+    }
+    if isinstance(activity, ShoutBoardMessage):
+        return {
+            "type": "shout",
+            "id": activity.id,
+            "message": activity.message,
+            "timestamp": activity.timestamp.isoformat(),
+            "user": user_info,
+            "is_pinned": bool(activity.is_pinned),
+        }
+    return {
+        "type": "quest_completion",
+        "id": activity.id,
+        "timestamp": activity.completed_at.isoformat(),
+        "user": user_info,
+        "quest": {"id": activity.quest.id, "title": activity.quest.title},
+        "is_pinned": False,
+    }
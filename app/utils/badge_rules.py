@@ -0,0 +1,266 @@
+"""Compiled per-game badge rules.
+
+A :class:`BadgeRules` instance holds everything needed to decide which
+badges a user qualifies for in one game: the completion threshold of each
+badge-awarding quest and the set of quests that completes each category.
+Rules are compiled from ``Quest`` and ``Badge`` once and cached per
+application keyed by the game's ``rules_version``, which the mapper events
+in :mod:`app.models.score` bump whenever a quest or badge changes. A user's
+progress is a single ``{quest_id: completions}`` mapping from
+:func:`load_completions`, so evaluating every rule costs one query.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from flask import current_app
+
+from ..models import db, Badge, Quest, UserQuest
+from .game_scores import get_rules_version
+
+_CACHE_KEY = "badge_rules"
+
+
+@dataclass(frozen=True)
+class QuestRule:
+    """Badge-relevant attributes of one quest."""
+
+    quest_id: int
+    title: str
+    badge_id: int | None
+    threshold: int
+    option: str
+    category: str | None
+
+    @property
+    def awards_individually(self) -> bool:
+        return self.option in ("individual", "both")
+
+    @property
+    def counts_for_category(self) -> bool:
+        return self.option in ("category", "both")
+
+
+@dataclass(frozen=True)
+class BadgeInfo:
+    """Display attributes of one badge."""
+
+    id: int
+    name: str
+    description: str | None
+    image: str | None
+    category: str | None
+
+
+@dataclass
+class BadgeRules:
+    """Badge rules of a single game compiled at ``version``."""
+
+    game_id: int
+    version: int
+    badges: dict[int, BadgeInfo] = field(default_factory=dict)
+    quests: dict[int, QuestRule] = field(default_factory=dict)
+    badge_quests: dict[int, tuple[QuestRule, ...]] = field(default_factory=dict)
+    category_quests: dict[str, frozenset[int]] = field(default_factory=dict)
+    category_badges: dict[str, tuple[int, ...]] = field(default_factory=dict)
+
+    def awarding_quests(self, badge_id: int) -> tuple[QuestRule, ...]:
+        """Return the game's quests that award ``badge_id`` individually."""
+        return tuple(
+            q for q in self.badge_quests.get(badge_id, ()) if q.awards_individually
+        )
+
+    def category_complete(self, category: str | None, completions: dict) -> bool:
+        quest_ids = self.category_quests.get(category) if category else None
+        return bool(quest_ids) and all(completions.get(q, 0) >= 1 for q in quest_ids)
+
+    def individual_award(self, quest_id: int, completions: dict) -> int | None:
+        """Return the badge earned by reaching the threshold of ``quest_id``."""
+        quest = self.quests.get(quest_id)
+        if (
+            quest is not None
+            and quest.awards_individually
+            and quest.badge_id in self.badges
+            and completions.get(quest_id, 0) >= quest.threshold
+        ):
+            return quest.badge_id
+        return None
+
+    def category_awards(self, quest_id: int, completions: dict) -> tuple[int, ...]:
+        """Return the category badges earned once ``quest_id`` is completed."""
+        quest = self.quests.get(quest_id)
+        if (
+            quest is None
+            or not quest.counts_for_category
+            or not self.category_complete(quest.category, completions)
+        ):
+            return ()
+        return self.category_badges.get(quest.category, ())
+
+    def has_rule(self, badge_id: int) -> bool:
+        """Return whether any quest of the game can award ``badge_id``."""
+        badge = self.badges.get(badge_id)
+        if badge is None:
+            return False
+        return bool(self.awarding_quests(badge_id)) or bool(
+            badge.category and self.category_quests.get(badge.category)
+        )
+
+    def earned_badges(self, completions: dict) -> set[int]:
+        """Return every badge of the game that ``completions`` qualifies for."""
+        earned = {
+            q.badge_id
+            for q in self.quests.values()
+            if q.awards_individually
+            and q.badge_id in self.badges
+            and completions.get(q.quest_id, 0) >= q.threshold
+        }
+        for category, badge_ids in self.category_badges.items():
+            if self.category_complete(category, completions):
+                earned.update(badge_ids)
+        return earned
+
+    def still_earned(self, badge_id: int, completions: dict) -> bool:
+        """Return whether a held badge is still backed by ``completions``."""
+        badge = self.badges.get(badge_id)
+        if badge is None:
+            return True
+        if badge.category:
+            quest_ids = self.category_quests.get(badge.category, frozenset())
+            return all(completions.get(q, 0) >= 1 for q in quest_ids)
+        return all(
+            completions.get(q.quest_id, 0) >= q.threshold
+            for q in self.awarding_quests(badge_id)
+        )
+
+
+def _compile(game_id: int, version: int) -> BadgeRules:
+    rules = BadgeRules(game_id=game_id, version=version)
+    badge_rows = (
+        db.session.query(
+            Badge.id, Badge.name, Badge.description, Badge.image, Badge.category
+        )
+        .filter(Badge.game_id == game_id)
+        .order_by(Badge.id)
+    )
+    category_badges: dict[str, list[int]] = {}
+    for row in badge_rows:
+        rules.badges[row.id] = BadgeInfo(*row)
+        if row.category:
+            category_badges.setdefault(row.category, []).append(row.id)
+
+    quest_rows = (
+        db.session.query(
+            Quest.id,
+            Quest.title,
+            Quest.badge_id,
+            Quest.badge_awarded,
+            Quest.badge_option,
+            Quest.category,
+        )
+        .filter(Quest.game_id == game_id)
+        .order_by(Quest.id)
+    )
+    badge_quests: dict[int, list[QuestRule]] = {}
+    category_quests: dict[str, set[int]] = {}
+    for quest_id, title, badge_id, awarded, option, category in quest_rows:
+        quest = QuestRule(
+            quest_id=quest_id,
+            title=title,
+            badge_id=badge_id,
+            threshold=awarded if awarded is not None else 1,
+            option=str(option or "none"),
+            category=category,
+        )
+        rules.quests[quest_id] = quest
+        if badge_id is not None:
+            badge_quests.setdefault(badge_id, []).append(quest)
+        if category and quest.counts_for_category:
+            category_quests.setdefault(category, set()).add(quest_id)
+
+    rules.badge_quests = {k: tuple(v) for k, v in badge_quests.items()}
+    rules.category_quests = {k: frozenset(v) for k, v in category_quests.items()}
+    rules.category_badges = {k: tuple(v) for k, v in category_badges.items()}
+    return rules
+
+
+def get_badge_rules(game_id: int) -> BadgeRules:
+    """Return the compiled rules of ``game_id``, recompiling when stale."""
+    version = get_rules_version(game_id)
+    cache = current_app.extensions.setdefault(_CACHE_KEY, {})
+    rules = cache.get(game_id)
+    if rules is None or rules.version != version:
+        rules = _compile(game_id, version)
+        cache[game_id] = rules
+    return rules
+
+
+def quest_rule(quest) -> QuestRule:
+    """Return the :class:`QuestRule` of a ``Quest`` model instance."""
+    return QuestRule(
+        quest_id=quest.id,
+        title=quest.title,
+        badge_id=quest.badge_id,
+        threshold=quest.badge_awarded if quest.badge_awarded is not None else 1,
+        option=str(quest.badge_option or "none"),
+        category=quest.category,
+    )
+
+
+def load_completions(
+    user_id: int, game_id: int | None = None, quest_ids=None
+) -> dict[int, int]:
+    """Return ``{quest_id: completions}`` for ``user_id`` in one query.
+
+    The result covers the quests of ``game_id`` or, when ``quest_ids`` is
+    given, only those quests.
+    """
+    query = db.session.query(
+        UserQuest.quest_id, db.func.max(UserQuest.completions)
+    ).filter(UserQuest.user_id == user_id)
+    if quest_ids is not None:
+        if not quest_ids:
+            return {}
+        query = query.filter(UserQuest.quest_id.in_(list(quest_ids)))
+    if game_id is not None:
+        query = query.join(Quest, Quest.id == UserQuest.quest_id).filter(
+            Quest.game_id == game_id
+        )
+    return {
+        quest_id: completions or 0
+        for quest_id, completions in query.group_by(UserQuest.quest_id)
+    }
+
+
+def describe_badge(badge, quests, completions: dict | None, empty: str | None = "") -> dict:
+    """Return the badge card dict for ``badge`` awarded by ``quests``.
+
+    ``badge`` may be a :class:`BadgeInfo` or a ``Badge`` model and
+    ``quests`` are :class:`QuestRule` instances. Without ``completions``
+    the user's progress is reported as zero. ``empty`` fills the task
+    fields of badges no quest awards.
+    """
+    if quests:
+        task_names = ", ".join(q.title for q in quests)
+        task_ids = ", ".join(str(q.quest_id) for q in quests)
+        badge_awarded_counts = ", ".join(str(q.threshold) for q in quests)
+    else:
+        task_names = empty
+        task_ids = empty
+        badge_awarded_counts = "1"
+    counts = [(completions or {}).get(q.quest_id, 0) for q in quests]
+    is_complete = completions is not None and any(
+        c >= q.threshold for q, c in zip(quests, counts)
+    )
+    return {
+        "id": badge.id,
+        "name": badge.name,
+        "description": badge.description,
+        "image": badge.image,
+        "category": badge.category,
+        "task_names": task_names,
+        "task_ids": task_ids,
+        "badge_awarded_counts": badge_awarded_counts,
+        "user_completions": max(counts, default=0),
+        "is_complete": is_complete,
+    }
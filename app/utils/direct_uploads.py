@@ -0,0 +1,158 @@
+"""Uploads written by the browser straight to media storage.
+
+``POST /quests/direct-uploads`` checks the declared name, type and size and
+returns a short-lived signed ``PUT`` URL for a key below
+``uploads/incoming/<user_id>/``. The bytes then go from the browser to the
+storage backend without passing through the app servers. Submitting with
+``<field>_object`` set to that key wraps it in :class:`DirectUpload`;
+``store_submission_video`` validates a video from the object's metadata
+and moves it to ``videos/pending`` in storage. Photos are downloaded and
+stored by ``save_image_file`` like any other upload, so they are turned
+upright, stripped of metadata and deduplicated; HEIC photos are converted
+there as well.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import time
+import uuid
+from datetime import timedelta
+from io import BytesIO
+
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+
+from .file_uploads import (
+    ALLOWED_IMAGE_EXTENSIONS,
+    ALLOWED_IMAGE_MIMETYPES,
+    ALLOWED_VIDEO_EXTENSIONS,
+    ALLOWED_VIDEO_MIMETYPES,
+    MAX_IMAGE_BYTES,
+    MAX_VIDEO_BYTES,
+    _check_video_limits,
+    gcs_relative_path,
+    probe_video,
+    save_image_file,
+    validate_declared_upload,
+)
+from .media_storage import LocalStorage, get_storage
+
+INCOMING_PREFIX = "uploads/incoming"
+UPLOAD_URL_TTL = timedelta(minutes=15)
+#: Age after which unsubmitted incoming objects are deleted.
+INCOMING_TTL = timedelta(days=1)
+
+
+def start_direct_upload(user_id: int, filename: str, content_type: str, size: int) -> dict:
+    """Return a signed upload URL for one file of ``user_id``.
+
+    Raises ``ValueError`` when the declared file is not allowed.
+    """
+    ext = validate_declared_upload(filename, content_type, size)
+    key = f"{INCOMING_PREFIX}/{user_id}/{uuid.uuid4().hex}.{ext}"
+    url, headers = get_storage().upload_url(key, content_type, size, UPLOAD_URL_TTL)
+    return {
+        "object_key": key,
+        "upload_url": url,
+        "method": "PUT",
+        "headers": headers,
+        "expires_in": int(UPLOAD_URL_TTL.total_seconds()),
+    }
+
+
+class DirectUpload:
+    """An incoming object of the current user, used in place of a file."""
+
+    def __init__(self, key: str, user_id: int):
+        if not key.startswith(f"{INCOMING_PREFIX}/{user_id}/") or ".." in key:
+            raise ValueError("Unknown upload.")
+        self.storage = get_storage()
+        info = self.storage.stat(key)
+        if info is None:
+            raise ValueError("Unknown upload.")
+        self.key = key
+        self.size = info.size
+        self.filename = key.rsplit("/", 1)[-1]
+        self.mimetype = info.content_type or mimetypes.guess_type(key)[0] or ""
+
+    def _check(self, extensions, mimetypes_, max_bytes, size_error) -> str:
+        ext = self.filename.rsplit(".", 1)[-1].lower()
+        try:
+            if self.size > max_bytes:
+                raise ValueError(size_error)
+            if ext not in extensions:
+                raise ValueError("File extension not allowed.")
+            if self.mimetype not in mimetypes_:
+                raise ValueError("MIME type not allowed.")
+        except ValueError:
+            self.storage.delete(self.key)
+            raise
+        return ext
+
+    def register_image(self, subpath: str, **options) -> str:
+        """Store the object as an image below ``subpath`` and remove it.
+
+        The object is read once and passed to :func:`save_image_file` with
+        ``options``, which re-encodes it and writes or reuses the stored
+        copy. The incoming object is kept when storing fails for another
+        reason than an invalid image, so the submission can be retried.
+        """
+        self._check(
+            ALLOWED_IMAGE_EXTENSIONS, ALLOWED_IMAGE_MIMETYPES,
+            MAX_IMAGE_BYTES, "Image exceeds 8 MB limit",
+        )
+        upload = FileStorage(
+            stream=BytesIO(self.storage.read(self.key, self.size)),
+            filename=self.filename,
+            content_type=self.mimetype,
+        )
+        try:
+            stored = save_image_file(upload, subpath, **options)
+        except ValueError:
+            self.storage.delete(self.key)
+            raise
+        self.storage.delete(self.key)
+        return stored
+
+    def register_video(self) -> str:
+        """Validate the object as a video and move it to ``videos/pending``.
+
+        Objects in the bucket are checked for dimensions and duration when
+        the transcoding worker downloads them.
+        """
+        ext = self._check(
+            ALLOWED_VIDEO_EXTENSIONS, ALLOWED_VIDEO_MIMETYPES,
+            MAX_VIDEO_BYTES, "Video exceeds 25 MB limit",
+        )
+        stored = self.storage.move(
+            self.key, os.path.join("videos", "pending", f"{uuid.uuid4()}.{ext}")
+        )
+        if gcs_relative_path(stored) is None:
+            local_path = os.path.join(current_app.static_folder, stored)
+            try:
+                _check_video_limits(probe_video(local_path))
+            except ValueError:
+                os.remove(local_path)
+                raise
+        return stored
+
+
+def purge_incoming_uploads() -> int:
+    """Delete local incoming objects older than :data:`INCOMING_TTL`.
+
+    Buckets expire the ``uploads/incoming/`` prefix with a lifecycle rule
+    instead. Returns the number of files removed.
+    """
+    if not isinstance(get_storage(), LocalStorage):
+        return 0
+    root = os.path.join(current_app.static_folder, INCOMING_PREFIX)
+    cutoff = time.time() - INCOMING_TTL.total_seconds()
+    removed = 0
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    return removed
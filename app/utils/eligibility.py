@@ -0,0 +1,116 @@
+"""Quest eligibility from one aggregate over the user's recent submissions.
+
+A quest may be submitted ``completion_limit`` times within its frequency
+window. The count, earliest and latest submission inside that window are
+all the state needed to answer whether the user can submit now, when the
+oldest submission leaves the window and when the last relevant completion
+happened. :func:`quest_eligibility` reads them for one quest and
+:func:`bulk_quest_eligibility` for many quests in a single statement.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from ..models import db, Quest, QuestSubmission
+from app.constants import UTC, FREQUENCY_DELTA
+
+DEFAULT_PERIOD = timedelta(days=1)
+
+
+def _aware(dt: datetime | None) -> datetime | None:
+    """Return ``dt`` as a timezone aware value (SQLite drops tzinfo)."""
+    if dt is None or dt.tzinfo is not None:
+        return dt
+    return dt.replace(tzinfo=UTC)
+
+
+def quest_period(quest: Quest) -> timedelta:
+    """Return the completion window configured for ``quest``."""
+    return FREQUENCY_DELTA.get(quest.frequency, DEFAULT_PERIOD)
+
+
+@dataclass(frozen=True)
+class Eligibility:
+    """Whether a user may submit a quest now, and why not."""
+
+    can_verify: bool
+    next_eligible_time: datetime | None
+    last_relevant_completion: datetime | None
+    completions_in_period: int = 0
+    first_in_period: datetime | None = None
+
+
+def evaluate_eligibility(
+    quest: Quest,
+    count: int,
+    first: datetime | None,
+    last: datetime | None,
+) -> Eligibility:
+    """Build an :class:`Eligibility` from the in-window aggregate."""
+    first, last = _aware(first), _aware(last)
+    can_verify = count < quest.completion_limit
+    next_eligible_time = None
+    if not can_verify and first is not None:
+        next_eligible_time = first + quest_period(quest)
+    return Eligibility(
+        can_verify=can_verify,
+        next_eligible_time=next_eligible_time,
+        last_relevant_completion=last,
+        completions_in_period=count,
+        first_in_period=first,
+    )
+
+
+def _aggregate(user_id: int, quest_ids: list[int], now: datetime):
+    period_start = db.case(
+        {
+            frequency: now - delta
+            for frequency, delta in FREQUENCY_DELTA.items()
+        },
+        value=Quest.frequency,
+        else_=now - DEFAULT_PERIOD,
+    )
+    return (
+        db.session.query(
+            QuestSubmission.quest_id,
+            db.func.count(QuestSubmission.id),
+            db.func.min(QuestSubmission.timestamp),
+            db.func.max(QuestSubmission.timestamp),
+        )
+        .join(Quest, Quest.id == QuestSubmission.quest_id)
+        .filter(
+            QuestSubmission.user_id == user_id,
+            QuestSubmission.quest_id.in_(quest_ids),
+            QuestSubmission.timestamp >= period_start,
+        )
+        .group_by(QuestSubmission.quest_id)
+        .all()
+    )
+
+
+def bulk_quest_eligibility(
+    user_id: int, quests, now: datetime | None = None
+) -> dict[int, Eligibility]:
+    """Return ``{quest_id: Eligibility}`` for ``quests`` in one statement."""
+    quests = list(quests)
+    if not quests:
+        return {}
+    now = now or datetime.now(UTC)
+    rows = {
+        quest_id: (count, first, last)
+        for quest_id, count, first, last in _aggregate(
+            user_id, [quest.id for quest in quests], now
+        )
+    }
+    return {
+        quest.id: evaluate_eligibility(quest, *rows.get(quest.id, (0, None, None)))
+        for quest in quests
+    }
+
+
+def quest_eligibility(
+    user_id: int, quest: Quest, now: datetime | None = None
+) -> Eligibility:
+    """Return the user's :class:`Eligibility` for a single quest."""
+    return bulk_quest_eligibility(user_id, [quest], now)[quest.id]
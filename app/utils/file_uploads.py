@@ -1,5 +1,7 @@
 # File upload related helpers
 from __future__ import annotations
+import hashlib
+import json
 import os
 import shutil
 import subprocess
@@ -7,11 +9,15 @@ import uuid
 from urllib.parse import urlparse
 
 from flask import current_app, url_for
-from google.api_core.exceptions import GoogleAPIError
+from google.api_core.exceptions import GoogleAPIError, NotFound, PreconditionFailed
 from google.cloud import storage
-from PIL import ExifTags, Image, UnidentifiedImageError
+from google.cloud.storage import transfer_manager
+from google.cloud.storage.retry import DEFAULT_RETRY
+from PIL import ExifTags, Image, ImageOps
 from werkzeug.utils import secure_filename
 
+from .image_ingest import HEIF_SUPPORTED, MAX_IMAGE_DIMENSION, ingest_image
+
 ALLOWED_IMAGE_EXTENSIONS = {
     "png",
     "jpg",
@@ -29,15 +35,27 @@ ALLOWED_IMAGE_MIMETYPES = {
 }
 ALLOWED_VIDEO_MIMETYPES = {"video/mp4", "video/webm", "video/quicktime"}
 
+# HEIC/HEIF photos are converted on ingest and never stored as uploaded.
+HEIF_EXTENSIONS = {"heic", "heif"}
+HEIF_MIMETYPES = {"image/heic", "image/heif"}
+if HEIF_SUPPORTED:
+    ALLOWED_IMAGE_EXTENSIONS |= HEIF_EXTENSIONS
+    ALLOWED_IMAGE_MIMETYPES |= HEIF_MIMETYPES
+
 MAX_IMAGE_BYTES = 8 * 1024 * 1024
 MAX_VIDEO_BYTES = 25 * 1024 * 1024
 MAX_VIDEO_DURATION_SECONDS = 10.0
 MAX_JSON_BYTES = 1 * 1024 * 1024
-MAX_IMAGE_DIMENSION = 4096
 MAX_VIDEO_WIDTH = 1920
 MAX_VIDEO_HEIGHT = 1080
 ALLOWED_JSON_EXTENSIONS = {"json"}
 
+#: Chunk size of resumable and multipart uploads to GCS.
+GCS_CHUNK_SIZE = 8 * 1024 * 1024
+#: Files from this size on are uploaded as concurrent multipart chunks.
+GCS_PARALLEL_THRESHOLD = 16 * 1024 * 1024
+GCS_UPLOAD_WORKERS = 4
+
 
 def _validate_upload_file(
     file_obj,
@@ -74,6 +92,36 @@ def _validate_upload_file(
     return ext
 
 
+def validate_declared_upload(filename: str, content_type: str, size: int) -> str:
+    """Check the name, type and size a client declares before uploading.
+
+    Used when the bytes arrive later, through a resumable or direct upload.
+    Video types are held to the video limits and everything else to the
+    image limits. Returns the extension and raises ``ValueError`` like
+    :func:`_validate_upload_file`.
+    """
+    if not filename:
+        raise ValueError("Invalid file object passed.")
+    if content_type.startswith("video/"):
+        extensions, mimetypes, max_bytes = (
+            ALLOWED_VIDEO_EXTENSIONS, ALLOWED_VIDEO_MIMETYPES, MAX_VIDEO_BYTES
+        )
+    else:
+        extensions, mimetypes, max_bytes = (
+            ALLOWED_IMAGE_EXTENSIONS, ALLOWED_IMAGE_MIMETYPES, MAX_IMAGE_BYTES
+        )
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if ext not in extensions:
+        raise ValueError("File extension not allowed.")
+    if content_type not in mimetypes:
+        raise ValueError("MIME type not allowed.")
+    if size <= 0:
+        raise ValueError("Upload size must be positive.")
+    if size > max_bytes:
+        raise ValueError(f"File exceeds {max_bytes // (1024 * 1024)} MB limit")
+    return ext
+
+
 def _upload_to_gcs(local_path: str, remote_path: str, *, content_type: str | None = None) -> str | None:
     bucket_name = current_app.config.get("GCS_BUCKET")
     if not bucket_name:
@@ -82,8 +130,44 @@ def _upload_to_gcs(local_path: str, remote_path: str, *, content_type: str | Non
     client = storage.Client()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(remote_path)
-    blob.upload_from_filename(local_path, content_type=content_type)
+    _upload_blob(blob, local_path, content_type)
+    return _publish_blob(blob, remote_path)
 
+
+def _upload_blob(blob, local_path: str, content_type: str | None = None) -> None:
+    """Upload ``local_path`` to ``blob``, retrying transient GCS errors.
+
+    Files over :data:`GCS_CHUNK_SIZE` use a resumable upload that resends
+    only the failed chunk; from :data:`GCS_PARALLEL_THRESHOLD` on the chunks
+    are sent concurrently as an XML multipart upload. Media keys are content
+    addressed or random, so a retry finding the object written already is
+    done.
+    """
+    if os.path.getsize(local_path) >= GCS_PARALLEL_THRESHOLD:
+        transfer_manager.upload_chunks_concurrently(
+            local_path,
+            blob,
+            content_type=content_type,
+            chunk_size=GCS_CHUNK_SIZE,
+            worker_type=transfer_manager.THREAD,
+            max_workers=GCS_UPLOAD_WORKERS,
+            retry=DEFAULT_RETRY,
+        )
+        return
+    blob.chunk_size = GCS_CHUNK_SIZE
+    try:
+        blob.upload_from_filename(
+            local_path,
+            content_type=content_type,
+            if_generation_match=0,
+            retry=DEFAULT_RETRY,
+        )
+    except PreconditionFailed:
+        pass
+
+
+def _publish_blob(blob, remote_path: str) -> str:
+    """Apply the storage class, make ``blob`` public and return its URL."""
     storage_class = current_app.config.get("GCS_STORAGE_CLASS", "ARCHIVE")
     try:
         blob.update_storage_class(storage_class)
@@ -99,6 +183,12 @@ def _upload_to_gcs(local_path: str, remote_path: str, *, content_type: str | Non
             "Failed to make %s public: %s", remote_path, exc
         )
 
+    return _gcs_object_url(remote_path)
+
+
+def _gcs_object_url(remote_path: str) -> str:
+    """Return the URL of the bucket object ``remote_path``."""
+    bucket_name = current_app.config.get("GCS_BUCKET")
     base_url = current_app.config.get("GCS_BASE_URL") or f"https://storage.googleapis.com/{bucket_name}"
     return f"{base_url}/{remote_path}"
 
@@ -112,7 +202,9 @@ def _delete_from_gcs(remote_path: str) -> None:
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(remote_path)
     try:
-        blob.delete()
+        blob.delete(retry=DEFAULT_RETRY)
+    except NotFound:
+        pass
     except GoogleAPIError as exc:
         current_app.logger.warning(
             "Failed to delete %s from GCS: %s", remote_path, exc
@@ -145,16 +237,11 @@ def allowed_video_file(filename: str) -> bool:
 
 
 def correct_image_orientation(img: Image.Image) -> Image.Image:
-    tag = next((t for t, v in ExifTags.TAGS.items() if v == "Orientation"), None)
-    if not tag:
-        return img
+    """Return ``img`` rotated upright, or ``img`` itself when it already is."""
     try:
-        exif = img._getexif()
-        if exif:
-            orientation = exif.get(tag)
-            rotation = {3: 180, 6: -90, 8: 90}.get(orientation)
-            if rotation:
-                img = img.rotate(rotation, expand=True)
+        if img.getexif().get(ExifTags.Base.Orientation, 1) in (None, 1):
+            return img
+        return ImageOps.exif_transpose(img)
     except Exception as exc:
         current_app.logger.debug(
             "Failed to adjust image orientation: %s", exc
@@ -170,49 +257,53 @@ def save_image_file(
     allowed_mimetypes=ALLOWED_IMAGE_MIMETYPES,
     old_filename=None,
     output_ext=None,
+    derivatives=False,
+    offload=False,
 ):
-    """Save ``image_file`` under ``static/<subpath>``."""
-    ext = _validate_upload_file(
+    """Store ``image_file`` under ``<subpath>`` in the media storage.
+
+    The upload is decoded once and re-encoded upright and without metadata
+    in memory, see :mod:`app.utils.image_ingest`, then written once to the
+    storage backend. The file is named after the SHA-256 of those bytes and
+    an identical image already stored there is reused, see
+    :mod:`app.utils.media_dedup`. With ``derivatives`` the responsive widths
+    of the image are generated in the background, see
+    :mod:`app.utils.image_derivatives`. With ``offload`` the image is
+    written to the static folder and moved to the bucket by a worker after
+    commit, see :mod:`app.utils.media_offload`.
+    """
+    from .media_dedup import register_media, retain_media
+    from .media_offload import offload_enabled, schedule_offload
+    from .media_storage import LocalStorage, get_storage
+
+    _validate_upload_file(
         image_file,
         allowed_extensions,
         MAX_IMAGE_BYTES,
         "Image exceeds 8 MB limit",
         allowed_mimetypes=allowed_mimetypes,
     )
-    if output_ext:
-        ext = output_ext.lstrip(".").lower()
-
-    filename = secure_filename(f"{uuid.uuid4()}.{ext}")
-    upload_dir = os.path.join(current_app.static_folder, subpath)
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, filename)
-    image_file.save(file_path)
+    image = ingest_image(image_file.stream, output_ext)
+
+    digest = hashlib.sha256(image.data).hexdigest()
+    key = os.path.join(subpath, secure_filename(f"{digest}.{image.ext}"))
+    stored = retain_media(key)
+    if stored is None:
+        deferred = offload and offload_enabled()
+        media = LocalStorage() if deferred else get_storage()
+        written = media.write(key, image.data, image.content_type)
+        stored = register_media(key, written, digest, len(image.data))
+        if deferred:
+            if stored == written:
+                schedule_offload(stored, image.content_type, derivatives=derivatives)
+        elif derivatives:
+            from app.tasks import enqueue_image_derivatives
+
+            enqueue_image_derivatives(stored)
 
-    try:
-        with Image.open(file_path) as img:
-            corrected = correct_image_orientation(img)
-            width, height = corrected.size
-            if width > MAX_IMAGE_DIMENSION or height > MAX_IMAGE_DIMENSION:
-                os.remove(file_path)
-                raise ValueError("Image dimensions exceed 4096x4096 limit")
-            if corrected is not img:
-                corrected.save(file_path)
-    except UnidentifiedImageError:
-        os.remove(file_path)
-        raise ValueError("Invalid image file")
-
-    gcs_url = _upload_to_gcs(file_path, os.path.join(subpath, filename), content_type=image_file.mimetype)
     if old_filename:
-        old_path = os.path.join(current_app.static_folder, old_filename)
-        if os.path.exists(old_path):
-            os.remove(old_path)
-        _delete_from_gcs(old_filename)
-
-    if gcs_url:
-        os.remove(file_path)
-        return gcs_url
-
-    return os.path.join(subpath, filename)
+        delete_media_file(old_filename)
+    return stored
 
 
 def save_json_file(json_file, subpath, *, old_filename=None):
@@ -278,7 +369,9 @@ def generate_smoggy_images(image_path, game_id):
 
 def save_profile_picture(profile_picture_file, old_filename=None):
     uploads = current_app.config["UPLOAD_FOLDER"]
-    return save_image_file(profile_picture_file, uploads, old_filename=old_filename)
+    return save_image_file(
+        profile_picture_file, uploads, old_filename=old_filename, derivatives=True
+    )
 
 
 def save_badge_image(image_file):
@@ -288,6 +381,7 @@ def save_badge_image(image_file):
                 image_file,
                 os.path.join("images", "badge_images"),
                 output_ext="png",
+                derivatives=True,
             )
         )
     except Exception as e:
@@ -300,16 +394,101 @@ def save_bicycle_picture(bicycle_picture_file, old_filename=None):
 
 
 def save_submission_image(submission_image_file):
+    from .direct_uploads import DirectUpload
+
     try:
-        return save_image_file(submission_image_file, os.path.join("images", "verifications"))
+        subpath = os.path.join("images", "verifications")
+        if isinstance(submission_image_file, DirectUpload):
+            return submission_image_file.register_image(
+                subpath, derivatives=True, offload=True
+            )
+        return save_image_file(
+            submission_image_file, subpath, derivatives=True, offload=True
+        )
     except Exception as e:
         current_app.logger.error(f"Failed to save image: {e}")
         raise
 
 
-def save_submission_video(submission_video_file):
-    """Save an uploaded video for quest verification."""
+def _get_ffprobe_bin() -> str | None:
+    """Return ``ffprobe`` next to the configured ``ffmpeg`` or from ``PATH``."""
+    ffmpeg_bin = _get_ffmpeg_bin()
+    if ffmpeg_bin:
+        sibling = os.path.join(os.path.dirname(ffmpeg_bin), "ffprobe")
+        if os.path.exists(sibling):
+            return sibling
+    return shutil.which("ffprobe")
+
+
+def probe_video(path: str) -> dict | None:
+    """Return the width, height and duration of a video with one ``ffprobe``.
+
+    Returns ``None`` when ``ffprobe`` is unavailable and raises
+    ``ValueError`` when the file cannot be parsed.
+    """
+    ffprobe_bin = _get_ffprobe_bin()
+    if not ffprobe_bin:
+        return None
+    probe_cmd = [
+        ffprobe_bin,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=width,height:format=duration",
+        "-of",
+        "json",
+        path,
+    ]
     try:
+        probe = subprocess.run(
+            probe_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        info = json.loads(probe.stdout or b"{}")
+    except subprocess.CalledProcessError as e:
+        stderr_output = e.stderr.decode(errors="ignore") if e.stderr else ""
+        current_app.logger.error("ffprobe failed: %s", stderr_output)
+        raise ValueError("Invalid or corrupted video file") from e
+    except ValueError as e:
+        raise ValueError("Invalid or corrupted video file") from e
+
+    streams = info.get("streams") or [{}]
+    try:
+        duration = float(info.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return {
+        "width": streams[0].get("width"),
+        "height": streams[0].get("height"),
+        "duration": duration,
+    }
+
+
+def _check_video_limits(meta: dict | None) -> None:
+    if not meta:
+        return
+    width, height = meta.get("width"), meta.get("height")
+    if width and height and (width > MAX_VIDEO_WIDTH or height > MAX_VIDEO_HEIGHT):
+        raise ValueError("Video dimensions exceed 1920x1080 limit")
+    duration = meta.get("duration")
+    if duration is not None and duration > MAX_VIDEO_DURATION_SECONDS:
+        raise ValueError("Video duration exceeds 10 seconds limit")
+
+
+def store_submission_video(submission_video_file) -> str:
+    """Validate an uploaded video and keep it pending transcoding.
+
+    The upload is checked against the size, type, dimension and duration
+    limits and stored unmodified under ``videos/pending``. The returned
+    static path is passed to :func:`transcode_submission_video` later.
+    Objects uploaded straight to storage stay there until transcoding.
+    """
+    from .direct_uploads import DirectUpload
+
+    try:
+        if isinstance(submission_video_file, DirectUpload):
+            return submission_video_file.register_video()
         ext = _validate_upload_file(
             submission_video_file,
             ALLOWED_VIDEO_EXTENSIONS,
@@ -320,136 +499,148 @@ def save_submission_video(submission_video_file):
 
         header = submission_video_file.read(512)
         submission_video_file.seek(0)
-        ffmpeg_bin = _get_ffmpeg_bin()
-        if not ffmpeg_bin and current_app.config.get("FFMPEG_PATH") in (None, "ffmpeg"):
+        if not _get_ffmpeg_bin() and current_app.config.get("FFMPEG_PATH") in (None, "ffmpeg"):
             if header.isascii() and b"\x00" not in header:
                 raise ValueError("Invalid or corrupted video file")
-        tmp_dir = os.path.join(current_app.static_folder, "videos", "tmp")
-        os.makedirs(tmp_dir, exist_ok=True)
-        orig_name = secure_filename(f"{uuid.uuid4()}_orig.{ext}")
-        orig_path = os.path.join(tmp_dir, orig_name)
-        current_app.logger.debug("Saving original upload to %s", orig_path)
-        submission_video_file.save(orig_path)
-
-        ffprobe_bin = shutil.which("ffprobe")
-        if ffprobe_bin:
-            # Check dimensions
-            probe_cmd_dims = [
-                ffprobe_bin,
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=width,height",
-                "-of",
-                "csv=p=0",
-                orig_path,
-            ]
-            try:
-                probe = subprocess.run(
-                    probe_cmd_dims, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
-                dims = probe.stdout.decode().strip().split(",")
-                if len(dims) == 2:
-                    width, height = map(int, dims)
-                    if width > MAX_VIDEO_WIDTH or height > MAX_VIDEO_HEIGHT:
-                        os.remove(orig_path)
-                        raise ValueError("Video dimensions exceed 1920x1080 limit")
-            except subprocess.CalledProcessError as e:
-                stderr_output = e.stderr.decode(errors="ignore") if e.stderr else ""
-                current_app.logger.error("ffprobe (dims) failed: %s", stderr_output)
-                os.remove(orig_path)
-                raise ValueError("Invalid or corrupted video file") from e
-
-            # Check duration (in seconds)
-            probe_cmd_dur = [
-                ffprobe_bin,
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "default=noprint_wrappers=1:nokey=1",
-                orig_path,
-            ]
-            try:
-                probe = subprocess.run(
-                    probe_cmd_dur, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
-                out = probe.stdout.decode().strip()
-                try:
-                    duration = float(out)
-                except (TypeError, ValueError):
-                    duration = None
-                if duration is not None and duration > MAX_VIDEO_DURATION_SECONDS:
-                    os.remove(orig_path)
-                    raise ValueError("Video duration exceeds 10 seconds limit")
-            except subprocess.CalledProcessError as e:
-                stderr_output = e.stderr.decode(errors="ignore") if e.stderr else ""
-                current_app.logger.error("ffprobe (duration) failed: %s", stderr_output)
-                os.remove(orig_path)
-                raise ValueError("Invalid or corrupted video file") from e
-
-        uploads_dir = os.path.join(current_app.static_folder, "videos", "verifications")
-        os.makedirs(uploads_dir, exist_ok=True)
-
-        if not ffmpeg_bin:
-            current_app.logger.warning("ffmpeg not found, saving video without conversion")
-            final_name = secure_filename(f"{uuid.uuid4()}.{ext}")
-            final_path = os.path.join(uploads_dir, final_name)
-            shutil.move(orig_path, final_path)
-        else:
-            final_name = secure_filename(f"{uuid.uuid4()}.mp4")
-            final_path = os.path.join(uploads_dir, final_name)
-            ffmpeg_cmd = [
-                ffmpeg_bin,
-                "-i",
-                orig_path,
-                "-vf",
-                "scale='min(1280,iw)':-2",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "fast",
-                "-crf",
-                "28",
-                "-c:a",
-                "aac",
-                "-movflags",
-                "faststart",
-                "-y",
-                final_path,
-            ]
-            current_app.logger.debug("Running ffmpeg command: %s", " ".join(ffmpeg_cmd))
-            try:
-                subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except subprocess.CalledProcessError as e:
-                stderr_output = e.stderr.decode(errors="ignore") if e.stderr else ""
-                current_app.logger.error("ffmpeg failed: %s", stderr_output)
-                os.remove(orig_path)
-                current_app.logger.debug("Removed temporary upload %s", orig_path)
-                raise ValueError("Invalid or corrupted video file") from e
+        pending_dir = os.path.join(current_app.static_folder, "videos", "pending")
+        os.makedirs(pending_dir, exist_ok=True)
+        pending_name = secure_filename(f"{uuid.uuid4()}.{ext}")
+        pending_path = os.path.join(pending_dir, pending_name)
+        current_app.logger.debug("Saving original upload to %s", pending_path)
+        submission_video_file.save(pending_path)
 
+        try:
+            _check_video_limits(probe_video(pending_path))
+        except ValueError:
+            os.remove(pending_path)
+            raise
+
+        return os.path.join("videos", "pending", pending_name)
+    except Exception as e:
+        current_app.logger.error(f"Failed to save video: {e}")
+        raise
+
+
+def transcode_submission_video(pending_path: str) -> str:
+    """Compress a pending upload to H.264 and return its final location.
+
+    The local pending file is removed afterwards. Without ``ffmpeg`` the
+    upload is moved into place unmodified. ``FFMPEG_THREADS`` caps the
+    threads a single encode may use. Uploads still in the bucket are
+    downloaded and checked against the dimension and duration limits
+    first; the bucket object is kept so a retry can start over, and the
+    caller removes it with :func:`discard_pending_video` once the returned
+    path is committed. When a worker is available the result is moved to
+    the bucket after commit.
+    """
+    from .media_offload import offload_enabled, schedule_offload
+
+    remote_key = gcs_relative_path(pending_path)
+    if remote_key is not None:
+        from .media_storage import get_storage
+
+        pending_path = os.path.join("videos", "pending", os.path.basename(remote_key))
+    orig_path = os.path.join(current_app.static_folder, pending_path)
+    ext = orig_path.rsplit(".", 1)[-1].lower()
+    uploads_dir = os.path.join(current_app.static_folder, "videos", "verifications")
+    os.makedirs(uploads_dir, exist_ok=True)
+    if remote_key is not None:
+        os.makedirs(os.path.dirname(orig_path), exist_ok=True)
+        media = get_storage()
+        media.download(remote_key, orig_path)
+        try:
+            _check_video_limits(probe_video(orig_path))
+        except ValueError:
+            os.remove(orig_path)
+            raise
+
+    ffmpeg_bin = _get_ffmpeg_bin()
+    if not ffmpeg_bin:
+        current_app.logger.warning("ffmpeg not found, saving video without conversion")
+        final_name = secure_filename(f"{uuid.uuid4()}.{ext}")
+        final_path = os.path.join(uploads_dir, final_name)
+        shutil.move(orig_path, final_path)
+    else:
+        final_name = secure_filename(f"{uuid.uuid4()}.mp4")
+        final_path = os.path.join(uploads_dir, final_name)
+        ffmpeg_cmd = [
+            ffmpeg_bin,
+            "-i",
+            orig_path,
+            "-vf",
+            "scale='min(1280,iw)':-2",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "fast",
+            "-crf",
+            "28",
+            "-threads",
+            str(current_app.config.get("FFMPEG_THREADS") or 0),
+            "-c:a",
+            "aac",
+            "-movflags",
+            "faststart",
+            "-y",
+            final_path,
+        ]
+        current_app.logger.debug("Running ffmpeg command: %s", " ".join(ffmpeg_cmd))
+        try:
+            subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            stderr_output = e.stderr.decode(errors="ignore") if e.stderr else ""
+            current_app.logger.error("ffmpeg failed: %s", stderr_output)
             os.remove(orig_path)
             current_app.logger.debug("Removed temporary upload %s", orig_path)
-
-            final_size = os.path.getsize(final_path)
-            current_app.logger.debug("Compressed video size: %s bytes", final_size)
-            if final_size > MAX_VIDEO_BYTES:
+            raise ValueError("Invalid or corrupted video file") from e
+        except BaseException:
+            # A timed out job kills ffmpeg; drop its partial output.
+            if os.path.exists(final_path):
                 os.remove(final_path)
-                current_app.logger.debug("Compressed video exceeded max size and was deleted")
-                raise ValueError("Video exceeds 25 MB limit after compression")
+            raise
 
-        gcs_url = _upload_to_gcs(final_path, os.path.join("videos", "verifications", final_name), content_type="video/mp4")
-        if gcs_url:
+        os.remove(orig_path)
+        current_app.logger.debug("Removed temporary upload %s", orig_path)
+
+        final_size = os.path.getsize(final_path)
+        current_app.logger.debug("Compressed video size: %s bytes", final_size)
+        if final_size > MAX_VIDEO_BYTES:
             os.remove(final_path)
-            return gcs_url
+            current_app.logger.debug("Compressed video exceeded max size and was deleted")
+            raise ValueError("Video exceeds 25 MB limit after compression")
+
+    stored = os.path.join("videos", "verifications", final_name)
+    if offload_enabled():
+        schedule_offload(stored, "video/mp4")
+        return stored
+    gcs_url = _upload_to_gcs(final_path, stored, content_type="video/mp4")
+    if gcs_url:
+        os.remove(final_path)
+        return gcs_url
 
-        return os.path.join("videos", "verifications", final_name)
-    except Exception as e:
-        current_app.logger.error(f"Failed to save video: {e}")
-        raise
+    return stored
+
+
+def discard_pending_video(pending_path: str) -> None:
+    """Remove an upload that will not be transcoded and any local copy of it."""
+    remote_key = gcs_relative_path(pending_path)
+    if remote_key is not None:
+        from .media_storage import get_storage
+
+        get_storage().delete(remote_key)
+        pending_path = os.path.join("videos", "pending", os.path.basename(remote_key))
+    try:
+        os.remove(os.path.join(current_app.static_folder, pending_path))
+    except FileNotFoundError:
+        pass
+
+
+def save_submission_video(submission_video_file):
+    """Save an uploaded video for quest verification."""
+    pending = store_submission_video(submission_video_file)
+    stored = transcode_submission_video(pending)
+    discard_pending_video(pending)
+    return stored
 
 
 def public_media_url(path: str | None) -> str | None:
@@ -475,20 +666,39 @@ def public_media_url(path: str | None) -> str | None:
     return url_for("static", filename=filename)
 
 
+def gcs_relative_path(path: str) -> str | None:
+    """Return the bucket key of a GCS-hosted ``path`` or ``None``."""
+    bucket = current_app.config.get("GCS_BUCKET")
+    if not bucket:
+        return None
+    base_url = current_app.config.get("GCS_BASE_URL") or f"https://storage.googleapis.com/{bucket}"
+    if path.startswith(base_url + "/"):
+        return path[len(base_url) + 1 :]
+    return None
+
+
 def delete_media_file(path: str | None) -> None:
-    """Remove a locally stored or GCS-hosted media file."""
+    """Remove a locally stored or GCS-hosted media file.
+
+    Content-addressed files are kept until their last reference is dropped.
+    Bucket objects are deleted in the background. The reference count and
+    the derivatives are released with the session, so the caller commits.
+    """
     if not path:
         return
 
-    base_url = None
-    bucket = current_app.config.get("GCS_BUCKET")
-    gcs_base = current_app.config.get("GCS_BASE_URL")
-    if bucket:
-        base_url = gcs_base or f"https://storage.googleapis.com/{bucket}"
+    from .image_derivatives import delete_derivatives
+    from .media_dedup import release_media
+
+    if not release_media(path):
+        return
+
+    delete_derivatives(path)
+    rel = gcs_relative_path(path)
+    if rel is not None:
+        from app.tasks import enqueue_media_delete
 
-    if base_url and path.startswith(base_url + "/"):
-        rel = path[len(base_url) + 1 :]
-        _delete_from_gcs(rel)
+        enqueue_media_delete([rel])
         return
 
     local_path = path.lstrip("/")
@@ -0,0 +1,245 @@
+"""Maintenance of the materialized per-game score tables.
+
+``game_user_score`` holds one row per (game, user) with points, completed
+quests and badge count, and ``game_score_total`` one row per game with the
+sum of all points. Writers apply deltas inside the caller's transaction so
+the tables stay consistent with ``UserQuest``; :func:`rebuild_game_scores`
+recomputes them from scratch for repair.
+"""
+from __future__ import annotations
+
+from sqlalchemy import and_, delete, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models import db, user_badges, Badge, Game, Quest, UserQuest
+from ..models.score import GameUserScore, GameScoreTotal, bump_game_version
+from .leaderboard import queue_leaderboard_reset, queue_score_delta
+
+
+def _badge_count_query(game_id: int):
+    """Return a query of ``(user_id, badge_count)`` for ``game_id``.
+
+    Only badges attached to an individual or both-option quest of the game
+    are counted, matching what the leaderboard shows.
+    """
+    return (
+        db.session.query(
+            user_badges.c.user_id,
+            db.func.count(db.distinct(user_badges.c.badge_id)),
+        )
+        .join(Badge, and_(Badge.id == user_badges.c.badge_id, Badge.game_id == game_id))
+        .join(
+            Quest,
+            and_(
+                Quest.badge_id == Badge.id,
+                Quest.game_id == game_id,
+                Quest.badge_option.in_(["individual", "both"]),
+            ),
+        )
+        .group_by(user_badges.c.user_id)
+    )
+
+
+def _has_totals(game_id: int) -> bool:
+    return db.session.get(GameScoreTotal, game_id) is not None
+
+
+def _upsert_user_score(game_id: int, user_id: int, **deltas) -> None:
+    """Add ``deltas`` to the user's row, inserting it when missing."""
+    values = {
+        name: getattr(GameUserScore, name) + amount
+        for name, amount in deltas.items()
+    }
+    result = db.session.execute(
+        update(GameUserScore)
+        .where(GameUserScore.game_id == game_id, GameUserScore.user_id == user_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(GameUserScore(game_id=game_id, user_id=user_id, **deltas))
+    except IntegrityError:
+        # A concurrent request inserted the row first; apply as an update.
+        db.session.execute(
+            update(GameUserScore)
+            .where(GameUserScore.game_id == game_id, GameUserScore.user_id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def apply_score_delta(
+    game_id: int,
+    user_id: int,
+    points: int = 0,
+    completed_quests: int = 0,
+) -> None:
+    """Apply a points / completed quest delta for ``user_id`` in ``game_id``.
+
+    The change joins the current transaction; the caller commits. Games
+    that have never been materialized are rebuilt in full instead so the
+    totals row never covers only part of the game's history.
+    """
+    if not game_id or not user_id:
+        return
+    db.session.flush()
+    if not _has_totals(game_id):
+        _rebuild_game(game_id)
+        return
+    if points or completed_quests:
+        _upsert_user_score(
+            game_id, user_id, points=points, completed_quests=completed_quests
+        )
+    bump_game_version(db.session, game_id)
+    if points:
+        db.session.execute(
+            update(GameScoreTotal)
+            .where(GameScoreTotal.game_id == game_id)
+            .values(total_points=GameScoreTotal.total_points + points)
+            .execution_options(synchronize_session=False)
+        )
+        version = db.session.query(GameScoreTotal.version).filter_by(game_id=game_id).scalar()
+        queue_score_delta(game_id, user_id, points, version)
+
+
+def sync_badge_count(game_id: int, user_id: int) -> None:
+    """Recompute the materialized badge count for ``user_id`` in ``game_id``."""
+    if not game_id or not user_id:
+        return
+    db.session.flush()
+    if not _has_totals(game_id):
+        _rebuild_game(game_id)
+        return
+    row = _badge_count_query(game_id).filter(user_badges.c.user_id == user_id).first()
+    count = row[1] if row else 0
+    result = db.session.execute(
+        update(GameUserScore)
+        .where(GameUserScore.game_id == game_id, GameUserScore.user_id == user_id)
+        .values(badge_count=count)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount and count:
+        _upsert_user_score(game_id, user_id, badge_count=count)
+    bump_game_version(db.session, game_id)
+
+
+def remove_user_scores(user_id: int) -> None:
+    """Drop ``user_id`` from every game's materialized scores."""
+    rows = GameUserScore.query.filter_by(user_id=user_id).all()
+    for row in rows:
+        queue_leaderboard_reset(row.game_id)
+        bump_game_version(db.session, row.game_id)
+        db.session.execute(
+            update(GameScoreTotal)
+            .where(GameScoreTotal.game_id == row.game_id)
+            .values(total_points=GameScoreTotal.total_points - row.points)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.execute(
+        delete(GameUserScore)
+        .where(GameUserScore.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _rebuild_game(game_id: int) -> int:
+    """Recompute the materialized rows of one game without committing."""
+    queue_leaderboard_reset(game_id)
+    db.session.execute(
+        delete(GameUserScore)
+        .where(GameUserScore.game_id == game_id)
+        .execution_options(synchronize_session=False)
+    )
+    aggregates = (
+        db.session.query(
+            UserQuest.user_id,
+            db.func.coalesce(db.func.sum(UserQuest.points_awarded), 0),
+            db.func.sum(db.case((UserQuest.completions > 0, 1), else_=0)),
+        )
+        .join(Quest, Quest.id == UserQuest.quest_id)
+        .filter(Quest.game_id == game_id)
+        .group_by(UserQuest.user_id)
+        .all()
+    )
+    badge_counts = dict(_badge_count_query(game_id).all())
+    rows = [
+        {
+            "game_id": game_id,
+            "user_id": user_id,
+            "points": points or 0,
+            "completed_quests": completed or 0,
+            "badge_count": badge_counts.get(user_id, 0),
+        }
+        for user_id, points, completed in aggregates
+    ]
+    if rows:
+        db.session.execute(db.insert(GameUserScore), rows)
+
+    total = sum(row["points"] for row in rows)
+    totals = db.session.get(GameScoreTotal, game_id)
+    if totals is None:
+        db.session.add(GameScoreTotal(game_id=game_id, total_points=total))
+    else:
+        totals.total_points = total
+        bump_game_version(db.session, game_id)
+    db.session.flush()
+    return len(rows)
+
+
+def rebuild_game_scores(game_id: int | None = None) -> int:
+    """Rebuild the materialized scores for ``game_id`` or for every game.
+
+    Commits once per game and returns the number of user rows written.
+    """
+    if game_id is not None:
+        game_ids = [game_id]
+    else:
+        game_ids = [gid for (gid,) in db.session.query(Game.id).order_by(Game.id)]
+    written = 0
+    for gid in game_ids:
+        written += _rebuild_game(gid)
+        db.session.commit()
+    return written
+
+
+def ensure_game_scores(game_id: int) -> None:
+    """Materialize ``game_id`` on first read if it has never been built.
+
+    Concurrent first reads race to insert the rows; the loser rolls back and
+    reads the winner's. ``flask rebuild-scores`` builds every game up front.
+    """
+    if _has_totals(game_id):
+        return
+    try:
+        _rebuild_game(game_id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if not _has_totals(game_id):
+            raise
+
+
+def get_game_version(game_id: int) -> int:
+    """Return the game's current version, materializing it if needed."""
+    ensure_game_scores(game_id)
+    return db.session.query(GameScoreTotal.version).filter_by(
+        game_id=game_id
+    ).scalar() or 0
+
+
+def get_rules_version(game_id: int) -> int:
+    """Return the version of the game's quest and badge definitions."""
+    query = db.session.query(GameScoreTotal.rules_version).filter_by(game_id=game_id)
+    version = query.scalar()
+    if version is None:
+        ensure_game_scores(game_id)
+        version = query.scalar()
+    return version or 0
+
+
+def mark_game_changed(game_id: int) -> None:
+    """Bump the game's version within the current transaction."""
+    bump_game_version(db.session, game_id)
@@ -0,0 +1,23 @@
+"""Helpers for conditional GET responses."""
+from __future__ import annotations
+
+from flask import Response, request
+
+REVALIDATE = "private, no-cache"
+
+
+def etag_matches(etag: str) -> bool:
+    """Return ``True`` when the request's ``If-None-Match`` covers ``etag``."""
+    return request.if_none_match.contains(etag)
+
+
+def apply_etag(response: Response, etag: str, cache_control: str = REVALIDATE) -> Response:
+    """Attach a strong ``etag`` and ``Cache-Control`` header to ``response``."""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    """Return an empty ``304 Not Modified`` response for ``etag``."""
+    return apply_etag(Response(status=304), etag, cache_control)
@@ -0,0 +1,108 @@
+"""Content-addressed disk cache for ``/resize_image`` output.
+
+Every resized image is stored under a key derived from the source path,
+its modification time and size, the requested width and the negotiated
+output format. Replacing the source changes the key, so entries never need
+invalidating. The key doubles as the response ``ETag``, which lets a
+conditional request be answered from ``stat`` alone. The cache is bounded
+by ``RESIZE_CACHE_MAX_BYTES``: hits refresh an entry's mtime, and once the
+tracked size exceeds the limit the least recently used files are removed.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from flask import current_app
+
+#: Response header for resized images; cache keys change with the source.
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+#: Eviction trims the cache to this fraction of the limit.
+_LOW_WATER = 0.9
+
+_STATE_KEY = "resize_cache"
+
+
+def cache_key(path: str, stat: os.stat_result, width: int, fmt: str) -> str:
+    """Return the cache key and ETag of one resized variant of ``path``."""
+    raw = f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\0{width}\0{fmt}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cache_dir() -> str:
+    return current_app.config.get("RESIZE_CACHE_DIR") or os.path.join(
+        current_app.instance_path, "resize_cache"
+    )
+
+
+def _entry_path(key: str, ext: str) -> str:
+    return os.path.join(_cache_dir(), key[:2], f"{key}.{ext}")
+
+
+def _entries(root: str):
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            try:
+                yield full, os.stat(full)
+            except FileNotFoundError:
+                continue
+
+
+def _state() -> dict:
+    """Return this process's estimate of the cache size, scanning once."""
+    state = current_app.extensions.get(_STATE_KEY)
+    if state is None:
+        total = sum(stat.st_size for _, stat in _entries(_cache_dir()))
+        state = current_app.extensions[_STATE_KEY] = {"bytes": total}
+    return state
+
+
+def lookup(key: str, ext: str) -> str | None:
+    """Return the cached file for ``key`` and mark it recently used."""
+    entry = _entry_path(key, ext)
+    try:
+        os.utime(entry)
+    except FileNotFoundError:
+        return None
+    return entry
+
+
+def store(key: str, ext: str, data: bytes) -> str:
+    """Write ``data`` for ``key`` atomically and return the cached file."""
+    state = _state()
+    entry = _entry_path(key, ext)
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp_path, entry)
+
+    state["bytes"] += len(data)
+    limit = current_app.config.get("RESIZE_CACHE_MAX_BYTES") or DEFAULT_MAX_BYTES
+    if state["bytes"] > limit:
+        state["bytes"] = evict(int(limit * _LOW_WATER))
+    return entry
+
+
+def evict(target_bytes: int) -> int:
+    """Remove least recently used entries until at most ``target_bytes`` remain.
+
+    Other workers share the directory, so the size is measured afresh.
+    Returns the remaining size.
+    """
+    entries = sorted(_entries(_cache_dir()), key=lambda item: item[1].st_mtime)
+    total = sum(stat.st_size for _, stat in entries)
+    for full, stat in entries:
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(full)
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
+    return total
@@ -0,0 +1,290 @@
+"""Responsive derivatives of uploaded images.
+
+Feed images used to be decoded and resized by ``/resize_image`` on every
+request. Submission photos, avatars and badges are now resized once after
+upload: each width of :data:`DERIVATIVE_WIDTHS` up to the original width is
+written as AVIF (when Pillow supports it), WebP and JPEG beside the
+original, so ``images/verifications/abc.jpg`` gains
+``images/verifications/abc/w320.webp``, or uploaded under the same key in
+GCS. An ``image_derivative`` row records what exists, which lets
+:func:`image_srcsets` build ``srcset`` strings for a page of images with one
+query.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+from google.cloud import storage
+from PIL import Image, features
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models import db, Badge, ImageDerivative, QuestSubmission, User
+from .file_uploads import (
+    _upload_to_gcs,
+    gcs_relative_path,
+    public_media_url,
+)
+from .image_resize import display_width, has_alpha, load_scaled
+
+DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+
+_PENDING_KEY = "derivative_deletes_pending"
+
+#: Output formats in order of preference: name -> (Pillow format, MIME, extension).
+DERIVATIVE_FORMATS = {
+    "avif": ("AVIF", "image/avif", "avif"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+
+def supported_formats() -> list[str]:
+    """Return the derivative formats this Pillow build can encode."""
+    return [
+        name for name in DERIVATIVE_FORMATS
+        if name != "avif" or features.check("avif")
+    ]
+
+
+def _relative(path: str) -> str:
+    rel = gcs_relative_path(path)
+    if rel is not None:
+        return rel
+    return path.lstrip("/").removeprefix("static/")
+
+
+def derivative_path(path: str, width: int, fmt: str) -> str:
+    """Return where the ``width`` wide ``fmt`` copy of ``path`` is stored."""
+    stem = path.rsplit(".", 1)[0]
+    return f"{stem}/w{width}.{DERIVATIVE_FORMATS[fmt][2]}"
+
+
+@contextmanager
+def _local_source(path: str):
+    """Yield a local file holding the original, downloading it if needed."""
+    rel = _relative(path)
+    local = os.path.join(current_app.static_folder, rel)
+    if os.path.exists(local):
+        yield local
+        return
+    bucket_name = current_app.config.get("GCS_BUCKET")
+    if not bucket_name or gcs_relative_path(path) is None:
+        yield None
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        target = os.path.join(tmp_dir, os.path.basename(rel))
+        storage.Client().bucket(bucket_name).blob(rel).download_to_filename(target)
+        yield target
+
+
+def _write_widths(source: str, rel: str, formats: list[str], remote: bool):
+    """Encode every width of ``source``; return ``(source_width, widths)``."""
+    with Image.open(source) as img:
+        source_width = display_width(img)
+        img = load_scaled(img, DERIVATIVE_WIDTHS[-1])
+        current = img.convert("RGBA" if has_alpha(img) else "RGB")
+        widths = sorted({min(w, source_width) for w in DERIVATIVE_WIDTHS})
+        for width in reversed(widths):
+            if width != current.width:
+                height = max(1, round(current.height * width / current.width))
+                current = current.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                pil_format, mime, _ = DERIVATIVE_FORMATS[fmt]
+                target_rel = derivative_path(rel, width, fmt)
+                target = os.path.join(current_app.static_folder, target_rel)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                image = current.convert("RGB") if fmt == "jpeg" else current
+                image.save(target, pil_format, quality=80)
+                if remote:
+                    _upload_to_gcs(target, target_rel, content_type=mime)
+                    os.remove(target)
+    return source_width, widths
+
+
+def generate_derivatives(path: str) -> ImageDerivative | None:
+    """Write every derivative of the image stored at ``path``.
+
+    The original is decoded once at reduced scale and widths are produced
+    from the largest down, each from the previous step. Returns the updated
+    :class:`ImageDerivative`, or ``None`` when the original is missing or
+    cannot be decoded; the upload itself stays usable either way.
+    """
+    formats = supported_formats()
+    rel = _relative(path)
+    remote = gcs_relative_path(path) is not None
+    local_dir = os.path.join(current_app.static_folder, rel.rsplit(".", 1)[0])
+    with _local_source(path) as source:
+        if source is None:
+            current_app.logger.warning("Cannot generate derivatives, %s is missing", path)
+            return None
+        try:
+            source_width, widths = _write_widths(source, rel, formats, remote)
+        except OSError as exc:
+            current_app.logger.warning("Cannot generate derivatives of %s: %s", path, exc)
+            shutil.rmtree(local_dir, ignore_errors=True)
+            return None
+
+    if remote:
+        shutil.rmtree(local_dir, ignore_errors=True)
+
+    row = ImageDerivative.query.filter_by(path=path).first()
+    if row is None:
+        row = ImageDerivative(path=path)
+        db.session.add(row)
+    row.source_width = source_width
+    row.widths = widths
+    row.formats = formats
+    db.session.commit()
+    return row
+
+
+def delete_derivatives(path: str | None) -> None:
+    """Delete the derivative row of ``path`` and its files once the session commits.
+
+    The files are removed by the commit that removes the row, so a rolled
+    back caller keeps both.
+    """
+    if not path:
+        return
+    row = ImageDerivative.query.filter_by(path=path).first()
+    if row is None:
+        return
+    rel = _relative(path)
+    if gcs_relative_path(path) is not None:
+        pending = ("remote", [
+            derivative_path(rel, width, fmt)
+            for width in row.widths
+            for fmt in row.formats
+        ])
+    else:
+        pending = ("local", [rel.rsplit(".", 1)[0]])
+    db.session.info.setdefault(_PENDING_KEY, []).append(pending)
+    db.session.delete(row)
+
+
+@event.listens_for(Session, "after_commit")
+def _delete_pending(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+    from app.tasks import enqueue_media_delete
+
+    for where, keys in pending:
+        if where == "remote":
+            enqueue_media_delete(keys)
+        else:
+            for key in keys:
+                shutil.rmtree(os.path.join(current_app.static_folder, key), ignore_errors=True)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _srcset(row: ImageDerivative, fmt: str) -> str:
+    return ", ".join(
+        f"{public_media_url(derivative_path(row.path, width, fmt))} {width}w"
+        for width in row.widths
+    )
+
+
+def image_srcsets(paths) -> dict[str, dict[str, str]]:
+    """Return ``{path: {format: srcset}}`` for the given stored paths.
+
+    Paths without derivatives are omitted.
+    """
+    wanted = {p for p in paths if p}
+    if not wanted:
+        return {}
+    rows = ImageDerivative.query.filter(ImageDerivative.path.in_(wanted))
+    return {row.path: {fmt: _srcset(row, fmt) for fmt in row.formats} for row in rows}
+
+
+def image_thumbnails(paths, width: int = DERIVATIVE_WIDTHS[0]) -> dict[str, str]:
+    """Return ``{path: url}`` of the JPEG derivative nearest ``width``.
+
+    The narrowest stored width of at least ``width`` is preferred, falling
+    back to the widest one. Paths without derivatives are omitted.
+    """
+    wanted = {p for p in paths if p}
+    if not wanted:
+        return {}
+    thumbs = {}
+    for row in ImageDerivative.query.filter(ImageDerivative.path.in_(wanted)):
+        if not row.widths:
+            continue
+        chosen = next((w for w in row.widths if w >= width), row.widths[-1])
+        thumbs[row.path] = public_media_url(derivative_path(row.path, chosen, "jpeg"))
+    return thumbs
+
+
+def image_srcset(path: str | None) -> dict[str, str] | None:
+    """Return the ``{format: srcset}`` map of one image or ``None``."""
+    return image_srcsets([path]).get(path) if path else None
+
+
+def local_derivative(path: str, width: int, accept: str) -> tuple[str, str] | None:
+    """Return ``(file, mimetype)`` of a stored copy at least ``width`` wide.
+
+    The first format in :data:`DERIVATIVE_FORMATS` that ``accept`` allows
+    is chosen, with JPEG as the fallback. Only locally stored derivatives
+    are considered.
+    """
+    row = ImageDerivative.query.filter_by(path=path).first()
+    if row is None:
+        return None
+    fitting = [w for w in row.widths if w >= width]
+    if fitting:
+        chosen = fitting[0]
+    elif row.widths and row.widths[-1] == row.source_width:
+        # The original is narrower than requested; never upscale.
+        chosen = row.widths[-1]
+    else:
+        return None
+    accept = accept.lower()
+    for fmt in row.formats:
+        _, mime, _ = DERIVATIVE_FORMATS[fmt]
+        if fmt == "jpeg" or mime in accept:
+            target = os.path.join(
+                current_app.static_folder, derivative_path(path, chosen, fmt)
+            )
+            if os.path.exists(target):
+                return target, mime
+    return None
+
+
+def backfill_derivatives() -> int:
+    """Generate derivatives for stored images that have none; return the count."""
+    paths = {
+        path
+        for (path,) in db.session.query(QuestSubmission.image_url).filter(
+            QuestSubmission.image_url.isnot(None)
+        )
+    }
+    paths.update(
+        path
+        for (path,) in db.session.query(User.profile_picture).filter(
+            User.profile_picture.isnot(None)
+        )
+    )
+    paths.update(
+        os.path.join("images", "badge_images", image)
+        for (image,) in db.session.query(Badge.image).filter(Badge.image.isnot(None))
+    )
+    done = {path for (path,) in db.session.query(ImageDerivative.path)}
+    generated = 0
+    for path in sorted(paths - done):
+        try:
+            if generate_derivatives(path) is not None:
+                generated += 1
+        except (OSError, ValueError) as exc:
+            db.session.rollback()
+            current_app.logger.warning("Derivatives for %s failed: %s", path, exc)
+    return generated
@@ -0,0 +1,101 @@
+"""Single-pass ingest of uploaded images.
+
+:func:`ingest_image` reads the upload stream once: the header is checked
+against :data:`MAX_IMAGE_DIMENSION` before any pixels are decoded, the
+image is decoded and turned upright with ``exif_transpose``, and it is
+re-encoded in memory without EXIF, XMP or text chunks (the ICC profile is
+kept so colours stay correct). HEIC/HEIF photos, accepted when
+``pillow-heif`` is installed, become JPEG, or PNG when they have an alpha
+channel. Animated GIF and WebP uploads keep their bytes. The caller
+writes the result once to the storage backend.
+"""
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .image_resize import has_alpha
+
+try:
+    from pillow_heif import register_heif_opener
+except ImportError:  # HEIC uploads are refused without the plugin.
+    HEIF_SUPPORTED = False
+else:
+    register_heif_opener()
+    HEIF_SUPPORTED = True
+
+MAX_IMAGE_DIMENSION = 4096
+
+#: Pillow format -> (extension, MIME type, encoder options).
+OUTPUT_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg", {"quality": 90, "optimize": True}),
+    "PNG": ("png", "image/png", {"optimize": True}),
+    "WEBP": ("webp", "image/webp", {"quality": 90}),
+    "GIF": ("gif", "image/gif", {}),
+}
+
+_EXTENSION_FORMATS = {
+    "jpg": "JPEG",
+    "jpeg": "JPEG",
+    "png": "PNG",
+    "webp": "WEBP",
+    "gif": "GIF",
+}
+
+
+@dataclass
+class IngestedImage:
+    """Final bytes of an uploaded image."""
+
+    data: bytes
+    ext: str
+    content_type: str
+
+
+def _prepare(img: Image.Image, fmt: str) -> Image.Image:
+    if fmt == "JPEG":
+        return img if img.mode in ("RGB", "L") else img.convert("RGB")
+    if fmt == "WEBP":
+        return img if img.mode in ("RGB", "RGBA") else img.convert(
+            "RGBA" if has_alpha(img) else "RGB"
+        )
+    if fmt == "PNG" and img.mode not in ("1", "L", "LA", "P", "RGB", "RGBA", "I", "I;16"):
+        return img.convert("RGBA" if has_alpha(img) else "RGB")
+    return img
+
+
+def ingest_image(stream, output_ext: str | None = None) -> IngestedImage:
+    """Decode the image in ``stream`` and return its cleaned bytes.
+
+    ``output_ext`` forces the output format, for example ``png`` for
+    badges; otherwise web formats keep theirs. Raises ``ValueError`` for
+    undecodable images or images larger than :data:`MAX_IMAGE_DIMENSION`.
+    """
+    stream.seek(0)
+    try:
+        with Image.open(stream) as img:
+            width, height = img.size
+            if width > MAX_IMAGE_DIMENSION or height > MAX_IMAGE_DIMENSION:
+                raise ValueError("Image dimensions exceed 4096x4096 limit")
+
+            source = img.format if img.format in OUTPUT_FORMATS else None
+            fmt = _EXTENSION_FORMATS.get((output_ext or "").lstrip(".").lower())
+            if fmt is None:
+                fmt = source or ("PNG" if has_alpha(img) else "JPEG")
+            ext, content_type, options = OUTPUT_FORMATS[fmt]
+
+            if getattr(img, "is_animated", False) and fmt == source:
+                stream.seek(0)
+                return IngestedImage(stream.read(), ext, content_type)
+
+            icc_profile = img.info.get("icc_profile")
+            upright = _prepare(ImageOps.exif_transpose(img), fmt)
+            buf = io.BytesIO()
+            if icc_profile and fmt != "GIF":
+                options = {**options, "icc_profile": icc_profile}
+            upright.save(buf, fmt, **options)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise ValueError("Invalid image file") from exc
+    return IngestedImage(buf.getvalue(), ext, content_type)
@@ -0,0 +1,83 @@
+"""Reduced-cost decoding and resizing of uploaded images.
+
+A thumbnail never needs the full-resolution pixels of a multi-megapixel
+photo. :func:`load_scaled` asks the JPEG decoder for a DCT-scaled draft
+close to the target size, applies the EXIF orientation to that smaller
+image and finishes with ``thumbnail(reducing_gap=...)``, which shrinks by
+an integer factor before the final LANCZOS pass. Requested widths are
+snapped to :data:`WIDTH_BUCKETS` so arbitrary ``width`` parameters share a
+few cacheable variants. ``scripts/bench_resize.py`` compares this path with
+a full decode.
+"""
+from __future__ import annotations
+
+import io
+import math
+
+from PIL import ExifTags, Image, ImageOps
+
+WIDTH_BUCKETS = (64, 96, 128, 160, 200, 240, 320, 400, 480, 640, 800, 960, 1280, 1600, 1920)
+
+#: Passed to ``Image.thumbnail``; 3.0 keeps LANCZOS quality indistinguishable.
+REDUCING_GAP = 3.0
+
+# EXIF orientations that swap width and height.
+_TRANSPOSED = {5, 6, 7, 8}
+
+
+def bucket_width(width: int) -> int:
+    """Return the smallest bucket at least ``width`` wide, capped at the largest."""
+    for bucket in WIDTH_BUCKETS:
+        if bucket >= width:
+            return bucket
+    return WIDTH_BUCKETS[-1]
+
+
+def exif_orientation(img: Image.Image) -> int:
+    """Return the EXIF orientation of ``img``, ``1`` when absent."""
+    try:
+        return int(img.getexif().get(ExifTags.Base.Orientation, 1) or 1)
+    except (TypeError, ValueError, SyntaxError):
+        return 1
+
+
+def display_width(img: Image.Image) -> int:
+    """Return the width of ``img`` once its EXIF orientation is applied."""
+    return img.height if exif_orientation(img) in _TRANSPOSED else img.width
+
+
+def load_scaled(img: Image.Image, width: int) -> Image.Image:
+    """Return ``img`` upright and at most ``width`` pixels wide.
+
+    ``img`` must be freshly opened so that :meth:`Image.Image.draft` can
+    still pick a reduced JPEG scale. Images narrower than ``width`` keep
+    their size.
+    """
+    orientation = exif_orientation(img)
+    native_w, native_h = img.size
+    display_w = native_h if orientation in _TRANSPOSED else native_w
+    if display_w > width:
+        scale = width / display_w
+        # draft() only reduces JPEG decoding; other formats ignore it.
+        img.draft(img.mode, (math.ceil(native_w * scale), math.ceil(native_h * scale)))
+    if orientation != 1:
+        img = ImageOps.exif_transpose(img)
+    if img.width > width:
+        height = max(1, round(img.height * width / img.width))
+        img.thumbnail((width, height), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+    return img
+
+
+def has_alpha(img: Image.Image) -> bool:
+    return img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def encode(img: Image.Image, fmt: str, **params) -> bytes:
+    """Encode ``img`` as ``fmt``, keeping transparency where supported."""
+    if fmt == "JPEG":
+        img = img.convert("RGB")
+    else:
+        img = img.convert("RGBA" if has_alpha(img) else "RGB")
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return buf.getvalue()
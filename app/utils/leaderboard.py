@@ -0,0 +1,282 @@
+"""Redis sorted-set leaderboards backed by ``game_user_score``.
+
+Each game has a sorted set ``leaderboard:<game_id>`` mapping user ids to
+points. The set is built lazily from the materialized score table and then
+kept current by applying score deltas once the database transaction that
+produced them commits. A sentinel member marks a set as completely loaded,
+so a set recreated by a stray ``ZINCRBY`` after eviction is detected and
+rebuilt on the next read. When Redis is unavailable the same queries are
+answered from ``game_user_score`` directly, with ties broken the way Redis
+breaks them: by the member string, descending.
+
+Deltas and syncs agree through the game version, which every score change
+bumps in its own transaction. A sync stores the version its snapshot
+reflects in ``leaderboard:<game_id>:synced`` and a delta is applied only
+when its version is newer. Both sides ``WATCH`` the keys the other writes,
+so neither can interleave with the other.
+"""
+from __future__ import annotations
+
+import logging
+
+from flask import has_app_context
+from sqlalchemy import String, cast, event, select
+from sqlalchemy.orm import Session
+
+from ..models import db, User
+from ..models.score import GameScoreTotal, GameUserScore
+from . import game_scores
+from .redis_store import RedisError, WatchError, get_redis
+
+logger = logging.getLogger(__name__)
+
+COMPLETE_MARKER = "__complete__"
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+DEFAULT_AROUND = 5
+MAX_AROUND = 25
+
+_PENDING_KEY = "leaderboard_pending"
+
+
+def leaderboard_key(game_id: int) -> str:
+    return f"leaderboard:{game_id}"
+
+
+def _synced_key(game_id: int) -> str:
+    return f"{leaderboard_key(game_id)}:synced"
+
+
+def queue_score_delta(game_id: int, user_id: int, points: int, version: int | None) -> None:
+    """Apply ``points`` to the user's leaderboard entry after commit.
+
+    ``version`` is the game version written by the same transaction; the
+    delta is skipped when the set was synced from a snapshot that already
+    includes it. Without a version the set is dropped instead.
+    """
+    if version is None:
+        queue_leaderboard_reset(game_id)
+        return
+    db.session.info.setdefault(_PENDING_KEY, []).append(
+        ("delta", game_id, user_id, points, version)
+    )
+
+
+def queue_leaderboard_reset(game_id: int) -> None:
+    """Drop the game's sorted set after commit so it is rebuilt on read."""
+    db.session.info.setdefault(_PENDING_KEY, []).append(("reset", game_id, None, None, None))
+
+
+def _apply_delta(client, game_id: int, user_id: int, points: int, version: int) -> None:
+    key = leaderboard_key(game_id)
+    synced = _synced_key(game_id)
+    with client.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                pipe.watch(synced)
+                synced_version = pipe.get(synced)
+                # An unloaded set is built from SQL on the next read, and a
+                # snapshot at or past ``version`` already holds these points.
+                if synced_version is None or int(synced_version) >= version:
+                    pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.zincrby(key, points, str(user_id))
+                pipe.execute()
+                return
+            except WatchError:
+                continue
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+    try:
+        client = get_redis()
+        for action, game_id, user_id, points, version in pending:
+            if action == "reset":
+                client.delete(leaderboard_key(game_id), _synced_key(game_id))
+            elif points:
+                _apply_delta(client, game_id, user_id, points, version)
+    except RedisError as exc:
+        logger.warning("Leaderboard update failed: %s", exc)
+        try:
+            get_redis().delete(
+                *{key for p in pending for key in (leaderboard_key(p[1]), _synced_key(p[1]))}
+            )
+        except RedisError:
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _score_snapshot(game_id: int) -> tuple[int, list[tuple[int, int]]]:
+    # One statement, so the version and the rows come from the same snapshot,
+    # on its own connection, so a retry sees what committed since.
+    stmt = (
+        select(GameScoreTotal.version, GameUserScore.user_id, GameUserScore.points)
+        .select_from(GameScoreTotal)
+        .outerjoin(GameUserScore, GameUserScore.game_id == GameScoreTotal.game_id)
+        .where(GameScoreTotal.game_id == game_id)
+    )
+    with db.engine.connect() as conn:
+        rows = conn.execute(stmt).all()
+    version = rows[0][0] if rows else 0
+    return version, [(user_id, points) for _, user_id, points in rows if user_id is not None]
+
+
+def sync_leaderboard(game_id: int, client=None) -> int:
+    """Load the game's sorted set from ``game_user_score``.
+
+    The load is retried when a delta lands on the set while the snapshot is
+    being read, so the delta is counted either by the snapshot or on top of
+    it, never both.
+    """
+    client = client or get_redis()
+    game_scores.ensure_game_scores(game_id)
+    key = leaderboard_key(game_id)
+    with client.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                version, rows = _score_snapshot(game_id)
+                mapping = {str(user_id): points or 0 for user_id, points in rows}
+                mapping[COMPLETE_MARKER] = float("-inf")
+                pipe.multi()
+                pipe.delete(key)
+                pipe.zadd(key, mapping)
+                pipe.set(_synced_key(game_id), version)
+                pipe.execute()
+                return len(rows)
+            except WatchError:
+                continue
+
+
+def _ensure_loaded(client, game_id: int) -> str:
+    key = leaderboard_key(game_id)
+    if client.zscore(key, COMPLETE_MARKER) is None:
+        sync_leaderboard(game_id, client)
+    return key
+
+
+def _redis_entries(client, key: str, start: int, end: int) -> list[tuple[int, int, int]]:
+    rows = client.zrevrange(key, start, end, withscores=True)
+    return [
+        (start + offset + 1, int(member), int(score))
+        for offset, (member, score) in enumerate(rows)
+        if member != COMPLETE_MARKER
+    ]
+
+
+def _member(column):
+    return cast(column, String)
+
+
+def _sql_ranked():
+    return db.session.query(GameUserScore.user_id, GameUserScore.points).order_by(
+        GameUserScore.points.desc(), _member(GameUserScore.user_id).desc()
+    )
+
+
+def _sql_entries(game_id: int, start: int, count: int) -> list[tuple[int, int, int]]:
+    rows = _sql_ranked().filter(GameUserScore.game_id == game_id).offset(start).limit(count)
+    return [(start + i + 1, user_id, points or 0) for i, (user_id, points) in enumerate(rows)]
+
+
+def _sql_rank(game_id: int, user_id: int) -> tuple[int, int] | None:
+    row = GameUserScore.query.filter_by(game_id=game_id, user_id=user_id).first()
+    if row is None:
+        return None
+    ahead = GameUserScore.query.filter(
+        GameUserScore.game_id == game_id,
+        db.or_(
+            GameUserScore.points > row.points,
+            db.and_(
+                GameUserScore.points == row.points,
+                _member(GameUserScore.user_id) > str(user_id),
+            ),
+        ),
+    ).count()
+    return ahead + 1, row.points or 0
+
+
+def get_leaderboard_window(
+    game_id: int,
+    user_id: int | None = None,
+    offset: int = 0,
+    limit: int = DEFAULT_TOP_N,
+    around: int = DEFAULT_AROUND,
+) -> dict:
+    """Return a page of the leaderboard plus the user's rank and neighbours.
+
+    The result holds ``entries`` (ranks ``offset + 1`` through
+    ``offset + limit``), ``total`` participants, ``me`` as ``(rank, points)``
+    or ``None``, and ``around_me`` with up to ``around`` ranks either side.
+    Entries are ``(rank, user_id, points)`` tuples.
+    """
+    try:
+        client = get_redis()
+        key = _ensure_loaded(client, game_id)
+        total = max(client.zcard(key) - 1, 0)
+        entries = _redis_entries(client, key, offset, offset + limit - 1)
+        me = around_me = None
+        if user_id is not None:
+            rank = client.zrevrank(key, str(user_id))
+            if rank is not None:
+                me = (rank + 1, int(client.zscore(key, str(user_id)) or 0))
+                around_me = _redis_entries(
+                    client, key, max(rank - around, 0), rank + around
+                )
+    except RedisError as exc:
+        logger.warning("Leaderboard read from Redis failed, using SQL: %s", exc)
+        game_scores.ensure_game_scores(game_id)
+        total = GameUserScore.query.filter_by(game_id=game_id).count()
+        entries = _sql_entries(game_id, offset, limit)
+        me = around_me = None
+        if user_id is not None:
+            me = _sql_rank(game_id, user_id)
+            if me is not None:
+                start = max(me[0] - 1 - around, 0)
+                around_me = _sql_entries(game_id, start, me[0] - start + around)
+    return {"entries": entries, "total": total, "me": me, "around_me": around_me}
+
+
+def serialize_entries(game_id: int, entries) -> list[dict]:
+    """Hydrate ``(rank, user_id, points)`` tuples with user and score details."""
+    user_ids = {user_id for _, user_id, _ in entries}
+    if not user_ids:
+        return []
+    rows = (
+        db.session.query(
+            User.id,
+            User.username,
+            User.display_name,
+            GameUserScore.completed_quests,
+            GameUserScore.badge_count,
+        )
+        .join(GameUserScore, GameUserScore.user_id == User.id)
+        .filter(GameUserScore.game_id == game_id, User.id.in_(user_ids))
+        .all()
+    )
+    details = {row[0]: row for row in rows}
+    result = []
+    for rank, user_id, points in entries:
+        row = details.get(user_id)
+        if row is None:
+            continue
+        _, username, display_name, completed, badges = row
+        result.append({
+            "rank": rank,
+            "user_id": user_id,
+            "username": username,
+            "display_name": display_name,
+            "total_points": points,
+            "completed_quests": completed,
+            "badges_awarded": badges,
+        })
+    return result
@@ -0,0 +1,73 @@
+"""Content-addressed storage of uploaded images with reference counts.
+
+``save_image_file`` names each image after the SHA-256 of its final bytes,
+so the same photo uploaded again (a rider reusing a picture across quests)
+maps to the same key. :func:`retain_media` then hands back the stored copy
+and skips the write, the bucket upload and the derivatives. Every record
+pointing at the object holds one reference; :func:`release_media` tells
+``delete_media_file`` whether the last one is gone. Files saved before
+this scheme, or written straight to storage, have no :class:`MediaObject`
+and are deleted as before.
+"""
+from __future__ import annotations
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from ..models import db
+from ..models.media import MediaObject
+
+
+def retain_media(key: str) -> str | None:
+    """Add a reference to the object stored under ``key``.
+
+    Returns its stored path, or ``None`` when nothing is stored there yet.
+    The caller commits.
+    """
+    stmt = (
+        update(MediaObject)
+        .where(MediaObject.key == key)
+        .values(ref_count=MediaObject.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if not db.session.execute(stmt).rowcount:
+        return None
+    return db.session.query(MediaObject.path).filter_by(key=key).scalar()
+
+
+def register_media(key: str, path: str, sha256: str, size: int) -> str:
+    """Record a newly stored object holding one reference.
+
+    When a concurrent upload registered ``key`` first, a reference to that
+    row is added instead. Returns the stored path; the caller commits.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.add(
+                MediaObject(key=key, path=path, sha256=sha256, size=size, ref_count=1)
+            )
+    except IntegrityError:
+        return retain_media(key) or path
+    return path
+
+
+def release_media(path: str) -> bool:
+    """Drop one reference to ``path``.
+
+    Returns ``True`` when the stored file should be deleted: the last
+    reference is gone or ``path`` is not content-addressed.
+    """
+    row = MediaObject.query.filter_by(path=path).first()
+    if row is None:
+        return True
+    db.session.execute(
+        update(MediaObject)
+        .where(MediaObject.id == row.id)
+        .values(ref_count=MediaObject.ref_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.refresh(row)
+    if row.ref_count > 0:
+        return False
+    db.session.delete(row)
+    return True
@@ -0,0 +1,137 @@
+"""Background moves of submission media to the bucket.
+
+With ``GCS_BUCKET`` set, photos and videos used to be uploaded inside the
+request, so GCS latency was part of every submission and a GCS error
+failed it. When a task queue is available they are written to the static
+folder instead and served from there. Once the transaction storing the
+path commits, :func:`schedule_offload` queues :func:`offload_media`, which
+uploads the file and its derivatives with retries, switches every column in
+:data:`MEDIA_REFERENCES` from the local path to the bucket URL in one
+transaction and then removes the local copy. Without a queue the upload
+stays synchronous.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, exists, update
+from sqlalchemy.orm import Session
+
+from ..models import db, ImageDerivative, QuestSubmission
+from ..models.media import MediaObject
+from .image_derivatives import DERIVATIVE_FORMATS, derivative_path, generate_derivatives
+from .media_storage import get_storage
+
+_PENDING_KEY = "media_offload_pending"
+
+#: Columns referring to an offloaded file by its path.
+MEDIA_REFERENCES = (
+    QuestSubmission.image_url,
+    QuestSubmission.video_url,
+    MediaObject.path,
+)
+
+
+def offload_enabled() -> bool:
+    """Return whether new submission media is moved to the bucket by a worker."""
+    queue = getattr(current_app, "task_queue", None)
+    return bool(
+        current_app.config.get("GCS_BUCKET")
+        and queue
+        and current_app.config.get("USE_TASK_QUEUE", True)
+    )
+
+
+def schedule_offload(path: str, content_type: str | None, *, derivatives: bool = False) -> None:
+    """Move the static file ``path`` to the bucket once the session commits.
+
+    With ``derivatives`` the job generates the responsive widths first and
+    moves them along.
+    """
+    db.session.info.setdefault(_PENDING_KEY, []).append((path, content_type, derivatives))
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_pending(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+    from app.tasks import enqueue_media_offload
+
+    for path, content_type, derivatives in pending:
+        enqueue_media_offload(path, content_type, derivatives)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session, transaction) -> None:
+    # Savepoints, such as the one in ``register_media``, keep the pending moves.
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _switch(column, old: str, new: str) -> int:
+    return db.session.execute(
+        update(column.class_)
+        .where(column == old)
+        .values({column.key: new})
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _referenced(value: str) -> bool:
+    return any(
+        db.session.query(exists().where(column == value)).scalar()
+        for column in MEDIA_REFERENCES
+    )
+
+
+def offload_media(path: str, content_type: str | None, *, derivatives: bool = False) -> str | None:
+    """Upload the static file ``path`` and point its references at the copy.
+
+    Returns the stored URL, or ``None`` when the file is gone or was deleted
+    while uploading. Upload errors propagate so the job is retried; the
+    local file keeps being served meanwhile.
+    """
+    static = current_app.static_folder
+    local = os.path.join(static, path)
+    if not os.path.exists(local):
+        return None
+    if derivatives:
+        generate_derivatives(path)
+
+    media = get_storage()
+    stored = media.upload_file(path, local, content_type)
+    if stored == path:
+        return path
+    keys = [path]
+    row = ImageDerivative.query.filter_by(path=path).first()
+    if row is not None:
+        for width in row.widths:
+            for fmt in row.formats:
+                key = derivative_path(path, width, fmt)
+                media.upload_file(key, os.path.join(static, key), DERIVATIVE_FORMATS[fmt][1])
+                keys.append(key)
+
+    # A request reusing this image adds its reference by updating the
+    # media_object row, so locking it makes the switch see that reference.
+    db.session.query(MediaObject.id).filter_by(path=path).with_for_update().first()
+    switched = sum(_switch(column, path, stored) for column in MEDIA_REFERENCES)
+    if switched or _referenced(stored):
+        _switch(ImageDerivative.path, path, stored)
+    else:
+        current_app.logger.info("%s was deleted while uploading", path)
+        ImageDerivative.query.filter_by(path=path).delete()
+        stored = None
+    db.session.commit()
+
+    if stored is None:
+        for key in keys:
+            media.delete(key)
+    try:
+        os.remove(local)
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(os.path.join(static, path.rsplit(".", 1)[0]), ignore_errors=True)
+    return stored
@@ -0,0 +1,242 @@
+"""Storage backends for uploaded media.
+
+Objects are addressed by keys relative to the static folder, for example
+``images/verifications/abc.jpg``. :class:`GCSStorage` keeps them in the
+``GCS_BUCKET`` bucket; :class:`LocalStorage` keeps them under the static
+folder and stands in for GCS in development and tests, including the
+short-lived signed upload URLs, which it serves through
+``quests.direct_upload_put``. :func:`get_storage` picks the backend from
+the configuration. Transient objects such as pending videos are moved with
+:meth:`MediaStorage.move`; only served objects are published.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import shutil
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import timedelta
+from time import time
+
+import jwt
+from flask import current_app, url_for
+from google.api_core.exceptions import GoogleAPIError, NotFound
+from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
+
+from .file_uploads import _gcs_object_url, _publish_blob, _upload_blob
+
+_COPY_BLOCK = 64 * 1024
+
+
+@dataclass
+class StoredObject:
+    """Size and type of a stored object."""
+
+    size: int
+    content_type: str | None
+
+
+class MediaStorage(ABC):
+    """Interface shared by the storage backends."""
+
+    @abstractmethod
+    def upload_url(self, key: str, content_type: str, size: int, expires: timedelta) -> tuple[str, dict]:
+        """Return a URL and headers for one ``PUT`` of at most ``size`` bytes to ``key``."""
+
+    @abstractmethod
+    def write(self, key: str, data: bytes, content_type: str) -> str:
+        """Store ``data`` as ``key`` and return the value to store for it."""
+
+    @abstractmethod
+    def upload_file(self, key: str, local_path: str, content_type: str | None) -> str:
+        """Store the local file ``local_path`` as ``key`` and return the value to store for it."""
+
+    @abstractmethod
+    def stat(self, key: str) -> StoredObject | None:
+        """Return the size and type of ``key`` or ``None`` when it is missing."""
+
+    @abstractmethod
+    def read(self, key: str, length: int) -> bytes:
+        """Return the first ``length`` bytes of ``key``."""
+
+    @abstractmethod
+    def download(self, key: str, target: str) -> None:
+        """Copy ``key`` to the local file ``target``."""
+
+    @abstractmethod
+    def move(self, key: str, final_key: str) -> str:
+        """Move ``key`` to the transient ``final_key`` and return the value to store for it."""
+
+    @abstractmethod
+    def publish(self, key: str, final_key: str) -> str:
+        """Move ``key`` to the served ``final_key`` and return the value to store for it."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if it exists."""
+
+
+class LocalStorage(MediaStorage):
+    """Objects stored below the static folder."""
+
+    def _path(self, key: str) -> str:
+        return os.path.join(current_app.static_folder, key)
+
+    def upload_url(self, key, content_type, size, expires):
+        token = jwt.encode(
+            {"key": key, "content_type": content_type, "size": size,
+             "exp": time() + expires.total_seconds()},
+            current_app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+        return url_for("quests.direct_upload_put", token=token), {"Content-Type": content_type}
+
+    def accept_upload(self, token: str, content_type: str | None, stream) -> str:
+        """Store the body of a ``PUT`` to a URL from :meth:`upload_url`.
+
+        Raises ``ValueError`` for an invalid or expired token, a different
+        content type or a body larger than the signed size.
+        """
+        try:
+            grant = jwt.decode(
+                token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
+            )
+        except jwt.exceptions.InvalidTokenError as exc:
+            raise ValueError("Invalid or expired upload URL.") from exc
+        if content_type != grant["content_type"]:
+            raise ValueError("Content-Type does not match the upload URL.")
+
+        path = self._path(grant["key"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        written = 0
+        with open(path, "wb") as target:
+            while True:
+                block = stream.read(_COPY_BLOCK)
+                if not block:
+                    break
+                written += len(block)
+                if written > grant["size"]:
+                    break
+                target.write(block)
+        if written > grant["size"]:
+            os.remove(path)
+            raise ValueError("Upload exceeds the signed size.")
+        return grant["key"]
+
+    def write(self, key, data, content_type):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as target:
+            target.write(data)
+        return key
+
+    def upload_file(self, key, local_path, content_type):
+        path = self._path(key)
+        if os.path.abspath(local_path) != os.path.abspath(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copyfile(local_path, path)
+        return key
+
+    def stat(self, key):
+        try:
+            size = os.path.getsize(self._path(key))
+        except OSError:
+            return None
+        return StoredObject(size=size, content_type=mimetypes.guess_type(key)[0])
+
+    def read(self, key, length):
+        with open(self._path(key), "rb") as source:
+            return source.read(length)
+
+    def download(self, key, target):
+        shutil.copyfile(self._path(key), target)
+
+    def move(self, key, final_key):
+        final_path = self._path(final_key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(self._path(key), final_path)
+        return final_key
+
+    def publish(self, key, final_key):
+        return self.move(key, final_key)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class GCSStorage(MediaStorage):
+    """Objects stored in the ``GCS_BUCKET`` bucket."""
+
+    def __init__(self, bucket_name: str):
+        self.bucket = storage.Client().bucket(bucket_name)
+
+    def upload_url(self, key, content_type, size, expires):
+        # The signed range header makes GCS refuse bodies over ``size``.
+        headers = {
+            "Content-Type": content_type,
+            "x-goog-content-length-range": f"0,{size}",
+        }
+        url = self.bucket.blob(key).generate_signed_url(
+            version="v4",
+            expiration=expires,
+            method="PUT",
+            content_type=content_type,
+            headers={"x-goog-content-length-range": headers["x-goog-content-length-range"]},
+        )
+        return url, headers
+
+    def write(self, key, data, content_type):
+        blob = self.bucket.blob(key)
+        blob.upload_from_string(data, content_type=content_type)
+        return _publish_blob(blob, key)
+
+    def upload_file(self, key, local_path, content_type):
+        blob = self.bucket.blob(key)
+        _upload_blob(blob, local_path, content_type)
+        return _publish_blob(blob, key)
+
+    def stat(self, key):
+        blob = self.bucket.get_blob(key)
+        if blob is None:
+            return None
+        return StoredObject(size=blob.size, content_type=blob.content_type)
+
+    def read(self, key, length):
+        return self.bucket.blob(key).download_as_bytes(start=0, end=length - 1)
+
+    def download(self, key, target):
+        self.bucket.blob(key).download_to_filename(target)
+
+    def _copy(self, key, final_key):
+        blob = self.bucket.copy_blob(self.bucket.blob(key), self.bucket, final_key)
+        self.delete(key)
+        return blob
+
+    def move(self, key, final_key):
+        # Transient objects keep the default class and stay private.
+        self._copy(key, final_key)
+        return _gcs_object_url(final_key)
+
+    def publish(self, key, final_key):
+        return _publish_blob(self._copy(key, final_key), final_key)
+
+    def delete(self, key):
+        try:
+            self.bucket.blob(key).delete(retry=DEFAULT_RETRY)
+        except NotFound:
+            pass
+        except GoogleAPIError as exc:
+            current_app.logger.warning("Failed to delete %s from GCS: %s", key, exc)
+
+
+def get_storage() -> MediaStorage:
+    """Return the backend configured for uploaded media."""
+    bucket_name = current_app.config.get("GCS_BUCKET")
+    if bucket_name:
+        return GCSStorage(bucket_name)
+    return LocalStorage()
@@ -0,0 +1,195 @@
+"""Shared, read-only album pages keyed by ``album_code``.
+
+``/quests/album/<album_code>`` serves the same JSON to every viewer: there
+are no per-user fields, so responses carry ``Cache-Control: public`` with
+``s-maxage`` and a ``Surrogate-Key`` per game for CDN purges. Pages are
+stored in Redis under ``album:<game_id>:<version>:<cursor>``. Each change
+to a game's submissions bumps ``album_version:<game_id>`` and rebuilds the
+first :data:`PRECOMPUTED_PAGES` pages in the background, so a popular
+album link is answered from Redis without touching the database. Deeper
+pages are built on first request; stored pages expire after a day. When
+Redis is unavailable pages are built from the database on every request
+and tagged by their content. Like and reply counts change without a new
+version, so they are left out; viewers fetch them per submission.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from contextlib import nullcontext
+
+from flask import current_app, has_request_context, url_for
+
+from ..models import Game, Quest, QuestSubmission
+from .file_uploads import public_media_url
+from .image_derivatives import image_srcsets
+from .redis_store import RedisError, get_redis
+from .submission_feed import decode_cursor, load_submission_page
+
+ALBUM_PAGE_SIZE = 24
+PRECOMPUTED_PAGES = 5
+
+#: Lifetime of stored pages; a version bump makes older pages unreachable.
+PAGE_TTL = 24 * 60 * 60
+
+_FIRST = "first"
+
+
+def album_cache_control() -> str:
+    """Return the ``Cache-Control`` header for public album responses."""
+    max_age = current_app.config.get("ALBUM_CACHE_MAX_AGE", 60)
+    s_maxage = current_app.config.get("ALBUM_CDN_MAX_AGE", 600)
+    return f"public, max-age={max_age}, s-maxage={s_maxage}"
+
+
+def surrogate_key(game_id: int) -> str:
+    """Return the CDN surrogate key shared by every page of a game's album."""
+    return f"album-{game_id}"
+
+
+def _code_key(album_code: str) -> str:
+    return f"album_code:{album_code}"
+
+
+def _version_key(game_id: int) -> str:
+    return f"album_version:{game_id}"
+
+
+def _page_key(game_id: int, version: int, cursor: str | None) -> str:
+    return f"album:{game_id}:{version}:{cursor or _FIRST}"
+
+
+def page_etag(game_id: int, version: int, cursor: str | None) -> str:
+    """Return the ETag of one page of one album version."""
+    raw = f"{game_id}\0{version}\0{cursor or _FIRST}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def content_etag(page: str) -> str:
+    """Return the ETag of a page rendered without a known album version."""
+    return hashlib.sha256(page.encode()).hexdigest()[:32]
+
+
+def resolve_album(album_code: str) -> int | None:
+    """Return the game id behind ``album_code``, caching the lookup."""
+    try:
+        cached = get_redis().get(_code_key(album_code))
+    except RedisError:
+        cached = None
+    if cached is not None:
+        return int(cached) or None
+    game = Game.query.filter_by(album_code=album_code).first()
+    game_id = game.id if game else 0
+    try:
+        # Unknown codes are remembered briefly so new games appear quickly.
+        get_redis().set(_code_key(album_code), game_id, ex=PAGE_TTL if game_id else 60)
+    except RedisError:
+        pass
+    return game_id or None
+
+
+def album_version(game_id: int) -> int:
+    """Return the current album version of ``game_id``; ``0`` when unknown."""
+    try:
+        return int(get_redis().get(_version_key(game_id)) or 0)
+    except RedisError:
+        return 0
+
+
+def _entry(sub: QuestSubmission, srcsets: dict) -> dict:
+    user = sub.user
+    return {
+        "id": sub.id,
+        "quest_id": sub.quest_id,
+        "user_id": sub.user_id,
+        "user_display_name": user.display_name or user.username,
+        "user_username": user.username,
+        "user_profile_picture": (
+            url_for("static", filename=user.profile_picture)
+            if user.profile_picture
+            else url_for("static", filename=current_app.config["PLACEHOLDER_IMAGE"])
+        ),
+        "user_profile_picture_srcset": srcsets.get(user.profile_picture),
+        "image_url": public_media_url(sub.image_url),
+        "image_srcset": srcsets.get(sub.image_url),
+        "video_url": public_media_url(sub.video_url),
+        "video_status": sub.video_status,
+        "comment": sub.comment,
+        "timestamp": sub.timestamp.strftime("%Y-%m-%d %H:%M"),
+        "twitter_url": sub.twitter_url,
+        "fb_url": sub.fb_url,
+        "instagram_url": sub.instagram_url,
+    }
+
+
+def build_page(game_id: int, cursor: str | None) -> str:
+    """Render one album page from the database as a JSON string.
+
+    ``cursor`` must already be validated with :func:`decode_cursor`.
+    """
+    query = (
+        QuestSubmission.query
+        .join(Quest, QuestSubmission.quest_id == Quest.id)
+        .filter(Quest.game_id == game_id)
+    )
+    submissions, next_cursor = load_submission_page(
+        query, decode_cursor(cursor), ALBUM_PAGE_SIZE
+    )
+    srcsets = image_srcsets(
+        [sub.image_url for sub in submissions]
+        + [sub.user.profile_picture for sub in submissions]
+    )
+    # Background jobs have no request; build relative URLs as a request would.
+    ctx = nullcontext() if has_request_context() else current_app.test_request_context()
+    with ctx:
+        entries = [_entry(sub, srcsets) for sub in submissions]
+    return json.dumps(
+        {
+            "game_id": game_id,
+            "submissions": entries,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+def album_page(game_id: int, version: int, cursor: str | None) -> str:
+    """Return the JSON of one album page, from Redis when stored."""
+    key = _page_key(game_id, version, cursor)
+    try:
+        client = get_redis()
+        page = client.get(key)
+        if page is not None:
+            return page
+    except RedisError:
+        return build_page(game_id, cursor)
+    page = build_page(game_id, cursor)
+    try:
+        client.set(key, page, ex=PAGE_TTL)
+    except RedisError:
+        pass
+    return page
+
+
+def refresh_album(game_id: int, pages: int = PRECOMPUTED_PAGES) -> int:
+    """Start a new album version and store its first ``pages`` pages.
+
+    Returns the new version, or ``0`` when Redis is unavailable.
+    """
+    try:
+        client = get_redis()
+        version = client.incr(_version_key(game_id))
+    except RedisError as exc:
+        current_app.logger.warning("Album refresh for game %s failed: %s", game_id, exc)
+        return 0
+    cursor = None
+    for _ in range(pages):
+        page = build_page(game_id, cursor)
+        try:
+            client.set(_page_key(game_id, version, cursor), page, ex=PAGE_TTL)
+        except RedisError:
+            break
+        cursor = json.loads(page)["next_cursor"]
+        if not cursor:
+            break
+    return version
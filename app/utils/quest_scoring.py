@@ -1,25 +1,90 @@
 """Quest scoring and badge utilities."""
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import re
 
 from flask import current_app, url_for
+from sqlalchemy import and_, select, update
+from sqlalchemy.exc import IntegrityError
 
-from ..models import db, Quest, Badge, Game, User, UserQuest, QuestSubmission, ShoutBoardMessage
-from app.constants import UTC, FREQUENCY_DELTA
+from ..models import (
+    db,
+    user_badges,
+    Quest,
+    Badge,
+    BadgeAward,
+    Game,
+    User,
+    UserQuest,
+    ShoutBoardMessage,
+)
+from .badge_rules import describe_badge, get_badge_rules, load_completions, quest_rule
+from .eligibility import quest_eligibility
+from .game_scores import rebuild_game_scores, sync_badge_count
 
 MAX_POINTS_INT = 2 ** 63 - 1
 
+_BADGE_ID_RE = re.compile(r"data-badge-id='(\d+)'")
+
+
+def _clamped_score(expr):
+    """Clamp a score expression to ``0..MAX_POINTS_INT`` (portable LEAST/GREATEST)."""
+    return db.case(
+        (expr > MAX_POINTS_INT, MAX_POINTS_INT),
+        (expr < 0, 0),
+        else_=expr,
+    )
+
+
+def apply_user_score_delta(user_id: int, delta: int) -> None:
+    """Add ``delta`` points to the user's score with a single ``UPDATE``.
+
+    The change joins the current transaction; the caller commits.
+    """
+    if not delta:
+        return
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(score=_clamped_score(db.func.coalesce(User.score, 0) + delta))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def revoke_quest_points(quest_ids) -> None:
+    """Subtract the points awarded for ``quest_ids`` from each user's score.
+
+    Call before deleting the quests so the awarded points can still be read.
+    """
+    rows = (
+        db.session.query(UserQuest.user_id, db.func.sum(UserQuest.points_awarded))
+        .filter(UserQuest.quest_id.in_(list(quest_ids)))
+        .group_by(UserQuest.user_id)
+        .all()
+    )
+    for user_id, points in rows:
+        apply_user_score_delta(user_id, -(points or 0))
+
+
+def _summed_score(user_id_column):
+    return (
+        db.select(db.func.coalesce(db.func.sum(UserQuest.points_awarded), 0))
+        .where(UserQuest.user_id == user_id_column)
+        .scalar_subquery()
+    )
+
 
 def update_user_score(user_id: int) -> bool:
+    """Recompute the user's score from their ``UserQuest`` rows and commit."""
     try:
-        user = db.session.get(User, user_id)
-        if not user:
-            return False
-        total_points = sum(
-            quest.points_awarded for quest in user.user_quests if quest.points_awarded is not None
+        result = db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(score=_clamped_score(_summed_score(User.id)))
+            .execution_options(synchronize_session=False)
         )
-        user.score = min(total_points, MAX_POINTS_INT)
+        if not result.rowcount:
+            return False
         db.session.commit()
         return True
     except Exception:
@@ -27,236 +92,343 @@ def update_user_score(user_id: int) -> bool:
         return False
 
 
+def reconcile_user_scores(batch_size: int = 500) -> int:
+    """Correct users whose stored score drifted from their awarded points.
+
+    Drifted users are found with one grouped query and fixed in batches of
+    ``batch_size``. Returns the number of users corrected.
+    """
+    summed = _summed_score(User.id)
+    drifted = [
+        user_id
+        for (user_id,) in db.session.query(User.id).filter(
+            db.func.coalesce(User.score, 0) != _clamped_score(summed)
+        )
+    ]
+    for start in range(0, len(drifted), batch_size):
+        batch = drifted[start:start + batch_size]
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(batch))
+            .values(score=_clamped_score(_summed_score(User.id)))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    if drifted:
+        current_app.logger.warning("Reconciled score drift for %d users", len(drifted))
+    return len(drifted)
+
+
 def can_complete_quest(user_id: int, quest_id: int):
-    now = datetime.now(UTC)
     quest = db.session.get(Quest, quest_id)
     if not quest:
         return False, None
-    period_start = now - FREQUENCY_DELTA.get(quest.frequency, timedelta(days=1))
-    completions_within_period = QuestSubmission.query.filter(
-        QuestSubmission.user_id == user_id,
-        QuestSubmission.quest_id == quest_id,
-        QuestSubmission.timestamp >= period_start,
-    ).count()
-    can_verify = completions_within_period < quest.completion_limit
-    next_eligible_time = None
-    if not can_verify:
-        first_completion_in_period = QuestSubmission.query.filter(
-            QuestSubmission.user_id == user_id,
-            QuestSubmission.quest_id == quest_id,
-            QuestSubmission.timestamp >= period_start,
-        ).order_by(QuestSubmission.timestamp.asc()).first()
-        if first_completion_in_period:
-            next_eligible_time = (
-                first_completion_in_period.timestamp
-                + FREQUENCY_DELTA.get(quest.frequency, timedelta(days=1))
-            )
-    return can_verify, next_eligible_time
+    eligibility = quest_eligibility(user_id, quest)
+    return eligibility.can_verify, eligibility.next_eligible_time
 
 
 def get_last_relevant_completion_time(user_id: int, quest_id: int):
-    now = datetime.now(UTC)
     quest = db.session.get(Quest, quest_id)
     if not quest:
         return None
-    period_start = now - FREQUENCY_DELTA.get(quest.frequency, timedelta(0))
-    last_relevant_completion = QuestSubmission.query.filter(
-        QuestSubmission.user_id == user_id,
-        QuestSubmission.quest_id == quest_id,
-        QuestSubmission.timestamp >= period_start,
-    ).order_by(QuestSubmission.timestamp.desc()).first()
-    return last_relevant_completion.timestamp if last_relevant_completion else None
+    return quest_eligibility(user_id, quest).last_relevant_completion
+
+
+def _record_badge_award(user: User, badge: Badge, game_id: int, quest_id: int):
+    """Insert the ledger row for ``badge`` and return it.
+
+    Returns ``None`` when the user already holds the badge. Users who held
+    it before the ledger existed get a row without a new announcement.
+    """
+    if BadgeAward.query.filter_by(user_id=user.id, badge_id=badge.id).first():
+        return None
+    award = BadgeAward(
+        user_id=user.id, badge_id=badge.id, game_id=game_id, quest_id=quest_id
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(award)
+    except IntegrityError:
+        return None
+    if badge in user.badges:
+        db.session.commit()
+        return None
+    user.badges.append(badge)
+    return award
+
+
+def _announce_badge_award(award: BadgeAward, user: User, message: str) -> None:
+    """Post the shout board message for ``award`` and commit it."""
+    db.session.add(
+        ShoutBoardMessage(
+            message=message,
+            user_id=user.id,
+            game_id=award.game_id,
+            badge_award_id=award.id,
+        )
+    )
+    sync_badge_count(award.game_id, user.id)
+    db.session.commit()
+
+
+def backfill_badge_awards() -> tuple[int, int]:
+    """Create ledger rows for badges awarded before ``badge_award`` existed.
+
+    Existing badge announcements are linked to their award by parsing the
+    ``data-badge-id`` attribute once. Returns ``(awards_created,
+    messages_linked)``.
+    """
+    missing = (
+        db.session.query(user_badges.c.user_id, Badge.id, Badge.game_id)
+        .join(Badge, Badge.id == user_badges.c.badge_id)
+        .outerjoin(
+            BadgeAward,
+            and_(
+                BadgeAward.user_id == user_badges.c.user_id,
+                BadgeAward.badge_id == Badge.id,
+            ),
+        )
+        .filter(BadgeAward.id.is_(None))
+        .all()
+    )
+    for user_id, badge_id, game_id in missing:
+        db.session.add(BadgeAward(user_id=user_id, badge_id=badge_id, game_id=game_id))
+    db.session.flush()
+
+    awards = {
+        (a.user_id, a.badge_id): a.id
+        for a in BadgeAward.query.with_entities(
+            BadgeAward.id, BadgeAward.user_id, BadgeAward.badge_id
+        )
+    }
+    linked = 0
+    legacy_messages = ShoutBoardMessage.query.filter(
+        ShoutBoardMessage.badge_award_id.is_(None),
+        ShoutBoardMessage.message.contains("data-badge-id='"),
+    )
+    for message in legacy_messages:
+        match = _BADGE_ID_RE.search(message.message)
+        award_id = match and awards.get((message.user_id, int(match.group(1))))
+        if award_id:
+            message.badge_award_id = award_id
+            linked += 1
+    db.session.commit()
+    return len(missing), linked
 
 
 def check_and_award_badges(user_id: int, quest_id: int, game_id: int) -> None:
-    user = db.session.get(User, user_id)
-    quest = db.session.get(Quest, quest_id)
-    user_quest = UserQuest.query.filter_by(user_id=user_id, quest_id=quest_id).first()
-    if not user_quest:
+    if not game_id:
+        return
+    completions = load_completions(user_id, game_id)
+    if quest_id not in completions:
         return
+    rules = get_badge_rules(game_id)
+    individual = rules.individual_award(quest_id, completions)
+    category = rules.category_awards(quest_id, completions)
+    if individual is None and not category:
+        return
+
+    user = db.session.get(User, user_id)
+    rule = rules.quests[quest_id]
 
-    if (
-        quest.badge_option in ("individual", "both")
-        and quest.badge
-        and quest.badge.game_id == game_id
-        and user_quest.completions >= quest.badge_awarded
-    ):
-        existing_award = ShoutBoardMessage.query.filter_by(
-            user_id=user_id,
-            game_id=game_id,
-        ).filter(
-            ShoutBoardMessage.message.contains(f"data-badge-id='{quest.badge.id}'")
-        ).first()
-        if not existing_award:
-            user.badges.append(quest.badge)
+    if individual is not None:
+        badge = rules.badges[individual]
+        award = _record_badge_award(
+            user, db.session.get(Badge, badge.id), game_id, quest_id
+        )
+        if award is not None:
             msg = (
                 " earned the badge"
                 "<a class='quest-title' href='#' role='button' "
                 "data-open-badge "
-                f"data-badge-id='{quest.badge.id}' "
-                f"data-badge-name='{quest.badge.name}' "
-                f"data-badge-description='{quest.badge.description}' "
-                f"data-badge-image='{quest.badge.image}' "
-                f"data-task-name='{quest.title}' "
-                f"data-badge-awarded-count='{quest.badge_awarded}' "
-                f"data-task-id='{quest.id}' "
-                f"data-user-completions='{user_quest.completions}'>"
-                f"{quest.badge.name}</a>for completing quest "
+                f"data-badge-id='{badge.id}' "
+                f"data-badge-name='{badge.name}' "
+                f"data-badge-description='{badge.description}' "
+                f"data-badge-image='{badge.image}' "
+                f"data-task-name='{rule.title}' "
+                f"data-badge-awarded-count='{rule.threshold}' "
+                f"data-task-id='{quest_id}' "
+                f"data-user-completions='{completions[quest_id]}'>"
+                f"{badge.name}</a>for completing quest "
                 "<a class='quest-title' href='#' role='button' "
-                f"data-quest-detail='{quest.id}'>"
-                f"{quest.title}</a>"
+                f"data-quest-detail='{quest_id}'>"
+                f"{rule.title}</a>"
             )
-            sbm = ShoutBoardMessage(message=msg, user_id=user_id, game_id=game_id)
-            db.session.add(sbm)
-            db.session.commit()
-
-    if quest.badge_option in ("category", "both") and quest.category and game_id:
-        category_quests = (
-            Quest.query.filter_by(category=quest.category, game_id=game_id)
-            .filter(Quest.badge_option.in_(["category", "both"]))
-            .all()
+            _announce_badge_award(award, user, msg)
+
+    total = len(rules.category_quests.get(rule.category, ()))
+    for badge_id in category:
+        badge = rules.badges[badge_id]
+        award = _record_badge_award(
+            user, db.session.get(Badge, badge_id), game_id, quest_id
         )
-        if not category_quests:
-            return
-        completed_quests = [
-            ut.quest
-            for ut in user.user_quests
-            if (
-                ut.quest.category == quest.category
-                and ut.quest.game_id == game_id
-                and ut.quest.badge_option in ("category", "both")
-                and ut.completions >= 1
-            )
-        ]
-        if len(completed_quests) == len(category_quests):
-            category_badges = Badge.query.filter_by(
-                category=quest.category, game_id=game_id
-            ).all()
-            for badge in category_badges:
-                existing_award = ShoutBoardMessage.query.filter_by(
-                    user_id=user_id,
-                    game_id=game_id,
-                ).filter(
-                    ShoutBoardMessage.message.contains(f"data-badge-id='{badge.id}'")
-                ).first()
-                if not existing_award:
-                    url = url_for("static", filename=f"images/badge_images/{badge.image}")
-                    user.badges.append(badge)
-                    msg = (
-                        " earned the badge "
+        if award is not None:
+            url = url_for("static", filename=f"images/badge_images/{badge.image}")
+            msg = (
+                " earned the badge "
                 "<a class='quest-title' href='#' role='button' "
                 "data-open-badge "
                 f"data-badge-id='{badge.id}' "
-                        f"data-badge-name='{badge.name}' "
-                        f"data-badge-description='{badge.description}' "
-                        f"data-badge-image='{url}' "
-                        f"data-task-name='{quest.title}' "
-                        "data-badge-awarded-count='1' "
-                        f"data-task-id='{quest.id}' "
-                        f"data-user-completed='{len(completed_quests)}' "
-                        f"data-total-tasks='{len(category_quests)}'>"
-                        f"{badge.name}</a> for completing all quests in category "
-                        f"'{quest.category}'"
-                    )
-                    sbm = ShoutBoardMessage(message=msg, user_id=user_id, game_id=game_id)
-                    db.session.add(sbm)
-                    db.session.commit()
+                f"data-badge-name='{badge.name}' "
+                f"data-badge-description='{badge.description}' "
+                f"data-badge-image='{url}' "
+                f"data-task-name='{rule.title}' "
+                "data-badge-awarded-count='1' "
+                f"data-task-id='{quest_id}' "
+                f"data-user-completed='{total}' "
+                f"data-total-tasks='{total}'>"
+                f"{badge.name}</a> for completing all quests in category "
+                f"'{rule.category}'"
+            )
+            _announce_badge_award(award, user, msg)
 
 
 def check_and_revoke_badges(user_id: int, game_id: int | None = None) -> None:
     user = db.session.get(User, user_id)
     if not user:
         return
+    held = [
+        badge
+        for badge in user.badges
+        if badge.game_id is not None and (game_id is None or badge.game_id == game_id)
+    ]
+    evaluated = {}
     badges_to_remove = []
-    for badge in user.badges:
-        if badge.category:
-            query = Quest.query.filter_by(category=badge.category)
-            if game_id is not None:
-                query = query.filter_by(game_id=game_id)
-            current_category_quests = (
-                query.filter(Quest.badge_option.in_(["category", "both"]))
-                .all()
+    for badge in held:
+        if badge.game_id not in evaluated:
+            evaluated[badge.game_id] = (
+                get_badge_rules(badge.game_id),
+                load_completions(user_id, badge.game_id),
             )
-            completed_quests = {
-                ut.quest
-                for ut in user.user_quests
-                if (
-                    ut.quest.category == badge.category
-                    and (game_id is None or ut.quest.game_id == game_id)
-                    and ut.quest.badge_option in ("category", "both")
-                    and ut.completions >= 1
-                )
-            }
-            if len(completed_quests) != len(current_category_quests):
-                badges_to_remove.append(badge)
-        else:
-            all_met = True
-            for quest in badge.quests:
-                if quest.badge_option not in ("individual", "both"):
-                    continue
-                user_quest = UserQuest.query.filter_by(
-                    user_id=user_id, quest_id=quest.id
-                ).first()
-                if not user_quest or user_quest.completions < quest.badge_awarded:
-                    all_met = False
-                    break
-            if not all_met:
-                badges_to_remove.append(badge)
+        rules, completions = evaluated[badge.game_id]
+        if not rules.still_earned(badge.id, completions):
+            badges_to_remove.append(badge)
     for badge in badges_to_remove:
         user.badges.remove(badge)
-        messages = ShoutBoardMessage.query.filter_by(user_id=user_id, game_id=game_id).all()
-        for message in messages:
-            if f"data-badge-id='{badge.id}'" in message.message:
-                db.session.delete(message)
+        award_ids = select(BadgeAward.id).where(
+            BadgeAward.user_id == user_id, BadgeAward.badge_id == badge.id
+        )
+        ShoutBoardMessage.query.filter(
+            ShoutBoardMessage.badge_award_id.in_(award_ids)
+        ).delete(synchronize_session=False)
+        BadgeAward.query.filter_by(user_id=user_id, badge_id=badge.id).delete(
+            synchronize_session=False
+        )
+        sync_badge_count(badge.game_id, user_id)
         db.session.commit()
 
 
+def recompute_game_badges(game_id: int, batch_size: int = 500) -> dict:
+    """Bring every participant's badges in ``game_id`` in line with its rules.
+
+    Completion counts of all participants are read with one grouped query
+    and compared with the current holders. Missing awards are inserted and
+    stale ones deleted in batches of ``batch_size``, committing per batch;
+    no shout board messages are posted for badges granted this way. Badges
+    that no quest of the game can award are left untouched. Returns the
+    number of ``users`` evaluated and of badges ``awarded`` and ``revoked``.
+    """
+    rules = get_badge_rules(game_id)
+    progress: dict[int, dict[int, int]] = {}
+    rows = (
+        db.session.query(
+            UserQuest.user_id, UserQuest.quest_id, db.func.max(UserQuest.completions)
+        )
+        .join(Quest, Quest.id == UserQuest.quest_id)
+        .filter(Quest.game_id == game_id)
+        .group_by(UserQuest.user_id, UserQuest.quest_id)
+    )
+    for user_id, quest_id, completions in rows:
+        progress.setdefault(user_id, {})[quest_id] = completions or 0
+
+    held = set(
+        db.session.query(user_badges.c.user_id, user_badges.c.badge_id)
+        .join(Badge, Badge.id == user_badges.c.badge_id)
+        .filter(Badge.game_id == game_id)
+    )
+    target = {
+        (user_id, badge_id)
+        for user_id, completions in progress.items()
+        for badge_id in rules.earned_badges(completions)
+    }
+    to_award = sorted(target - held)
+    to_revoke = sorted(
+        (user_id, badge_id)
+        for user_id, badge_id in held - target
+        if rules.has_rule(badge_id)
+    )
+    ledger = set(
+        db.session.query(BadgeAward.user_id, BadgeAward.badge_id).filter(
+            BadgeAward.game_id == game_id
+        )
+    )
+
+    for start in range(0, len(to_award), batch_size):
+        batch = to_award[start:start + batch_size]
+        db.session.execute(
+            user_badges.insert(),
+            [{"user_id": u, "badge_id": b} for u, b in batch],
+        )
+        awards = [
+            {"user_id": u, "badge_id": b, "game_id": game_id}
+            for u, b in batch
+            if (u, b) not in ledger
+        ]
+        if awards:
+            db.session.execute(db.insert(BadgeAward), awards)
+        db.session.commit()
+
+    for start in range(0, len(to_revoke), batch_size):
+        by_badge: dict[int, list[int]] = {}
+        for user_id, badge_id in to_revoke[start:start + batch_size]:
+            by_badge.setdefault(badge_id, []).append(user_id)
+        for badge_id, user_ids in by_badge.items():
+            award_ids = select(BadgeAward.id).where(
+                BadgeAward.badge_id == badge_id, BadgeAward.user_id.in_(user_ids)
+            )
+            ShoutBoardMessage.query.filter(
+                ShoutBoardMessage.badge_award_id.in_(award_ids)
+            ).delete(synchronize_session=False)
+            BadgeAward.query.filter(
+                BadgeAward.badge_id == badge_id, BadgeAward.user_id.in_(user_ids)
+            ).delete(synchronize_session=False)
+            db.session.execute(
+                user_badges.delete().where(
+                    user_badges.c.badge_id == badge_id,
+                    user_badges.c.user_id.in_(user_ids),
+                )
+            )
+        db.session.commit()
+
+    if to_award or to_revoke:
+        db.session.expire_all()
+        rebuild_game_scores(game_id)
+    return {
+        "users": len(progress.keys() | {user_id for user_id, _ in held}),
+        "awarded": len(to_award),
+        "revoked": len(to_revoke),
+    }
+
+
 def enhance_badges_with_task_info(badges, game_id: int | None = None, user_id: int | None = None):
-    enhanced_badges = []
+    rules = get_badge_rules(game_id) if game_id else None
+    catalog = []
     for badge in badges:
-        if game_id:
-            awarding_quests = [
-                quest
-                for quest in badge.quests
-                if quest.game_id == game_id and quest.badge_option in ("individual", "both")
-            ]
+        if rules is not None:
+            awarding_quests = rules.awarding_quests(badge.id)
         else:
             awarding_quests = [
-                quest
-                for quest in badge.quests
-                if quest.badge_option in ("individual", "both")
+                rule
+                for rule in map(quest_rule, badge.quests)
+                if rule.awards_individually
             ]
-        if awarding_quests:
-            task_names = ", ".join(quest.title for quest in awarding_quests)
-            task_ids = ", ".join(str(quest.id) for quest in awarding_quests)
-            badge_awarded_counts = ", ".join(str(quest.badge_awarded) for quest in awarding_quests)
-        else:
-            task_names = ""
-            task_ids = ""
-            badge_awarded_counts = "1"
-        user_completions_total = 0
-        is_complete = False
-        if awarding_quests and user_id:
-            completions_list = []
-            for quest in awarding_quests:
-                user_quest = UserQuest.query.filter_by(user_id=user_id, quest_id=quest.id).first()
-                completions = user_quest.completions if user_quest else 0
-                completions_list.append(completions)
-                if completions >= quest.badge_awarded:
-                    is_complete = True
-            user_completions_total = max(completions_list) if completions_list else 0
-        enhanced_badges.append(
-            {
-                "id": badge.id,
-                "name": badge.name,
-                "description": badge.description,
-                "image": badge.image,
-                "category": badge.category,
-                "task_names": task_names,
-                "task_ids": task_ids,
-                "badge_awarded_counts": badge_awarded_counts,
-                "user_completions": user_completions_total,
-                "is_complete": is_complete,
-            }
-        )
+        catalog.append((badge, awarding_quests))
+    completions = None
+    if user_id:
+        quest_ids = {quest.quest_id for _, quests in catalog for quest in quests}
+        completions = load_completions(user_id, quest_ids=quest_ids)
+    enhanced_badges = [
+        describe_badge(badge, awarding_quests, completions)
+        for badge, awarding_quests in catalog
+    ]
     return enhanced_badges
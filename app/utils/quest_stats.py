@@ -0,0 +1,77 @@
+"""Set-based quest statistics for game overview pages."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from ..models import db, Quest, QuestSubmission
+from .eligibility import _aware, bulk_quest_eligibility
+
+
+def load_completion_counts(game_id: int, user_id: int | None) -> dict[int, tuple[int, int]]:
+    """Return ``{quest_id: (total, personal)}`` submission counts for a game.
+
+    Both counts come from a single grouped query over the game's enabled
+    quests instead of two ``COUNT`` queries per quest.
+    """
+    personal = (
+        db.func.sum(db.case((QuestSubmission.user_id == user_id, 1), else_=0))
+        if user_id
+        else db.literal(0)
+    )
+    rows = (
+        db.session.query(
+            QuestSubmission.quest_id,
+            db.func.count(QuestSubmission.id),
+            personal,
+        )
+        .join(Quest, Quest.id == QuestSubmission.quest_id)
+        .filter(Quest.game_id == game_id, Quest.enabled.is_(True))
+        .group_by(QuestSubmission.quest_id)
+        .all()
+    )
+    return {quest_id: (total or 0, mine or 0) for quest_id, total, mine in rows}
+
+
+def annotate_quest_stats(quests, game_id, user_id, user_quests, now) -> None:
+    """Attach completion statistics and eligibility to each quest in place.
+
+    Sets ``total_completions``, ``personal_completions``,
+    ``completions_within_period``, ``first_completion_in_period``,
+    ``last_completion``, ``can_verify`` and ``next_eligible_time`` using a
+    fixed number of queries regardless of how many quests the game has.
+    """
+    counts = load_completion_counts(game_id, user_id) if quests else {}
+    eligibility = bulk_quest_eligibility(user_id, quests, now) if user_id else {}
+
+    last_completed: dict[int, datetime] = {}
+    for ut in user_quests:
+        if ut.completed_at is None:
+            continue
+        current = last_completed.get(ut.quest_id)
+        if current is None or _aware(ut.completed_at) > _aware(current):
+            last_completed[ut.quest_id] = ut.completed_at
+
+    for quest in quests:
+        total, personal = counts.get(quest.id, (0, 0))
+        quest.total_completions = total
+        quest.personal_completions = personal if user_id else 0
+        quest.completions_within_period = 0
+        quest.can_verify = False
+        quest.last_completion = None
+        quest.first_completion_in_period = None
+        quest.next_eligible_time = None
+
+        if not user_id:
+            continue
+
+        current = eligibility[quest.id]
+        quest.completions_within_period = current.completions_in_period
+        quest.first_completion_in_period = current.first_in_period
+        quest.last_completion = last_completed.get(quest.id)
+
+        start = _aware(quest.calendar_event_start)
+        if quest.from_calendar and start and now < start:
+            quest.next_eligible_time = start
+            continue
+        quest.can_verify = current.can_verify
+        quest.next_eligible_time = current.next_eligible_time
@@ -0,0 +1,253 @@
+"""Shared Redis connection with an in-memory stand-in for tests.
+
+:func:`get_redis` returns a client bound to ``REDIS_URL``. Under ``TESTING``
+with no URL configured an :class:`InMemoryRedis` instance is used instead.
+It implements only the commands the application relies on, with the same
+return types as ``redis-py`` using ``decode_responses=True``.
+"""
+from __future__ import annotations
+
+import fnmatch
+import threading
+import time
+
+from flask import current_app
+from redis import Redis
+from redis.exceptions import RedisError, WatchError
+
+__all__ = ["InMemoryRedis", "RedisError", "WatchError", "get_redis"]
+
+
+class _Pipeline:
+    """Buffer commands and run them against an :class:`InMemoryRedis`.
+
+    Like ``redis-py``, :meth:`watch` switches to immediate execution until
+    :meth:`multi`, and :meth:`execute` raises :class:`WatchError` when a
+    watched key was written in between.
+    """
+
+    def __init__(self, store: "InMemoryRedis"):
+        self._store = store
+        self._calls: list[tuple[str, tuple, dict]] = []
+        self._watched: dict[str, int] = {}
+        self._immediate = False
+
+    def __getattr__(self, name):
+        if self._immediate:
+            return getattr(self._store, name)
+
+        def _queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return _queue
+
+    def watch(self, *keys: str) -> bool:
+        with self._store._lock:
+            self._watched.update({key: self._store._revision(key) for key in keys})
+        self._immediate = True
+        return True
+
+    def unwatch(self) -> bool:
+        self._watched = {}
+        self._immediate = False
+        return True
+
+    def multi(self) -> None:
+        self._immediate = False
+
+    def reset(self) -> None:
+        self._calls = []
+        self.unwatch()
+
+    def execute(self):
+        try:
+            with self._store._lock:
+                if any(self._store._revision(key) != rev for key, rev in self._watched.items()):
+                    raise WatchError("Watched variable changed.")
+                return [getattr(self._store, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+        finally:
+            self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class InMemoryRedis:
+    """Small thread-safe subset of Redis used when no server is configured."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data: dict[str, object] = {}
+        self._expires: dict[str, float] = {}
+        self._revisions: dict[str, int] = {}
+        self._clock = 0
+
+    def _touch(self, key: str) -> None:
+        self._clock += 1
+        self._revisions[key] = self._clock
+
+    def _revision(self, key: str) -> int:
+        self._expire_stale(key)
+        return self._revisions.get(key, 0)
+
+    def _expire_stale(self, key: str) -> None:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            self._touch(key)
+
+    def _zset(self, key: str, create: bool = False) -> dict[str, float] | None:
+        self._expire_stale(key)
+        zset = self._data.get(key)
+        if zset is None and create:
+            zset = self._data[key] = {}
+        return zset
+
+    def _ordered(self, key: str, desc: bool) -> list[tuple[str, float]]:
+        zset = self._zset(key) or {}
+        return sorted(zset.items(), key=lambda item: (item[1], item[0]), reverse=desc)
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self)
+
+    def ping(self) -> bool:
+        return True
+
+    def flushall(self) -> bool:
+        with self._lock:
+            for key in self._data:
+                self._touch(key)
+            self._data.clear()
+            self._expires.clear()
+        return True
+
+    def exists(self, *keys: str) -> int:
+        with self._lock:
+            for key in keys:
+                self._expire_stale(key)
+            return sum(1 for key in keys if key in self._data)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                self._expires.pop(key, None)
+                if self._data.pop(key, None) is not None:
+                    self._touch(key)
+                    removed += 1
+            return removed
+
+    def keys(self, pattern: str = "*") -> list[str]:
+        with self._lock:
+            for key in list(self._data):
+                self._expire_stale(key)
+            return [key for key in self._data if fnmatch.fnmatchcase(key, pattern)]
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._touch(key)
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def get(self, key: str):
+        with self._lock:
+            self._expire_stale(key)
+            return self._data.get(key)
+
+    def set(self, key: str, value, ex: int | None = None, nx: bool = False):
+        with self._lock:
+            self._expire_stale(key)
+            if nx and key in self._data:
+                return None
+            self._touch(key)
+            self._data[key] = value if isinstance(value, (bytes, str)) else str(value)
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._expire_stale(key)
+            value = int(self._data.get(key) or 0) + amount
+            self._touch(key)
+            self._data[key] = str(value)
+            return value
+
+    def zadd(self, key: str, mapping: dict, nx: bool = False, xx: bool = False) -> int:
+        with self._lock:
+            zset = self._zset(key, create=True)
+            self._touch(key)
+            added = 0
+            for member, score in mapping.items():
+                member = str(member)
+                exists = member in zset
+                if (nx and exists) or (xx and not exists):
+                    continue
+                if not exists:
+                    added += 1
+                zset[member] = float(score)
+            return added
+
+    def zincrby(self, key: str, amount: float, member) -> float:
+        with self._lock:
+            zset = self._zset(key, create=True)
+            self._touch(key)
+            member = str(member)
+            zset[member] = zset.get(member, 0.0) + float(amount)
+            return zset[member]
+
+    def zrem(self, key: str, *members) -> int:
+        with self._lock:
+            zset = self._zset(key) or {}
+            removed = sum(1 for m in members if zset.pop(str(m), None) is not None)
+            if removed:
+                self._touch(key)
+            return removed
+
+    def zscore(self, key: str, member):
+        with self._lock:
+            return (self._zset(key) or {}).get(str(member))
+
+    def zcard(self, key: str) -> int:
+        with self._lock:
+            return len(self._zset(key) or {})
+
+    def zrevrank(self, key: str, member):
+        with self._lock:
+            members = [m for m, _ in self._ordered(key, desc=True)]
+            try:
+                return members.index(str(member))
+            except ValueError:
+                return None
+
+    def zrevrange(self, key: str, start: int, end: int, withscores: bool = False):
+        with self._lock:
+            items = self._ordered(key, desc=True)
+            stop = None if end == -1 else end + 1
+            window = items[start:stop]
+            if withscores:
+                return [(m, s) for m, s in window]
+            return [m for m, _ in window]
+
+
+def get_redis():
+    """Return the application's Redis client, creating it on first use."""
+    client = current_app.extensions.get("redis")
+    if client is None:
+        url = current_app.config.get("REDIS_URL")
+        if not url and current_app.config.get("TESTING"):
+            client = InMemoryRedis()
+        else:
+            client = Redis.from_url(
+                url or "redis://localhost:6379/0", decode_responses=True
+            )
+        current_app.extensions["redis"] = client
+    return client
@@ -0,0 +1,170 @@
+"""Resumable uploads of submission media.
+
+A client creates an upload with the file name, type and size, sends the
+bytes as ``Content-Range`` chunks and then names the upload id in place of
+the file when submitting. Chunks are copied from the request stream to
+``<id>.part`` in the upload directory in small blocks, so a worker never
+holds a whole video in memory, and a dropped connection resumes from the
+stored offset instead of starting over. Completed uploads are handed to
+the existing ``save_submission_image`` and ``store_submission_video``
+validation as a regular :class:`~werkzeug.datastructures.FileStorage`.
+Uploads idle for longer than :data:`SESSION_TTL` are purged by the
+scheduler.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from flask import after_this_request, current_app
+from werkzeug.datastructures import FileStorage
+
+from app.constants import UTC
+
+from ..models import db
+from ..models.media import UploadSession
+from .file_uploads import validate_declared_upload
+
+#: Chunk size suggested to clients.
+CHUNK_SIZE = 1024 * 1024
+#: Largest chunk accepted in one request.
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+#: Idle time after which an unfinished upload is discarded.
+SESSION_TTL = timedelta(hours=24)
+
+_COPY_BLOCK = 64 * 1024
+
+
+def _upload_dir() -> str:
+    return current_app.config.get("UPLOAD_SESSION_DIR") or os.path.join(
+        current_app.instance_path, "uploads"
+    )
+
+
+def part_path(upload: UploadSession) -> str:
+    """Return the file holding the bytes received for ``upload``."""
+    return os.path.join(_upload_dir(), f"{upload.id}.part")
+
+
+def create_upload(user_id: int, filename: str, content_type: str, size: int) -> UploadSession:
+    """Start an upload of ``size`` bytes for ``user_id`` and commit it.
+
+    The declared name, type and size are checked against the same limits as
+    a single-request upload; ``ValueError`` is raised when they are not allowed.
+    """
+    validate_declared_upload(filename, content_type or "", size)
+    upload = UploadSession(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        received=0,
+    )
+    os.makedirs(_upload_dir(), exist_ok=True)
+    open(part_path(upload), "wb").close()
+    db.session.add(upload)
+    db.session.commit()
+    return upload
+
+
+def write_chunk(upload: UploadSession, start: int, stream, length: int) -> int:
+    """Write ``length`` bytes read from ``stream`` at offset ``start``.
+
+    ``start`` may repeat bytes already received, which makes retries of a
+    chunk harmless, but may not leave a gap. Raises ``ValueError`` for a
+    gap, a range beyond the declared size or a body shorter than
+    ``length``. Commits and returns the new offset.
+    """
+    if start > upload.received:
+        raise ValueError(f"Expected a chunk starting at {upload.received}.")
+    if start + length > upload.size:
+        raise ValueError("Chunk exceeds the declared upload size.")
+    if length > MAX_CHUNK_BYTES:
+        raise ValueError("Chunk too large.")
+
+    written = 0
+    with open(part_path(upload), "r+b") as part:
+        part.seek(start)
+        while written < length:
+            block = stream.read(min(_COPY_BLOCK, length - written))
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+    end = start + written
+    if end > upload.received:
+        upload.received = end
+    upload.updated_at = datetime.now(UTC)
+    db.session.commit()
+    if written < length:
+        raise ValueError("Chunk body shorter than its Content-Range.")
+    return upload.received
+
+
+def get_upload(upload_id: str, user_id: int) -> UploadSession | None:
+    """Return the upload ``upload_id`` when it belongs to ``user_id``."""
+    upload = db.session.get(UploadSession, upload_id)
+    if upload is None or upload.user_id != user_id:
+        return None
+    return upload
+
+
+def discard_upload(upload: UploadSession) -> None:
+    """Delete ``upload`` and its bytes; the caller commits."""
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    db.session.delete(upload)
+
+
+def claim_upload(upload_id: str | None, user_id: int) -> FileStorage | None:
+    """Return the completed upload ``upload_id`` as a ``FileStorage``.
+
+    Returns ``None`` when no id is given and raises ``ValueError`` for an
+    unknown or incomplete upload. The upload is removed once the current
+    request succeeds; after an error response it stays so the client can
+    retry the submission without sending the bytes again.
+    """
+    if not upload_id:
+        return None
+    upload = get_upload(upload_id, user_id)
+    if upload is None:
+        raise ValueError("Unknown upload.")
+    if not upload.complete:
+        raise ValueError("Upload is incomplete.")
+
+    stream = open(part_path(upload), "rb")
+    upload_key = upload.id
+
+    @after_this_request
+    def _release(response):
+        stream.close()
+        if response.status_code < 400:
+            finished = db.session.get(UploadSession, upload_key)
+            if finished is not None:
+                discard_upload(finished)
+                db.session.commit()
+        return response
+
+    return FileStorage(
+        stream=stream,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        content_length=upload.size,
+    )
+
+
+def purge_stale_uploads() -> int:
+    """Delete uploads idle for longer than :data:`SESSION_TTL`.
+
+    Returns the number of uploads removed.
+    """
+    cutoff = datetime.now(UTC) - SESSION_TTL
+    stale = UploadSession.query.filter(UploadSession.updated_at < cutoff).all()
+    for upload in stale:
+        discard_upload(upload)
+    db.session.commit()
+    return len(stale)
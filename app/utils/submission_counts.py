@@ -0,0 +1,71 @@
+"""Maintenance of the denormalized like and reply counters of submissions.
+
+``quest_submission.like_count`` and ``reply_count`` mirror the number of
+``submission_likes`` and ``submission_replies`` rows. Writers call
+:func:`adjust_submission_counts` in the same transaction as the insert or
+delete, which issues ``SET like_count = like_count + n`` so concurrent
+requests never lose an update. Rows removed by database cascades (for
+example when a user is deleted) bypass it; :func:`repair_submission_counts`
+recomputes the counters from scratch.
+"""
+from __future__ import annotations
+
+from sqlalchemy import func, select, update
+
+from ..models import db
+from ..models.quest import QuestSubmission, SubmissionLike, SubmissionReply
+
+
+def adjust_submission_counts(submission_id: int, likes: int = 0, replies: int = 0) -> None:
+    """Add ``likes`` and ``replies`` to the counters; the caller commits."""
+    values = {}
+    if likes:
+        values["like_count"] = QuestSubmission.like_count + likes
+    if replies:
+        values["reply_count"] = QuestSubmission.reply_count + replies
+    if not values:
+        return
+    db.session.execute(
+        update(QuestSubmission)
+        .where(QuestSubmission.id == submission_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    # Reload the counters on next access instead of serving stale values.
+    sub = db.session.identity_map.get(
+        db.session.identity_key(QuestSubmission, submission_id)
+    )
+    if sub is not None:
+        db.session.expire(sub, list(values))
+
+
+def repair_submission_counts(submission_id: int | None = None) -> int:
+    """Recompute the counters from the like and reply tables.
+
+    Limits the repair to ``submission_id`` when given. Commits and returns
+    the number of submissions whose counters changed.
+    """
+    like_counts = (
+        select(func.count(SubmissionLike.id))
+        .where(SubmissionLike.submission_id == QuestSubmission.id)
+        .scalar_subquery()
+    )
+    reply_counts = (
+        select(func.count(SubmissionReply.id))
+        .where(SubmissionReply.submission_id == QuestSubmission.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(QuestSubmission)
+        .where(
+            (QuestSubmission.like_count != like_counts)
+            | (QuestSubmission.reply_count != reply_counts)
+        )
+        .values(like_count=like_counts, reply_count=reply_counts)
+        .execution_options(synchronize_session=False)
+    )
+    if submission_id is not None:
+        stmt = stmt.where(QuestSubmission.id == submission_id)
+    result = db.session.execute(stmt)
+    db.session.commit()
+    return result.rowcount
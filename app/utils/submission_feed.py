@@ -0,0 +1,99 @@
+"""Keyset-paginated pages of quest submissions with batched like data."""
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+
+from ..models import db
+from ..models.quest import QuestSubmission, SubmissionLike
+from ..models.user import User
+
+SUBMISSION_PAGE_SIZE = 10
+MAX_SUBMISSION_PAGE_SIZE = 100
+
+#: Submitter columns the feeds render, including the avatar whose srcset is
+#: looked up for every row.
+SUBMITTER_COLUMNS = (User.id, User.username, User.display_name, User.profile_picture)
+
+
+def encode_cursor(timestamp: datetime, submission_id: int) -> str:
+    """Return an opaque cursor for the submission ``(timestamp, id)``."""
+    raw = f"{timestamp.isoformat()}|{submission_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    """Decode ``cursor`` produced by :func:`encode_cursor`.
+
+    Returns ``None`` for a missing cursor and raises ``ValueError`` when the
+    cursor is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts_raw, submission_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(ts_raw), int(submission_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def load_submission_page(query, cursor=None, limit: int = SUBMISSION_PAGE_SIZE, offset: int = 0):
+    """Return one page of ``query`` newest first.
+
+    ``query`` is a filtered :class:`QuestSubmission` query. Rows are ordered
+    by ``(timestamp, id)`` descending and ``cursor`` is the decoded tuple of
+    the last row of the previous page, so each page is an index range scan
+    however deep the reader scrolls. ``offset`` is honoured only without a
+    cursor, for clients that still page by position. Submitters, with the
+    :data:`SUBMITTER_COLUMNS` the feeds read, are loaded in the same query.
+    Returns ``(submissions, next_cursor)`` where
+    ``next_cursor`` is ``None`` on the last page.
+    """
+    limit = max(1, min(limit, MAX_SUBMISSION_PAGE_SIZE))
+    query = query.options(
+        joinedload(QuestSubmission.user).load_only(*SUBMITTER_COLUMNS)
+    ).order_by(
+        QuestSubmission.timestamp.desc(), QuestSubmission.id.desc()
+    )
+    if cursor is not None:
+        ts, submission_id = cursor
+        query = query.filter(
+            or_(
+                QuestSubmission.timestamp < ts,
+                and_(QuestSubmission.timestamp == ts, QuestSubmission.id < submission_id),
+            )
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    submissions = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = submissions[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+    return submissions, next_cursor
+
+
+def liked_submission_ids(submission_ids, user_id: int | None) -> set[int]:
+    """Return which of ``submission_ids`` ``user_id`` liked, in one ``IN`` query.
+
+    Like counts are read from ``QuestSubmission.like_count`` instead.
+    """
+    ids = list(submission_ids)
+    if not ids or user_id is None:
+        return set()
+    return {
+        submission_id
+        for (submission_id,) in db.session.query(SubmissionLike.submission_id).filter(
+            SubmissionLike.submission_id.in_(ids),
+            SubmissionLike.user_id == user_id,
+        )
+    }
@@ -0,0 +1,370 @@
+"""Background post-processing of quest submissions.
+
+A submission request only commits the ``QuestSubmission`` and ``UserQuest``
+rows. The slower follow-up work runs as separate stages: transcoding an
+uploaded video, awarding badges, writing the completion notification,
+publishing the ActivityPub Create and cross-posting to social networks and
+Mastodon. Each stage has a
+``submission_stage`` row whose ``(submission_id, stage)`` key makes it
+idempotent. A stage is claimed with a conditional ``UPDATE``, so a retried
+or duplicated job never repeats a stage that already finished. Stages run as
+chained RQ jobs with retries, or inline when the task queue is disabled.
+Once no stage is left queued or running the game's public album is rebuilt,
+whether the last stage finished or failed.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, update
+
+from ..models import db, Notification, Quest, QuestSubmission, SubmissionStage
+from .file_uploads import discard_pending_video, public_media_url, transcode_submission_video
+from app.constants import UTC
+
+VIDEO = "video"
+BADGES = "badges"
+NOTIFICATION = "notification"
+ACTIVITYPUB = "activitypub"
+SOCIAL = "social"
+MASTODON = "mastodon"
+
+#: Stage execution order; the video must be ready before it is published
+#: and internal stages run before external API calls.
+STAGES = (VIDEO, BADGES, NOTIFICATION, ACTIVITYPUB, SOCIAL, MASTODON)
+
+#: Stages that run on the dedicated ``video`` queue.
+VIDEO_STAGES = frozenset({VIDEO})
+
+#: A ``running`` stage older than this is assumed lost with its worker. Jobs
+#: mark their stage ``failed`` from their failure callback, which also runs
+#: for timeouts and lost workers, so this only covers a worker dying before
+#: RQ noticed.
+STALE_AFTER = timedelta(minutes=15)
+
+
+def plan_stages(submission: QuestSubmission, user, notify: bool = True) -> list[str]:
+    """Return the stages that apply to ``submission`` by ``user`` in order."""
+    has_media = bool(submission.image_url or submission.video_url)
+    wanted = {
+        VIDEO: submission.video_status == "pending",
+        BADGES: True,
+        NOTIFICATION: notify,
+        ACTIVITYPUB: has_media,
+        SOCIAL: bool(submission.image_url and user.upload_to_socials),
+        MASTODON: bool(
+            submission.image_url
+            and user.upload_to_mastodon
+            and user.mastodon_access_token
+        ),
+    }
+    return [stage for stage in STAGES if wanted[stage]]
+
+
+def create_stages(submission: QuestSubmission, stages) -> None:
+    """Add pending stage rows for ``submission``; the caller commits."""
+    for stage in stages:
+        submission.stages.append(SubmissionStage(stage=stage, status="pending"))
+
+
+def reset_stage(submission: QuestSubmission, stage: str) -> None:
+    """Mark ``stage`` of ``submission`` pending again; the caller commits."""
+    for row in submission.stages:
+        if row.stage == stage:
+            row.status = "pending"
+            row.error = None
+            return
+    create_stages(submission, [stage])
+
+
+def _media_path(submission: QuestSubmission) -> str | None:
+    media = submission.image_url or submission.video_url
+    return os.path.join(current_app.static_folder, media) if media else None
+
+
+def _status_text(submission: QuestSubmission) -> str:
+    user = submission.user
+    display_name = user.display_name or user.username
+    return f"{display_name} completed '{submission.quest.title}'! #QuestByCycle"
+
+
+def _video_pending(submission) -> bool:
+    return bool(submission.video_url) and submission.video_status == "pending"
+
+
+def _run_video(submission):
+    if not _video_pending(submission):
+        return None
+    pending = submission.video_url
+    try:
+        submission.video_url = transcode_submission_video(pending)
+    except ValueError as exc:
+        # Retrying cannot fix an undecodable or oversized video.
+        discard_pending_video(pending)
+        submission.video_status = "failed"
+        return {"video_error": str(exc)}
+    submission.video_status = "ready"
+    # The upload is the only copy until the transcoded video is committed.
+    db.session.commit()
+    discard_pending_video(pending)
+    return None
+
+
+def _run_badges(submission):
+    from .quest_scoring import check_and_award_badges
+
+    quest = submission.quest
+    check_and_award_badges(submission.user_id, quest.id, quest.game_id)
+    return None
+
+
+def _run_notification(submission):
+    db.session.add(
+        Notification(
+            user_id=submission.user_id,
+            type="quest_complete",
+            payload={
+                "quest_id": submission.quest_id,
+                "quest_title": submission.quest.title,
+                "submission_id": submission.id,
+            },
+        )
+    )
+    return None
+
+
+def _run_activitypub(submission):
+    from app.activitypub_utils import post_activitypub_create_activity
+
+    if _video_pending(submission):
+        return None
+    activity = post_activitypub_create_activity(
+        submission, submission.user, submission.quest
+    )
+    return {"activity": activity}
+
+
+def _run_social(submission):
+    from app.social import post_to_social_media
+
+    if submission.twitter_url or submission.fb_url or submission.instagram_url:
+        return None
+    twitter_url, fb_url, instagram_url = post_to_social_media(
+        submission.image_url,
+        _media_path(submission),
+        _status_text(submission),
+        submission.quest.game,
+    )
+    submission.twitter_url = twitter_url
+    submission.fb_url = fb_url
+    submission.instagram_url = instagram_url
+    return None
+
+
+def _run_mastodon(submission):
+    from app.social import post_to_mastodon_status
+
+    url = post_to_mastodon_status(
+        _media_path(submission), _status_text(submission), submission.user
+    )
+    return {"mastodon_url": url}
+
+
+_HANDLERS = {
+    VIDEO: _run_video,
+    BADGES: _run_badges,
+    NOTIFICATION: _run_notification,
+    ACTIVITYPUB: _run_activitypub,
+    SOCIAL: _run_social,
+    MASTODON: _run_mastodon,
+}
+
+
+def _claim(submission_id: int, stage: str) -> bool:
+    """Mark the stage running if no other attempt owns or finished it."""
+    stale = datetime.now(UTC) - STALE_AFTER
+    result = db.session.execute(
+        update(SubmissionStage)
+        .where(
+            SubmissionStage.submission_id == submission_id,
+            SubmissionStage.stage == stage,
+            or_(
+                SubmissionStage.status.in_(("pending", "failed")),
+                (SubmissionStage.status == "running")
+                & (SubmissionStage.updated_at < stale),
+            ),
+        )
+        .values(
+            status="running",
+            attempts=SubmissionStage.attempts + 1,
+            updated_at=datetime.now(UTC),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return bool(result.rowcount)
+
+
+def _finished(submission_id: int) -> bool:
+    """Return ``True`` when no stage of ``submission_id`` is queued or running."""
+    return not db.session.query(SubmissionStage.id).filter(
+        SubmissionStage.submission_id == submission_id,
+        SubmissionStage.status.in_(("pending", "running")),
+    ).first()
+
+
+def _refresh_album_if_settled(submission_id: int) -> None:
+    """Publish the settled submission, including any video, to the public album."""
+    if not _finished(submission_id):
+        return
+    game_id = (
+        db.session.query(Quest.game_id)
+        .join(QuestSubmission, QuestSubmission.quest_id == Quest.id)
+        .filter(QuestSubmission.id == submission_id)
+        .scalar()
+    )
+    if game_id is not None:
+        from app.tasks import enqueue_album_refresh
+
+        enqueue_album_refresh(game_id)
+
+
+def run_stage(submission_id: int, stage: str):
+    """Run one stage of a submission at most once and return its result.
+
+    Errors are recorded on the stage row and re-raised so the task queue
+    can retry; a later attempt claims the ``failed`` stage again.
+    """
+    if not _claim(submission_id, stage):
+        row = SubmissionStage.query.filter_by(
+            submission_id=submission_id, stage=stage
+        ).first()
+        return row.result if row is not None else None
+
+    submission = db.session.get(QuestSubmission, submission_id)
+    row = SubmissionStage.query.filter_by(
+        submission_id=submission_id, stage=stage
+    ).one()
+    try:
+        if submission is None:
+            row.status = "skipped"
+            db.session.commit()
+            return None
+        result = _HANDLERS[stage](submission)
+        row.result = result
+        row.status = "done"
+        row.error = None
+        db.session.commit()
+        _refresh_album_if_settled(submission_id)
+        return result
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.warning(
+            "Submission %s stage %s failed: %s", submission_id, stage, exc
+        )
+        db.session.execute(
+            update(SubmissionStage)
+            .where(
+                SubmissionStage.submission_id == submission_id,
+                SubmissionStage.stage == stage,
+            )
+            .values(status="failed", error=str(exc)[:500])
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        _refresh_album_if_settled(submission_id)
+        raise
+
+
+def fail_stage(submission_id: int, stage: str, error: str, *, final: bool = False) -> None:
+    """Record that an attempt at ``stage`` ended without finishing it.
+
+    Used as the job failure callback, which RQ also calls when a job times
+    out or its worker dies, so the retry can claim the stage at once. With
+    ``final`` no attempt follows: a video still pending is marked failed and
+    its upload removed.
+    """
+    db.session.rollback()
+    failed = db.session.execute(
+        update(SubmissionStage)
+        .where(
+            SubmissionStage.submission_id == submission_id,
+            SubmissionStage.stage == stage,
+            SubmissionStage.status == "running",
+        )
+        .values(status="failed", error=error[:500])
+        .execution_options(synchronize_session=False)
+    )
+    pending_video = None
+    if final and stage == VIDEO:
+        submission = db.session.get(QuestSubmission, submission_id)
+        if submission is not None and _video_pending(submission):
+            pending_video = submission.video_url
+            submission.video_status = "failed"
+    db.session.commit()
+    if pending_video:
+        discard_pending_video(pending_video)
+    if failed.rowcount or pending_video:
+        _refresh_album_if_settled(submission_id)
+
+
+def pending_stages(submission_id: int) -> list[str]:
+    """Return the stages of ``submission_id`` that have not finished."""
+    return [
+        stage
+        for (stage,) in db.session.query(SubmissionStage.stage)
+        .filter(
+            SubmissionStage.submission_id == submission_id,
+            SubmissionStage.status.in_(("pending", "failed")),
+        )
+        .order_by(SubmissionStage.id)
+    ]
+
+
+def run_pending_stages(submission_id: int) -> dict:
+    """Run every unfinished stage inline, continuing past failures.
+
+    Returns the merged results of the stages that completed.
+    """
+    results: dict = {}
+    for stage in pending_stages(submission_id):
+        try:
+            results.update(run_stage(submission_id, stage) or {})
+        except Exception as exc:
+            # Nothing retries an inline stage.
+            fail_stage(submission_id, stage, str(exc), final=True)
+            continue
+    return results
+
+
+def pipeline_status(submission: QuestSubmission) -> dict:
+    """Summarize the stages and published links of ``submission``."""
+    stages = list(submission.stages)
+    statuses = {row.status for row in stages}
+    if not stages or statuses <= {"done", "skipped"}:
+        overall = "done"
+    elif "failed" in statuses and not statuses & {"pending", "running"}:
+        overall = "failed"
+    else:
+        overall = "processing"
+    results: dict = {}
+    for row in stages:
+        if row.status == "done" and row.result:
+            results.update(row.result)
+    return {
+        "submission_id": submission.id,
+        "status": overall,
+        "stages": [
+            {"stage": row.stage, "status": row.status, "attempts": row.attempts}
+            for row in stages
+        ],
+        "twitter_url": submission.twitter_url,
+        "fb_url": submission.fb_url,
+        "instagram_url": submission.instagram_url,
+        "mastodon_url": results.get("mastodon_url"),
+        "activity": results.get("activity"),
+        "video_status": submission.video_status,
+        "video_url": public_media_url(submission.video_url),
+    }
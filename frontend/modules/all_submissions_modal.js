@@ -9,6 +9,7 @@ const PLACEHOLDER_IMAGE = document
   .getAttribute('content');
 
 let submissionsPage = 0;
+let submissionsCursor = null;
 let submissionsGameId = null;
 let submissionsIsAdmin = false;
 let submissionsHasMore = false;
@@ -17,6 +18,7 @@ let loadedSubmissions = [];
 
 export function showAllSubmissionsModal(gameId) {
     submissionsPage = 0;
+    submissionsCursor = null;
     submissionsGameId = gameId;
     loadedSubmissions = [];
 
@@ -28,14 +30,16 @@ export function showAllSubmissionsModal(gameId) {
 }
 
 function fetchSubmissions() {
-    const offset = submissionsPage * 10;
-    fetchJson(`/quests/quest/all_submissions?game_id=${submissionsGameId}&offset=${offset}&limit=10`)
+    let url = `/quests/quest/all_submissions?game_id=${submissionsGameId}&limit=10`;
+    if (submissionsCursor) url += `&cursor=${encodeURIComponent(submissionsCursor)}`;
+    fetchJson(url)
         .then(({ json }) => {
             if (json.error) {
                 throw new Error(json.error);
             }
             submissionsIsAdmin = json.is_admin;
             submissionsHasMore = json.has_more;
+            submissionsCursor = json.next_cursor || null;
             displayAllSubmissions(json.submissions, submissionsIsAdmin, submissionsPage > 0);
             toggleLoadMoreButton(submissionsHasMore);
             submissionsPage += 1;
@@ -126,6 +130,7 @@ function displayAllSubmissions(submissions, isAdmin, append = false) {
             quest_id: submission.quest_id,
             url: submission.image_url || submission.video_url,
             video_url: submission.video_url,
+            video_status: submission.video_status,
             comment: submission.comment,
             user_id: submission.user_id,
             user_display_name: submission.user_display_name || submission.user_username,
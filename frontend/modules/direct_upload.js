@@ -0,0 +1,26 @@
+import { csrfFetchJson } from '../utils.js';
+
+/**
+ * Upload ``file`` straight to media storage through a signed URL and return
+ * the object key to submit in place of the file.
+ */
+export async function uploadDirect(file) {
+  const { status, json: grant } = await csrfFetchJson('/quests/direct-uploads', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      filename: file.name,
+      content_type: file.type,
+      size: file.size,
+    }),
+  });
+  if (status !== 201) throw new Error(grant.message || 'Could not start upload');
+
+  const res = await fetch(grant.upload_url, {
+    method: grant.method,
+    headers: grant.headers,
+    body: file,
+  });
+  if (!res.ok) throw new Error(`Upload failed with status ${res.status}`);
+  return grant.object_key;
+}
@@ -3,9 +3,54 @@ import { showUserProfileModal } from './user_profile_modal.js';
 import { showAllSubmissionsModal } from './all_submissions_modal.js';
 import logger from '../logger.js';
 
+const LEADERBOARD_PAGE_SIZE = 25;
+
 let leaderboardData = null;
 let leaderboardMetric = 'points';
 let leaderboardBody;
+let leaderboardRows = [];
+let leaderboardMe = null;
+let leaderboardNextOffset = null;
+let leaderboardGameId = null;
+let leaderboardFooter;
+
+async function fetchLeaderboardJson(url) {
+    const resp = await fetch(url, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        credentials: 'same-origin'
+    });
+
+    if (resp.redirected && resp.url.includes('/auth/login')) {
+        window.location.href = resp.url;
+        return null;
+    }
+
+    if (resp.status === 401) {
+        window.location.href = '/auth/login?next=' + encodeURIComponent(window.location.pathname);
+        return null;
+    }
+
+    if (!resp.ok) {
+        throw new Error('Failed to fetch leaderboard data');
+    }
+
+    const contentType = resp.headers.get('content-type');
+    if (!contentType || !contentType.includes('application/json')) {
+        logger.error('Unexpected content type for leaderboard:', contentType);
+        throw new Error('Invalid server response');
+    }
+
+    try {
+        return await resp.json();
+    } catch (e) {
+        logger.error('Invalid JSON in leaderboard response', e);
+        throw new Error('Invalid server response');
+    }
+}
+
+function leaderboardPageUrl(gameId, offset) {
+    return `/leaderboard/${gameId}?offset=${offset}&limit=${LEADERBOARD_PAGE_SIZE}`;
+}
 
 export async function showLeaderboardModal(selectedGameId) {
     const leaderboardContent = document.getElementById('leaderboardModalContent');
@@ -16,41 +61,19 @@ export async function showLeaderboardModal(selectedGameId) {
     }
 
     try {
-        const resp = await fetch(`/leaderboard_partial?game_id=${selectedGameId}`, {
-            headers: { 'X-Requested-With': 'XMLHttpRequest' },
-            credentials: 'same-origin'
-        });
+        const [data, page] = await Promise.all([
+            fetchLeaderboardJson(`/leaderboard_partial?game_id=${selectedGameId}&summary=1`),
+            fetchLeaderboardJson(leaderboardPageUrl(selectedGameId, 0)),
+        ]);
+        if (!data || !page) return;
 
-        if (resp.redirected && resp.url.includes('/auth/login')) {
-            window.location.href = resp.url;
-            return;
-        }
-
-        if (resp.status === 401) {
-            window.location.href = '/auth/login?next=' + encodeURIComponent(window.location.pathname);
-            return;
-        }
-
-        if (!resp.ok) {
-            throw new Error('Failed to fetch leaderboard data');
-        }
-
-        const contentType = resp.headers.get('content-type');
-        if (!contentType || !contentType.includes('application/json')) {
-            logger.error('Unexpected content type for leaderboard:', contentType);
-            throw new Error('Invalid server response');
-        }
-
-        let data;
-        try {
-            data = await resp.json();
-        } catch (e) {
-            logger.error('Invalid JSON in leaderboard response', e);
-            throw new Error('Invalid server response');
-        }
         leaderboardContent.innerHTML = '';
         leaderboardData = data;
         leaderboardMetric = 'points';
+        leaderboardGameId = selectedGameId;
+        leaderboardRows = page.entries || [];
+        leaderboardMe = page.me;
+        leaderboardNextOffset = page.next_offset;
         appendGameSelector(leaderboardContent, data, selectedGameId);
         appendCompletionMeter(leaderboardContent, data, selectedGameId);
         appendMetricToggle(leaderboardContent);
@@ -64,6 +87,27 @@ export async function showLeaderboardModal(selectedGameId) {
     }
 }
 
+async function loadMoreLeaderboardRows(button) {
+    if (leaderboardNextOffset === null || leaderboardGameId === null) return;
+    button.disabled = true;
+    try {
+        const page = await fetchLeaderboardJson(
+            leaderboardPageUrl(leaderboardGameId, leaderboardNextOffset)
+        );
+        if (!page) return;
+        const seen = new Set(leaderboardRows.map(row => row.user_id));
+        (page.entries || []).forEach(row => {
+            if (!seen.has(row.user_id)) leaderboardRows.push(row);
+        });
+        leaderboardMe = page.me;
+        leaderboardNextOffset = page.next_offset;
+        updateLeaderboardRows();
+    } catch (error) {
+        logger.error('Failed to load more leaderboard rows:', error);
+        button.disabled = false;
+    }
+}
+
 function appendGameSelector(parentElement, data, selectedGameId) {
     if (data.games && data.games.length > 1) {
         const form = document.createElement('form');
@@ -156,6 +200,31 @@ function appendLeaderboardTable(parentElement) {
     leaderboardBody = document.createElement('tbody');
     table.appendChild(leaderboardBody);
     parentElement.appendChild(table);
+
+    leaderboardFooter = document.createElement('div');
+    leaderboardFooter.className = 'd-flex justify-content-between align-items-center my-2';
+    parentElement.appendChild(leaderboardFooter);
+}
+
+function updateLeaderboardFooter() {
+    if (!leaderboardFooter) return;
+    leaderboardFooter.innerHTML = '';
+
+    const shown = leaderboardRows.some(row => leaderboardMe && row.rank === leaderboardMe.rank);
+    if (leaderboardMe && !shown) {
+        const mine = document.createElement('span');
+        mine.textContent = `Your rank: #${leaderboardMe.rank} (${leaderboardMe.total_points} points)`;
+        leaderboardFooter.appendChild(mine);
+    }
+
+    if (leaderboardNextOffset !== null && leaderboardNextOffset !== undefined) {
+        const button = document.createElement('button');
+        button.type = 'button';
+        button.className = 'btn btn-outline-secondary btn-sm ms-auto';
+        button.textContent = 'Load more';
+        button.addEventListener('click', () => loadMoreLeaderboardRows(button));
+        leaderboardFooter.appendChild(button);
+    }
 }
 
 function appendTableCell(row, content, isLink = false, userId = null) {
@@ -233,7 +302,8 @@ function updateMeterBackground(percent, selectedGameId) {
 
 function updateLeaderboardRows() {
     if (!leaderboardData || !leaderboardBody) return;
-    if (!leaderboardData.top_users || leaderboardData.top_users.length === 0) {
+    updateLeaderboardFooter();
+    if (leaderboardRows.length === 0) {
         leaderboardBody.innerHTML = '';
         const row = document.createElement('tr');
         const cell = document.createElement('td');
@@ -251,23 +321,21 @@ function updateLeaderboardRows() {
         header.textContent = leaderboardMetric === 'quests' ? 'Quests Completed' : 'Points';
     }
 
-    const users = [...leaderboardData.top_users];
-    users.sort((a, b) => {
-        if (leaderboardMetric === 'quests') {
-            return b.completed_quests - a.completed_quests;
-        }
-        return b.total_points - a.total_points;
-    });
+    // Rows arrive ranked by points; the quests view reorders the loaded rows.
+    const users = [...leaderboardRows];
+    if (leaderboardMetric === 'quests') {
+        users.sort((a, b) => b.completed_quests - a.completed_quests);
+    }
 
     users.forEach((user, index) => {
         const row = document.createElement('tr');
-        appendTableCell(row, index + 1);
+        appendTableCell(row, leaderboardMetric === 'quests' ? index + 1 : user.rank);
         const displayName = user.display_name || user.username;
         appendTableCell(row, displayName, true, user.user_id);
         const value = leaderboardMetric === 'quests' ? user.completed_quests : user.total_points;
         appendTableCell(row, value);
         if (leaderboardData.has_badges) {
-            appendTableCell(row, user.badges_awarded);
+            appendTableCell(row, user.badges_awarded || '');
         }
         leaderboardBody.appendChild(row);
     });
@@ -3,6 +3,8 @@ import { showLoadingModal, hideLoadingModal } from './loading_modal.js';
 import { resetModalContent } from './modal_common.js';
 import { getCSRFToken, csrfFetchJson, fetchJson } from '../utils.js';
 import { showSubmissionDetail } from './submission_detail_modal.js';
+import { uploadDirect } from './direct_upload.js';
+import { uploadResumable } from './resumable_upload.js';
 import logger from '../logger.js';
 
 /* ------------------------------------------------------------------ */
@@ -98,6 +100,8 @@ function lazyLoadImages() {
         entries.forEach(entry => {
             if (entry.isIntersecting) {
                 const img = entry.target;
+                const srcset = img.getAttribute('data-srcset');
+                if (srcset) img.srcset = srcset;
                 img.src = img.getAttribute('data-src');
                 img.classList.remove('lazyload');
                 observer.unobserve(img);
@@ -475,6 +479,20 @@ function updateSocialLinks(data) {
     toggleLink(document.getElementById('instagramLink'), data.instagram_url);
 }
 
+// Follow background post-processing and show social links once posted.
+async function pollSubmissionStatus(statusUrl, attempt = 0) {
+  if (attempt >= 10) return;
+  await new Promise(resolve => setTimeout(resolve, Math.min(2000 * (attempt + 1), 10000)));
+  try {
+    const { status, json: data } = await fetchJson(statusUrl);
+    if (status !== 200) return;
+    updateSocialLinks(data);
+    if (data.status === 'processing') pollSubmissionStatus(statusUrl, attempt + 1);
+  } catch (err) {
+    logger.error('Submission status error:', err);
+  }
+}
+
 let isSubmitting = false;
 
 async function submitQuestDetails(event, questId) {
@@ -512,13 +530,25 @@ async function submitQuestDetails(event, questId) {
 
     const formData = new FormData(event.target);
     formData.append('user_id', CURRENT_USER_ID);
+    if (file) {
+      // Write the media straight to storage and submit only its key; fall
+      // back to resumable chunks through the app when that is not possible.
+      formData.delete(fileInput.name);
+      try {
+        formData.append(`${fileInput.name}_object`, await uploadDirect(file));
+      } catch (err) {
+        logger.warn('Direct upload failed, sending chunks instead:', err);
+        formData.append(`${fileInput.name}_upload_id`, await uploadResumable(file));
+      }
+    }
 
     const { status, json: data } = await csrfFetchJson(`/quests/quest/${encodeURIComponent(questId)}/submit`, {
       method: 'POST',
-      body: formData
+      body: formData,
+      headers: { Prefer: 'respond-async' }
     });
 
-    if (status !== 200) {
+    if (status !== 200 && status !== 202) {
       if (status === 403 && data.message === 'This quest cannot be completed outside of the game dates') {
         throw new Error('The game has ended and you can no longer submit quests. Join a new game in the game dropdown menu.');
       }
@@ -531,6 +561,7 @@ async function submitQuestDetails(event, questId) {
     updateScoreboard(data.total_points);
     updateSocialLinks(data);
     updateQuestRowCounts(questId, data.new_completion_count, data.total_completion_count);
+    if (data.processing && data.status_url) pollSubmissionStatus(data.status_url);
 
     refreshQuestDetailModal(questId);
     event.target.reset();
@@ -569,10 +600,61 @@ function getVideoDuration(file) {
 /**********************************************************************
  *  2. fetchQuestSubmissions                                          *
  **********************************************************************/
+const SUBMISSION_BOARD_LIMIT = 50;
+
+function questSubmissionsUrl(questId, cursor) {
+  const base = `/quests/quest/${encodeURIComponent(questId)}/submissions?limit=${SUBMISSION_BOARD_LIMIT}`;
+  return cursor ? `${base}&cursor=${encodeURIComponent(cursor)}` : base;
+}
+
+function toGalleryItem(sub, questId) {
+  return {
+    id:                  sub.id,
+    url:                 sub.image_url || (sub.video_url ? null : PLACEHOLDER_IMAGE),
+    video_url:           sub.video_url,
+    video_status:        sub.video_status,
+    image_srcset:        sub.image_srcset,
+    alt:                 'Submission Image',
+    comment:             sub.comment,
+    user_id:             sub.user_id,
+    user_display_name:   sub.user_display_name,
+    user_username:       sub.user_username,
+    user_profile_picture: sub.user_profile_picture,
+    twitter_url:         sub.twitter_url,
+    fb_url:              sub.fb_url,
+    instagram_url:       sub.instagram_url,
+    quest_id:            questId
+  };
+}
+
+// Older submissions are fetched page by page with the response's next_cursor.
+function appendBoardLoadMore(questId, cursor) {
+  const board = document.getElementById('submissionBoard');
+  if (!board || !cursor) return;
+  const button = document.createElement('button');
+  button.type = 'button';
+  button.className = 'btn btn-outline-secondary btn-sm submission-board-more';
+  button.textContent = 'Load more';
+  button.addEventListener('click', async () => {
+    button.disabled = true;
+    try {
+      const { json } = await fetchJson(questSubmissionsUrl(questId, cursor));
+      button.remove();
+      const submissions = (json && json.submissions) || [];
+      distributeImages(submissions.map(sub => toGalleryItem(sub, questId)), true);
+      appendBoardLoadMore(questId, json && json.next_cursor);
+    } catch (err) {
+      logger.error('Failed to fetch more submissions:', err);
+      button.disabled = false;
+    }
+  });
+  board.appendChild(button);
+}
+
 async function fetchQuestSubmissions(questId) {
-  const safeQuestId = encodeURIComponent(questId);
   try {
-    const { json: submissions } = await fetchJson(`/quests/quest/${safeQuestId}/submissions`);
+    const { json } = await fetchJson(questSubmissionsUrl(questId));
+    const submissions = (json && json.submissions) || [];
 
     const twitterLink   = document.getElementById('twitterLink');
     const facebookLink  = document.getElementById('facebookLink');
@@ -616,26 +698,9 @@ async function fetchQuestSubmissions(questId) {
       });
     }
 
-    const gallery = submissions
-      .slice()                       // clone
-      .reverse()                     // newest first
-      .map(sub => ({
-        id:                  sub.id,
-        url:                 sub.image_url || (sub.video_url ? null : PLACEHOLDER_IMAGE),
-        video_url:           sub.video_url,
-        alt:                 'Submission Image',
-        comment:             sub.comment,
-        user_id:             sub.user_id,
-        user_display_name:   sub.user_display_name,
-        user_username:       sub.user_username,
-        user_profile_picture: sub.user_profile_picture,
-        twitter_url:         sub.twitter_url,
-        fb_url:              sub.fb_url,
-        instagram_url:       sub.instagram_url,
-        quest_id:            questId
-      }));
-
+    const gallery = submissions.map(sub => toGalleryItem(sub, questId)); // newest first
     distributeImages(gallery);
+    appendBoardLoadMore(questId, json && json.next_cursor);
   } catch (err) {
     logger.error('Failed to fetch submissions:', err);
     alert('Could not load submissions. Please try again.');
@@ -663,13 +728,15 @@ function isValidImageUrl(url) {
     return false;
 }
 
-function distributeImages(images) {
+function distributeImages(images, append = false) {
     const board = document.getElementById('submissionBoard');
     if (!board) {
         logger.error('submissionBoard element not found');
         return;
     }
-    board.innerHTML = '';
+    if (!append) {
+        board.innerHTML = '';
+    }
 
     const rawFallbackRaw =
         document.getElementById('questDetailModal')?.getAttribute('data-placeholder-url') ||
@@ -698,6 +765,11 @@ function distributeImages(images) {
                 : rawSrc;
             thumb.src = PLACEHOLDER_IMAGE;
             thumb.setAttribute('data-src', thumbSrc);
+            // Pre-sized WebP widths avoid a server-side resize per thumbnail.
+            if (imgData.image_srcset && imgData.image_srcset.webp) {
+                thumb.setAttribute('data-srcset', imgData.image_srcset.webp);
+                thumb.sizes = `${onScreenW}px`;
+            }
             thumb.classList.add('lazyload');
             thumb.alt = imgData.alt || 'Submission Image';
         }
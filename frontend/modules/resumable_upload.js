@@ -0,0 +1,57 @@
+import { csrfFetchJson } from '../utils.js';
+import logger from '../logger.js';
+
+const MAX_RETRIES = 5;
+
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function sendChunk(url, file, start, chunkSize) {
+  const end = Math.min(start + chunkSize, file.size);
+  const { status, json } = await csrfFetchJson(url, {
+    method: 'PUT',
+    body: file.slice(start, end),
+    headers: {
+      'Content-Type': 'application/octet-stream',
+      'Content-Range': `bytes ${start}-${end - 1}/${file.size}`,
+    },
+  });
+  // 409 reports the offset the server already holds; resume from there.
+  if (status === 200 || status === 409) return json.offset;
+  throw new Error(json.message || `Upload failed with status ${status}`);
+}
+
+/**
+ * Upload ``file`` in chunks and return the upload id to submit in place of
+ * the file. Failed chunks are retried from the offset the server reports.
+ */
+export async function uploadResumable(file, onProgress = () => {}) {
+  const { status, json: upload } = await csrfFetchJson('/quests/uploads', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      filename: file.name,
+      content_type: file.type,
+      size: file.size,
+    }),
+  });
+  if (status !== 201) throw new Error(upload.message || 'Could not start upload');
+
+  let offset = upload.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    try {
+      offset = await sendChunk(upload.upload_url, file, offset, upload.chunk_size);
+      retries = 0;
+      onProgress(offset / file.size);
+    } catch (err) {
+      if (++retries > MAX_RETRIES) throw err;
+      logger.warn('Retrying upload chunk:', err);
+      await sleep(1000 * retries);
+      const { status: st, json } = await csrfFetchJson(upload.upload_url);
+      if (st === 200) offset = json.offset;
+    }
+  }
+  return upload.upload_id;
+}
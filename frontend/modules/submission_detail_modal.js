@@ -288,9 +288,12 @@ document.addEventListener('DOMContentLoaded', () => {
     if (image.video_url) {
       el.img.hidden = true;
       el.video.hidden = false;
+      // Pending uploads are the untranscoded original and may not play yet.
+      el.video.title = image.video_status === 'pending' ? 'Video is still processing' : '';
       el.videoSource.src = image.video_url;
       el.video.load();
       el.video.onloadeddata = () => setNavDisabled(false);
+      if (image.video_status === 'pending') setNavDisabled(false);
     } else {
       el.video.hidden = true;
       el.img.hidden   = false;
@@ -1,18 +1,44 @@
+import argparse
+
 from rq import Worker
+from rq.worker_pool import WorkerPool
 
-from app import create_app
+from app import create_app, db
 from app.tasks import init_queue
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Run QuestByCycle RQ workers.")
+    parser.add_argument(
+        "queue",
+        nargs="?",
+        choices=("default", "video"),
+        default="default",
+        help="Queue to consume; 'video' starts the transcoding worker pool.",
+    )
+    args = parser.parse_args()
+
     app = create_app()
     queue = init_queue(app)
     # push the Flask context so tasks can use current_app, etc.
     app.app_context().push()
 
-    # create a Worker bound to this queue and its connection
+    if args.queue == "video":
+        # A fixed number of workers bounds how many ffmpeg encodes run at once.
+        num_workers = int(app.config.get("VIDEO_TRANSCODE_WORKERS") or 1)
+        # Forked workers must not share the parent's database connections.
+        db.engine.dispose()
+        # Pool workers run with the scheduler, so retry intervals apply too.
+        pool = WorkerPool(
+            [app.video_queue], connection=queue.connection, num_workers=num_workers
+        )
+        pool.start()
+        return
+
+    # create a Worker bound to this queue and its connection; the scheduler
+    # re-enqueues jobs whose Retry waits an interval before the next attempt
     worker = Worker([queue], connection=queue.connection)
-    worker.work()
+    worker.work(with_scheduler=True)
 
 
 if __name__ == "__main__":
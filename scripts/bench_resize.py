@@ -0,0 +1,90 @@
+"""Compare thumbnail generation with a full decode against the reduced path.
+
+Usage::
+
+    python scripts/bench_resize.py [--width 300] [--runs 10] [--size 4032x3024]
+
+A synthetic EXIF-rotated JPEG is resized with the previous implementation
+(full decode, ``rotate`` and a LANCZOS ``resize``) and with
+:func:`app.utils.image_resize.load_scaled`. The script prints the mean time
+per thumbnail and the size of the largest decoded pixel buffer, which
+dominates peak memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from PIL import ExifTags, Image
+
+from app.utils.image_resize import encode, load_scaled
+
+
+def _sample_jpeg(width: int, height: int) -> bytes:
+    gradient = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (gradient, gradient.rotate(90), gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90, exif=exif)
+    return buf.getvalue()
+
+
+def _legacy(data: bytes, width: int) -> tuple[bytes, int]:
+    with Image.open(io.BytesIO(data)) as img:
+        tag = next(t for t, v in ExifTags.TAGS.items() if v == "Orientation")
+        orientation = img._getexif().get(tag)
+        rotation = {3: 180, 6: -90, 8: 90}.get(orientation)
+        if rotation:
+            img = img.rotate(rotation, expand=True)
+        decoded = img.width * img.height * len(img.getbands())
+        height = int(img.height * width / float(img.width))
+        resized = img.resize((width, height), Image.Resampling.LANCZOS)
+        return encode(resized, "WEBP"), decoded
+
+
+def _fast(data: bytes, width: int) -> tuple[bytes, int]:
+    with Image.open(io.BytesIO(data)) as img:
+        scaled = load_scaled(img, width)
+        decoded = img.width * img.height * len(img.getbands())
+        return encode(scaled, "WEBP"), decoded
+
+
+def _measure(func, data: bytes, width: int, runs: int) -> tuple[float, int]:
+    timings = []
+    decoded = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        _, decoded = func(data, width)
+        timings.append(time.perf_counter() - start)
+    return statistics.mean(timings), decoded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--size", default="4032x3024")
+    args = parser.parse_args()
+
+    src_w, src_h = (int(v) for v in args.size.lower().split("x"))
+    data = _sample_jpeg(src_w, src_h)
+
+    legacy_time, legacy_pixels = _measure(_legacy, data, args.width, args.runs)
+    fast_time, fast_pixels = _measure(_fast, data, args.width, args.runs)
+
+    print(f"source {src_w}x{src_h} JPEG, target width {args.width}, {args.runs} runs")
+    print(f"legacy: {legacy_time * 1000:8.1f} ms  decoded {legacy_pixels / 1e6:6.2f} MB")
+    print(f"fast:   {fast_time * 1000:8.1f} ms  decoded {fast_pixels / 1e6:6.2f} MB")
+    print(f"speedup {legacy_time / fast_time:.1f}x, decoded buffer {legacy_pixels / fast_pixels:.0f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
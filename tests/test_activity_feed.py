@@ -0,0 +1,117 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from flask import g
+from app import create_app, db
+from app.models.game import Game, ShoutBoardMessage
+from app.models.user import User, UserQuest
+from app.models.quest import Quest
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _setup():
+    now = datetime.now(timezone.utc)
+    user = User(username="u", email="u@example.com", license_agreed=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+
+    game = Game(title="G", start_date=now - timedelta(days=5),
+                end_date=now + timedelta(days=5), admin_id=user.id)
+    other = Game(title="Other", start_date=now - timedelta(days=5),
+                 end_date=now + timedelta(days=5), admin_id=user.id)
+    db.session.add_all([game, other])
+    db.session.commit()
+
+    quest = Quest(title="Ride", game=game)
+    other_quest = Quest(title="Elsewhere", game=other)
+    db.session.add_all([quest, other_quest])
+    db.session.commit()
+
+    db.session.add_all([
+        ShoutBoardMessage(message="pinned", user_id=user.id, game_id=game.id,
+                          is_pinned=True, timestamp=now),
+        ShoutBoardMessage(message="m1", user_id=user.id, game_id=game.id,
+                          timestamp=now - timedelta(minutes=1)),
+        ShoutBoardMessage(message="m2", user_id=user.id, game_id=game.id,
+                          timestamp=now - timedelta(minutes=3)),
+        ShoutBoardMessage(message="other", user_id=user.id, game_id=other.id,
+                          timestamp=now),
+        UserQuest(user_id=user.id, quest_id=quest.id, completions=1,
+                  completed_at=now - timedelta(minutes=2)),
+        UserQuest(user_id=user.id, quest_id=other_quest.id, completions=1,
+                  completed_at=now),
+    ])
+    db.session.commit()
+    return game
+
+
+def _login(client, user_id=1):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+    g.pop("_login_user", None)
+
+
+def test_feed_requires_login(client):
+    game = _setup()
+    assert client.get(f"/activity-feed/{game.id}").status_code == 302
+
+
+def test_feed_merges_and_scopes_to_game(client):
+    game = _setup()
+    _login(client)
+    resp = client.get(f"/activity-feed/{game.id}")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [p["message"] for p in data["pinned"]] == ["pinned"]
+    kinds = [(a["type"], a.get("message") or a["quest"]["title"]) for a in data["activities"]]
+    assert kinds == [
+        ("shout", "m1"),
+        ("quest_completion", "Ride"),
+        ("shout", "m2"),
+    ]
+    assert data["next_cursor"] is None
+
+
+def test_feed_cursor_pagination(client):
+    game = _setup()
+    _login(client)
+    first = client.get(f"/activity-feed/{game.id}?limit=2").get_json()
+    assert len(first["activities"]) == 2
+    assert first["next_cursor"]
+
+    second = client.get(
+        f"/activity-feed/{game.id}?limit=2&cursor={first['next_cursor']}"
+    ).get_json()
+    assert second["pinned"] == []
+    assert [a["message"] for a in second["activities"]] == ["m2"]
+    assert second["next_cursor"] is None
+
+
+def test_feed_rejects_bad_cursor(client):
+    game = _setup()
+    _login(client)
+    resp = client.get(f"/activity-feed/{game.id}?cursor=not-a-cursor")
+    assert resp.status_code == 400
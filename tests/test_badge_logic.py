@@ -182,3 +182,121 @@ def test_category_badges_are_game_specific(user, game):
     check_and_award_badges(user.id, quest.id, game.id)
     db.session.refresh(user)
     assert {b.name for b in user.badges} == {"Cat1"}
+
+
+def test_badge_award_ledger_is_idempotent(user, game):
+    from app.models import BadgeAward, ShoutBoardMessage
+
+    badge = Badge(name="Ind", description="i", game_id=game.id)
+    db.session.add(badge)
+    db.session.commit()
+    quest = Quest(
+        title="Q",
+        game_id=game.id,
+        badge_awarded=1,
+        badge_id=badge.id,
+        badge_option="individual",
+    )
+    db.session.add(quest)
+    db.session.commit()
+    _complete_quest(user.id, quest.id)
+
+    check_and_award_badges(user.id, quest.id, game.id)
+    check_and_award_badges(user.id, quest.id, game.id)
+
+    award = BadgeAward.query.filter_by(user_id=user.id, badge_id=badge.id).one()
+    message = ShoutBoardMessage.query.filter(
+        ShoutBoardMessage.badge_award_id.isnot(None)
+    ).one()
+    assert message.badge_award_id == award.id
+    message_id = message.id
+
+    UserQuest.query.filter_by(user_id=user.id, quest_id=quest.id).one().completions = 0
+    db.session.commit()
+    check_and_revoke_badges(user.id, game_id=game.id)
+
+    assert BadgeAward.query.count() == 0
+    assert db.session.get(ShoutBoardMessage, message_id) is None
+
+
+def test_backfill_links_legacy_messages(user, game):
+    from app.models import BadgeAward, ShoutBoardMessage
+    from app.utils.quest_scoring import backfill_badge_awards
+
+    badge = Badge(name="Old", description="o", game_id=game.id)
+    db.session.add(badge)
+    db.session.commit()
+    user.badges.append(badge)
+    legacy = ShoutBoardMessage(
+        message=f"earned <a data-badge-id='{badge.id}'>Old</a>",
+        user_id=user.id,
+        game_id=game.id,
+    )
+    db.session.add(legacy)
+    db.session.commit()
+
+    assert backfill_badge_awards() == (1, 1)
+    award = BadgeAward.query.one()
+    assert db.session.get(ShoutBoardMessage, legacy.id).badge_award_id == award.id
+    assert backfill_badge_awards() == (0, 0)
+
+
+def test_badge_rules_recompile_after_quest_edit(user, game):
+    from app.utils.badge_rules import get_badge_rules
+
+    badge = Badge(name="Ind", description="i", game_id=game.id)
+    db.session.add(badge)
+    db.session.commit()
+    quest = Quest(
+        title="Q",
+        game_id=game.id,
+        badge_awarded=2,
+        badge_id=badge.id,
+        badge_option="individual",
+    )
+    db.session.add(quest)
+    db.session.commit()
+
+    rules = get_badge_rules(game.id)
+    assert get_badge_rules(game.id) is rules
+    assert rules.quests[quest.id].threshold == 2
+
+    quest.badge_awarded = 1
+    db.session.commit()
+
+    updated = get_badge_rules(game.id)
+    assert updated is not rules
+    assert updated.individual_award(quest.id, {quest.id: 1}) == badge.id
+
+
+def test_recompute_game_badges_applies_threshold_change(user, game):
+    from app.models import BadgeAward
+    from app.utils.quest_scoring import recompute_game_badges
+
+    badge = Badge(name="Ind", description="i", game_id=game.id)
+    db.session.add(badge)
+    db.session.commit()
+    quest = Quest(
+        title="Q",
+        game_id=game.id,
+        badge_awarded=2,
+        badge_id=badge.id,
+        badge_option="individual",
+    )
+    db.session.add(quest)
+    db.session.commit()
+    _complete_quest(user.id, quest.id)
+
+    assert recompute_game_badges(game.id) == {"users": 1, "awarded": 0, "revoked": 0}
+
+    quest.badge_awarded = 1
+    db.session.commit()
+    assert recompute_game_badges(game.id) == {"users": 1, "awarded": 1, "revoked": 0}
+    assert BadgeAward.query.filter_by(user_id=user.id, badge_id=badge.id).count() == 1
+
+    quest.badge_awarded = 3
+    db.session.commit()
+    assert recompute_game_badges(game.id) == {"users": 1, "awarded": 0, "revoked": 1}
+    db.session.refresh(user)
+    assert user.badges == []
+    assert BadgeAward.query.count() == 0
@@ -11,13 +11,14 @@ from app.utils import calendar_utils
 
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     app = create_app({
         "TESTING": True,
         "WTF_CSRF_ENABLED": False,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "MAIL_SERVER": None,
     })
+    app.static_folder = str(tmp_path / "static")
     ctx = app.app_context()
     ctx.push()
     db.create_all()
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import create_app, db
+from app.models import Game, User, Quest, Badge
+from app.models.user import UserQuest
+from app.utils.game_scores import apply_score_delta
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login_as(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+
+
+def _setup():
+    user = User(username="u", email="u@example.com", license_agreed=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    game = Game(title="G", admin_id=user.id,
+                start_date=datetime.now(timezone.utc),
+                end_date=datetime.now(timezone.utc))
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Q", game=game, points=5)
+    db.session.add(quest)
+    db.session.commit()
+    db.session.add(UserQuest(user_id=user.id, quest_id=quest.id, completions=1, points_awarded=5))
+    db.session.commit()
+    return user, game, quest
+
+
+@pytest.mark.parametrize("url", [
+    "/leaderboard_partial?game_id={id}",
+    "/games/get_game_points/{id}",
+])
+def test_etag_round_trip(client, url):
+    user, game, _ = _setup()
+    login_as(client, user)
+    url = url.format(id=game.id)
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert not first.headers["ETag"].startswith("W/")
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    apply_score_delta(game.id, user.id, points=5)
+    db.session.commit()
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_quest_and_badge_edits_bump_version(client):
+    user, game, quest = _setup()
+    login_as(client, user)
+    url = f"/leaderboard_partial?game_id={game.id}"
+    etag = client.get(url).headers["ETag"]
+
+    quest.title = "Renamed"
+    db.session.commit()
+    etag2 = client.get(url, headers={"If-None-Match": etag}).headers["ETag"]
+    assert etag2 != etag
+
+    db.session.add(Badge(name="B", game=game))
+    db.session.commit()
+    resp = client.get(url, headers={"If-None-Match": etag2})
+    assert resp.status_code == 200
+    assert resp.get_json()["has_badges"] is True
@@ -0,0 +1,196 @@
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+from flask import g
+from PIL import Image
+
+from app import create_app, db
+from app.models import Game, Quest, QuestSubmission, User
+from app.utils import media_storage
+from app.utils.direct_uploads import DirectUpload, INCOMING_PREFIX
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+    shutil.rmtree(os.path.join(app.static_folder, "uploads"), ignore_errors=True)
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    import app.quests as quests_module
+
+    class _Naive(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.utcnow()
+
+    # SQLite returns naive game dates; compare them against naive "now".
+    monkeypatch.setattr(quests_module, "datetime", _Naive)
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    g.pop("_login_user", None)
+
+
+def _setup():
+    user = User(username="u", email="u@example.com", license_agreed=True, email_verified=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.now(timezone.utc)
+    game = Game(title="G", start_date=now - timedelta(days=1),
+                end_date=now + timedelta(days=1), admin_id=user.id)
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Q", game=game, verification_type="photo", points=5)
+    db.session.add(quest)
+    db.session.commit()
+    return user, quest
+
+
+def _png():
+    buf = BytesIO()
+    Image.new("RGB", (64, 48), "blue").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _grant(client, size, content_type="image/png", filename="ride.png"):
+    return client.post("/quests/direct-uploads", json={
+        "filename": filename, "content_type": content_type, "size": size,
+    })
+
+
+def test_direct_upload_is_registered_on_submit(client, app):
+    user, quest = _setup()
+    login(client, user)
+    data = _png()
+
+    resp = _grant(client, len(data))
+    assert resp.status_code == 201
+    grant = resp.get_json()
+    assert grant["object_key"].startswith(f"{INCOMING_PREFIX}/{user.id}/")
+
+    put = client.put(grant["upload_url"], data=data, headers=grant["headers"])
+    assert put.status_code == 200
+    incoming = os.path.join(app.static_folder, grant["object_key"])
+    assert os.path.exists(incoming)
+
+    resp = client.post(
+        f"/quests/quest/{quest.id}/submit",
+        data={"image_object": grant["object_key"]},
+    )
+    assert resp.status_code == 200
+    submission = db.session.get(QuestSubmission, resp.get_json()["submission_id"])
+    stored = os.path.join(app.static_folder, submission.image_url)
+    try:
+        assert submission.image_url.startswith(os.path.join("images", "verifications"))
+        assert os.path.exists(stored)
+        assert not os.path.exists(incoming)
+    finally:
+        os.remove(stored)
+        shutil.rmtree(os.path.splitext(stored)[0], ignore_errors=True)
+
+
+def test_direct_upload_is_ingested_and_deduplicated(client, app):
+    user, _ = _setup()
+    login(client, user)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    buf = BytesIO()
+    Image.new("RGB", (40, 20), "green").save(buf, "JPEG", exif=exif)
+    data = buf.getvalue()
+
+    stored = []
+    for _ in range(2):
+        grant = _grant(client, len(data), "image/jpeg", "ride.jpg").get_json()
+        client.put(grant["upload_url"], data=data, headers=grant["headers"])
+        upload = DirectUpload(grant["object_key"], user.id)
+        stored.append(upload.register_image(os.path.join("images", "verifications")))
+        assert not os.path.exists(os.path.join(app.static_folder, grant["object_key"]))
+    db.session.commit()
+
+    path = os.path.join(app.static_folder, stored[0])
+    try:
+        assert stored[0] == stored[1]
+        with Image.open(path) as img:
+            assert img.size == (20, 40)
+            assert not img.getexif()
+    finally:
+        os.remove(path)
+
+
+def test_signed_upload_urls_are_enforced(client, app):
+    user, _ = _setup()
+    other = User(username="o", email="o@example.com", license_agreed=True)
+    other.set_password("pw")
+    db.session.add(other)
+    db.session.commit()
+    login(client, user)
+
+    assert _grant(client, 10, "text/html", "x.html").status_code == 400
+
+    grant = _grant(client, 10).get_json()
+    url = grant["upload_url"]
+    assert client.put(url, data=b"x" * 10, content_type="image/jpeg").status_code == 400
+    assert client.put(url, data=b"x" * 11, content_type="image/png").status_code == 400
+    assert client.put(url + "x", data=b"x", content_type="image/png").status_code == 400
+    assert client.put(url, data=b"x" * 10, content_type="image/png").status_code == 200
+
+    # Only the uploader can use the object, and only when it is an image.
+    with pytest.raises(ValueError):
+        DirectUpload(grant["object_key"], other.id)
+    upload = DirectUpload(grant["object_key"], user.id)
+    with pytest.raises(ValueError, match="Invalid image file"):
+        upload.register_image("images/verifications")
+    assert not os.path.exists(os.path.join(app.static_folder, grant["object_key"]))
+
+
+def test_gcs_upload_url_limits_size(app, monkeypatch):
+    signed = {}
+
+    class FakeBlob:
+        def generate_signed_url(self, **kwargs):
+            signed.update(kwargs)
+            return "https://storage.example/signed"
+
+    class FakeBucket:
+        def blob(self, key):
+            signed["key"] = key
+            return FakeBlob()
+
+    class FakeClient:
+        def bucket(self, name):
+            return FakeBucket()
+
+    monkeypatch.setattr(media_storage.storage, "Client", FakeClient)
+    app.config["GCS_BUCKET"] = "bucket"
+    backend = media_storage.get_storage()
+    assert isinstance(backend, media_storage.GCSStorage)
+
+    url, headers = backend.upload_url("uploads/incoming/1/a.png", "image/png", 100,
+                                      timedelta(minutes=15))
+    assert url == "https://storage.example/signed"
+    assert headers == {"Content-Type": "image/png", "x-goog-content-length-range": "0,100"}
+    assert signed["method"] == "PUT"
+    assert signed["content_type"] == "image/png"
+    assert signed["key"] == "uploads/incoming/1/a.png"
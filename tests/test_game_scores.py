@@ -0,0 +1,178 @@
+import pytest
+from datetime import datetime, timezone
+
+from app import create_app, db
+from app.models import Game, User, Quest, Badge
+from app.models.user import UserQuest
+from app.models.score import GameUserScore, GameScoreTotal
+from app.commands import rebuild_scores_command
+from app.utils.game_scores import apply_score_delta, rebuild_game_scores, sync_badge_count
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _setup():
+    user = User(username="u", email="u@example.com", license_agreed=True)
+    user.set_password("pw")
+    other = User(username="o", email="o@example.com", license_agreed=True)
+    other.set_password("pw")
+    db.session.add_all([user, other])
+    db.session.commit()
+    game = Game(title="G", admin_id=user.id,
+                start_date=datetime.now(timezone.utc),
+                end_date=datetime.now(timezone.utc))
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Q", game=game, points=10)
+    db.session.add(quest)
+    db.session.commit()
+    return user, other, game, quest
+
+
+def test_rebuild_matches_user_quests(app):
+    user, other, game, quest = _setup()
+    db.session.add_all([
+        UserQuest(user_id=user.id, quest_id=quest.id, completions=2, points_awarded=20),
+        UserQuest(user_id=other.id, quest_id=quest.id, completions=1, points_awarded=10),
+    ])
+    db.session.commit()
+
+    assert rebuild_game_scores(game.id) == 2
+    row = GameUserScore.query.filter_by(game_id=game.id, user_id=user.id).one()
+    assert (row.points, row.completed_quests) == (20, 1)
+    assert db.session.get(GameScoreTotal, game.id).total_points == 30
+
+
+def test_delta_updates_existing_rows(app):
+    user, other, game, quest = _setup()
+    db.session.add(UserQuest(user_id=user.id, quest_id=quest.id, completions=1, points_awarded=10))
+    db.session.commit()
+    rebuild_game_scores(game.id)
+
+    db.session.add(UserQuest(user_id=other.id, quest_id=quest.id, completions=1, points_awarded=10))
+    apply_score_delta(game.id, other.id, points=10, completed_quests=1)
+    apply_score_delta(game.id, user.id, points=-10, completed_quests=-1)
+    db.session.commit()
+    db.session.expire_all()
+
+    assert GameUserScore.query.filter_by(user_id=other.id).one().points == 10
+    assert GameUserScore.query.filter_by(user_id=user.id).one().completed_quests == 0
+    assert db.session.get(GameScoreTotal, game.id).total_points == 10
+
+
+def test_first_delta_materializes_whole_game(app):
+    user, other, game, quest = _setup()
+    db.session.add(UserQuest(user_id=other.id, quest_id=quest.id, completions=1, points_awarded=10))
+    db.session.commit()
+
+    db.session.add(UserQuest(user_id=user.id, quest_id=quest.id, completions=1, points_awarded=10))
+    apply_score_delta(game.id, user.id, points=10, completed_quests=1)
+    db.session.commit()
+
+    assert db.session.get(GameScoreTotal, game.id).total_points == 20
+    assert GameUserScore.query.filter_by(game_id=game.id).count() == 2
+
+
+def test_badge_count_sync(app):
+    user, _, game, quest = _setup()
+    badge = Badge(name="B", game=game)
+    db.session.add(badge)
+    db.session.commit()
+    quest.badge_id = badge.id
+    quest.badge_option = "individual"
+    db.session.add(UserQuest(user_id=user.id, quest_id=quest.id, completions=1, points_awarded=10))
+    db.session.commit()
+    rebuild_game_scores(game.id)
+
+    user.badges.append(badge)
+    sync_badge_count(game.id, user.id)
+    db.session.commit()
+    db.session.expire_all()
+
+    assert GameUserScore.query.filter_by(user_id=user.id).one().badge_count == 1
+
+
+def test_rebuild_command(app):
+    user, _, game, quest = _setup()
+    db.session.add(UserQuest(user_id=user.id, quest_id=quest.id, completions=1, points_awarded=10))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(rebuild_scores_command, ["--game-id", str(game.id)])
+    assert result.exit_code == 0
+    assert "Rebuilt 1" in result.output
+
+
+def test_user_score_delta_is_clamped(app):
+    from app.utils.quest_scoring import MAX_POINTS_INT, apply_user_score_delta
+
+    user, _, _, _ = _setup()
+    user.score = 5
+    db.session.commit()
+
+    apply_user_score_delta(user.id, -20)
+    db.session.commit()
+    db.session.refresh(user)
+    assert user.score == 0
+
+    apply_user_score_delta(user.id, 7)
+    db.session.commit()
+    db.session.refresh(user)
+    assert user.score == 7
+    assert MAX_POINTS_INT > user.score
+
+
+def test_reconcile_user_scores_fixes_drift(app):
+    from app.utils.quest_scoring import reconcile_user_scores
+
+    user, other, _, quest = _setup()
+    db.session.add(UserQuest(user_id=user.id, quest_id=quest.id, completions=3, points_awarded=30))
+    user.score = 12
+    other.score = 0
+    db.session.commit()
+
+    assert reconcile_user_scores() == 1
+    db.session.refresh(user)
+    assert user.score == 30
+    assert reconcile_user_scores() == 0
+
+
+def test_concurrent_first_read_uses_winners_rows(tmp_path, monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+    from app.utils import game_scores
+
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'scores.db'}",
+        "MAIL_SERVER": None,
+    })
+    with app.app_context():
+        db.create_all()
+        user, other, game, quest = _setup()
+
+        def racing_rebuild(game_id):
+            # Another request materializes the game and commits first.
+            with db.engine.begin() as conn:
+                conn.execute(GameScoreTotal.__table__.insert().values(game_id=game_id, total_points=0))
+            raise IntegrityError("INSERT INTO game_score_total", {}, Exception("duplicate key"))
+
+        monkeypatch.setattr(game_scores, "_rebuild_game", racing_rebuild)
+        assert user.get_score_for_game(game.id) == 0
+        assert db.session.get(GameScoreTotal, game.id) is not None
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,95 @@
+import os
+import shutil
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from app import create_app, db
+from app.models import ImageDerivative
+from app.utils.file_uploads import delete_media_file, save_submission_image
+from app.utils.image_derivatives import derivative_path, image_srcsets
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    })
+    app.static_folder = str(tmp_path)
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _upload(width=800, height=400):
+    buf = BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, "PNG")
+    buf.seek(0)
+    return FileStorage(stream=buf, filename="photo.png", content_type="image/png")
+
+
+def test_upload_writes_width_ladder(app):
+    path = save_submission_image(_upload())
+
+    row = ImageDerivative.query.filter_by(path=path).one()
+    assert row.widths == [160, 320, 640, 800]
+    assert "webp" in row.formats and "jpeg" in row.formats
+    for width in row.widths:
+        for fmt in row.formats:
+            target = os.path.join(app.static_folder, derivative_path(path, width, fmt))
+            with Image.open(target) as img:
+                assert img.width == width
+
+    srcset = image_srcsets([path, "images/unknown.jpg"])
+    assert list(srcset) == [path]
+    assert srcset[path]["webp"].endswith("/w800.webp 800w")
+
+
+def test_resize_image_serves_stored_derivative(app):
+    path = save_submission_image(_upload())
+    client = app.test_client()
+
+    resp = client.get(
+        f"/resize_image?path={path}&width=300", headers={"Accept": "image/webp"}
+    )
+    assert resp.status_code == 200
+    assert resp.mimetype == "image/webp"
+    with Image.open(BytesIO(resp.data)) as img:
+        assert img.width == 320
+
+    # Without the derivative the resized bytes differ, and so does the tag.
+    etag = resp.headers["ETag"]
+    shutil.rmtree(os.path.join(app.static_folder, path.rsplit(".", 1)[0]))
+    resp = client.get(
+        f"/resize_image?path={path}&width=300",
+        headers={"Accept": "image/webp", "If-None-Match": etag},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_delete_media_file_removes_derivatives(app):
+    path = save_submission_image(_upload())
+    db.session.commit()
+    folder = os.path.join(app.static_folder, path.rsplit(".", 1)[0])
+
+    # Rolled back, the derivatives stay along with their row.
+    delete_media_file(path)
+    db.session.rollback()
+    assert ImageDerivative.query.count() == 1
+    assert os.path.isdir(folder)
+
+    delete_media_file(path)
+    assert os.path.isdir(folder)
+    db.session.commit()
+
+    assert ImageDerivative.query.count() == 0
+    assert not os.path.exists(os.path.join(app.static_folder, path.rsplit(".", 1)[0]))
@@ -0,0 +1,92 @@
+import os
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageCms
+from werkzeug.datastructures import FileStorage
+
+from app import create_app, db
+from app.utils.file_uploads import save_badge_image, save_submission_image
+from app.utils.image_ingest import ingest_image
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    })
+    app.static_folder = str(tmp_path)
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _rotated_jpeg():
+    """A 40x20 JPEG whose EXIF says it must be turned a quarter turn."""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    exif[0x010F] = "PhoneMaker"  # Make
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    buf = BytesIO()
+    Image.new("RGB", (40, 20), "green").save(buf, "JPEG", exif=exif, icc_profile=icc)
+    buf.seek(0)
+    return buf, icc
+
+
+def test_ingest_turns_upright_and_strips_metadata():
+    stream, icc = _rotated_jpeg()
+    image = ingest_image(stream)
+
+    assert (image.ext, image.content_type) == ("jpg", "image/jpeg")
+    with Image.open(BytesIO(image.data)) as img:
+        assert img.size == (20, 40)
+        assert not img.getexif()
+        assert img.info.get("icc_profile") == icc
+
+
+def test_ingest_checks_dimensions_and_converts():
+    buf = BytesIO()
+    Image.new("L", (4097, 1)).save(buf, "PNG")
+    with pytest.raises(ValueError, match="4096x4096"):
+        ingest_image(buf)
+    with pytest.raises(ValueError, match="Invalid image file"):
+        ingest_image(BytesIO(b"not an image"))
+
+    stream, _ = _rotated_jpeg()
+    image = ingest_image(stream, output_ext="png")
+    assert image.ext == "png"
+    assert Image.open(BytesIO(image.data)).format == "PNG"
+
+    frames = [Image.new("RGB", (8, 8), color) for color in ("red", "blue")]
+    buf = BytesIO()
+    frames[0].save(buf, "GIF", save_all=True, append_images=frames[1:])
+    image = ingest_image(buf)
+    assert image.data == buf.getvalue()
+
+
+def test_saved_image_is_written_once_in_its_final_form(app):
+    stream, _ = _rotated_jpeg()
+    upload = FileStorage(stream=stream, filename="ride.jpeg", content_type="image/jpeg")
+    path = save_submission_image(upload)
+
+    folder = os.path.join(app.static_folder, "images", "verifications")
+    assert sorted(os.listdir(folder)) == sorted(
+        [os.path.basename(path), os.path.basename(path).rsplit(".", 1)[0]]
+    )
+    assert path.endswith(".jpg")
+    with Image.open(os.path.join(app.static_folder, path)) as img:
+        assert img.size == (20, 40)
+
+    # Badges are converted to PNG instead of only being renamed.
+    stream, _ = _rotated_jpeg()
+    badge = save_badge_image(
+        FileStorage(stream=stream, filename="badge.jpg", content_type="image/jpeg")
+    )
+    with Image.open(os.path.join(app.static_folder, "images", "badge_images", badge)) as img:
+        assert img.format == "PNG"
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import create_app, db
+from app.models import Game, User, Quest
+from app.models.user import UserQuest
+from app.models.score import GameScoreTotal
+from app.utils import leaderboard
+from app.utils.game_scores import apply_score_delta
+from app.utils.leaderboard import leaderboard_key, sync_leaderboard
+from app.utils.redis_store import RedisError, get_redis
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login_as(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+
+
+def _setup(n_users=12):
+    users = []
+    for i in range(n_users):
+        u = User(username=f"u{i}", email=f"u{i}@example.com", license_agreed=True)
+        u.set_password("pw")
+        users.append(u)
+    db.session.add_all(users)
+    db.session.commit()
+    game = Game(title="G", admin_id=users[0].id,
+                start_date=datetime.now(timezone.utc),
+                end_date=datetime.now(timezone.utc))
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Q", game=game, points=1)
+    db.session.add(quest)
+    db.session.commit()
+    for i, u in enumerate(users):
+        db.session.add(UserQuest(user_id=u.id, quest_id=quest.id,
+                                 completions=1, points_awarded=(i + 1) * 10))
+    db.session.commit()
+    return users, game
+
+
+def test_top_n_and_my_rank(client):
+    users, game = _setup()
+    login_as(client, users[0])
+
+    data = client.get(f"/leaderboard/{game.id}?limit=3&around=2").get_json()
+    assert data["total_participants"] == 12
+    assert [e["username"] for e in data["entries"]] == ["u11", "u10", "u9"]
+    assert [e["rank"] for e in data["entries"]] == [1, 2, 3]
+    assert data["next_offset"] == 3
+    assert data["me"] == {"rank": 12, "total_points": 10}
+    assert [e["rank"] for e in data["around_me"]] == [10, 11, 12]
+
+
+def test_pagination_and_live_updates(client):
+    users, game = _setup()
+    login_as(client, users[0])
+    client.get(f"/leaderboard/{game.id}")
+
+    apply_score_delta(game.id, users[0].id, points=1000)
+    db.session.commit()
+
+    data = client.get(f"/leaderboard/{game.id}?offset=10&limit=5").get_json()
+    assert data["next_offset"] is None
+    assert [e["rank"] for e in data["entries"]] == [11, 12]
+    assert data["me"]["rank"] == 1
+
+
+def test_evicted_set_is_rebuilt(client):
+    users, game = _setup(3)
+    login_as(client, users[0])
+    client.get(f"/leaderboard/{game.id}")
+
+    get_redis().delete(leaderboard_key(game.id))
+    get_redis().zincrby(leaderboard_key(game.id), 5, str(users[0].id))
+
+    data = client.get(f"/leaderboard/{game.id}").get_json()
+    assert data["total_participants"] == 3
+    assert data["me"]["total_points"] == 10
+
+
+def test_delta_during_sync_is_counted_once(client, monkeypatch):
+    users, game = _setup(3)
+    login_as(client, users[0])
+    client.get(f"/leaderboard/{game.id}")
+    snapshot = leaderboard._score_snapshot
+    calls = []
+
+    def racing_snapshot(game_id):
+        result = snapshot(game_id)
+        if not calls:
+            # Commits and reaches Redis after the snapshot was read.
+            apply_score_delta(game_id, users[0].id, points=5)
+            db.session.commit()
+        calls.append(result)
+        return result
+
+    monkeypatch.setattr(leaderboard, "_score_snapshot", racing_snapshot)
+    sync_leaderboard(game.id)
+    assert len(calls) == 2
+    assert get_redis().zscore(leaderboard_key(game.id), str(users[0].id)) == 15
+
+    # A delta the snapshot already holds is not applied again.
+    version = db.session.get(GameScoreTotal, game.id).version
+    leaderboard._apply_delta(get_redis(), game.id, users[0].id, 5, version)
+    data = client.get(f"/leaderboard/{game.id}").get_json()
+    assert data["me"]["total_points"] == 15
+
+
+def test_ties_rank_the_same_in_redis_and_sql(client, app):
+    users, game = _setup()
+    login_as(client, users[0])
+    url = f"/leaderboard/{game.id}?offset=9&limit=3&around=1"
+    client.get(url)
+    # Ids 1 and 2 tie; Redis orders tied members as strings, descending.
+    apply_score_delta(game.id, users[0].id, points=10)
+    db.session.commit()
+
+    from_redis = client.get(url).get_json()
+
+    class Broken:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise RedisError("down")
+            return fail
+
+    app.extensions["redis"] = Broken()
+    from_sql = client.get(url).get_json()
+    assert [e["username"] for e in from_redis["entries"]] == ["u2", "u1", "u0"]
+    assert from_sql["entries"] == from_redis["entries"]
+    assert from_sql["me"] == from_redis["me"] == {"rank": 12, "total_points": 20}
+    assert from_sql["around_me"] == from_redis["around_me"]
+
+
+def test_sql_fallback_when_redis_down(client, app, monkeypatch):
+    users, game = _setup(4)
+    login_as(client, users[1])
+
+    class Broken:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise RedisError("down")
+            return fail
+
+    app.extensions["redis"] = Broken()
+    data = client.get(f"/leaderboard/{game.id}?limit=2&around=1").get_json()
+    assert [e["username"] for e in data["entries"]] == ["u3", "u2"]
+    assert data["me"] == {"rank": 3, "total_points": 20}
+    assert [e["rank"] for e in data["around_me"]] == [2, 3, 4]
+
+
+def test_partial_summary_leaves_ranking_to_paged_endpoint(client):
+    users, game = _setup(3)
+    login_as(client, users[0])
+
+    full = client.get(f"/leaderboard_partial?game_id={game.id}")
+    summary = client.get(f"/leaderboard_partial?game_id={game.id}&summary=1")
+    assert [u["username"] for u in full.get_json()["top_users"]] == ["u2", "u1", "u0"]
+    assert "top_users" not in summary.get_json()
+    assert summary.get_json()["total_game_points"] == 60
+    assert summary.headers["ETag"] != full.headers["ETag"]
@@ -9,13 +9,14 @@ from app.models import Game, Badge, User, Quest
 
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     app = create_app({
         "TESTING": True,
         "WTF_CSRF_ENABLED": False,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "MAIL_SERVER": None,
     })
+    app.static_folder = str(tmp_path)
     ctx = app.app_context()
     ctx.push()
     db.create_all()
@@ -68,8 +69,8 @@ def create_game(title, admin):
 
 
 PNG_BYTES = (
-    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89"
-    b"\x00\x00\x00\nIDATx\xda``\x00\x00\x00\x02\x00\x01\xe2!\xbc3\x00\x00\x00\x00IEND\xaeB`\x82"
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00"
+    b"\x00\rIDATx\x9cc````\x00\x00\x00\x05\x00\x01\xa5\xf6E@\x00\x00\x00\x00IEND\xaeB`\x82"
 )
 
 
@@ -164,3 +165,52 @@ def test_categories_filter_by_game(client, admin_user):
     data = resp.get_json()
     assert "Cat1" in data["categories"]
     assert "Cat2" not in data["categories"]
+
+
+def test_get_badges_query_count_independent_of_quests(client, admin_user):
+    from sqlalchemy import event
+    from app.models import UserQuest
+
+    game = create_game("Game 1", admin_user)
+    login_as(client, admin_user)
+
+    def add_badges(count):
+        for i in range(count):
+            badge = Badge(name=f"B{i}", description="d", game_id=game.id)
+            db.session.add(badge)
+            db.session.flush()
+            quest = Quest(
+                title=f"Q{i}",
+                game_id=game.id,
+                badge_id=badge.id,
+                badge_option="individual",
+                badge_awarded=1,
+            )
+            db.session.add(quest)
+            db.session.flush()
+            db.session.add(UserQuest(user_id=admin_user.id, quest_id=quest.id, completions=1))
+        db.session.commit()
+
+    def count_queries():
+        client.get(f"/badges?game_id={game.id}")
+        statements = []
+
+        def _count(*args):
+            statements.append(1)
+
+        event.listen(db.engine, "before_cursor_execute", _count)
+        try:
+            resp = client.get(f"/badges?game_id={game.id}")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _count)
+        return resp.get_json()["badges"], len(statements)
+
+    add_badges(2)
+    badges, small = count_queries()
+    assert all(b["is_complete"] for b in badges)
+
+    add_badges(8)
+    badges, large = count_queries()
+    assert len(badges) == 10
+    assert all(b["is_complete"] for b in badges)
+    assert large <= small
@@ -0,0 +1,131 @@
+import os
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from app import create_app, db
+from app.models import Game, ImageDerivative, MediaObject, Quest, QuestSubmission, User
+from app.utils.file_uploads import delete_media_file, save_profile_picture, save_submission_image
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    })
+    app.static_folder = str(tmp_path)
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _upload(color=(200, 30, 30)):
+    buf = BytesIO()
+    Image.new("RGB", (200, 100), color).save(buf, "PNG")
+    buf.seek(0)
+    return FileStorage(stream=buf, filename="photo.png", content_type="image/png")
+
+
+def test_identical_images_share_one_file(app, monkeypatch):
+    first = save_submission_image(_upload())
+    db.session.commit()
+
+    def fail(*_args):
+        raise AssertionError("derivatives already exist")
+
+    monkeypatch.setattr("app.tasks.enqueue_image_derivatives", fail)
+    second = save_submission_image(_upload())
+    db.session.commit()
+    monkeypatch.undo()
+    other = save_submission_image(_upload(color=(0, 0, 0)))
+    db.session.commit()
+
+    assert first == second != other
+    stored = os.path.join(app.static_folder, first)
+    assert sorted(os.listdir(os.path.dirname(stored))) == sorted(
+        name for path in (first, other) for name in
+        (os.path.basename(path), os.path.basename(path).rsplit(".", 1)[0])
+    )
+    assert MediaObject.query.filter_by(path=first).one().ref_count == 2
+
+    delete_media_file(first)
+    db.session.commit()
+    assert os.path.exists(stored)
+    assert ImageDerivative.query.filter_by(path=first).count() == 1
+
+    delete_media_file(second)
+    db.session.commit()
+    assert not os.path.exists(stored)
+    assert MediaObject.query.filter_by(path=first).count() == 0
+    assert ImageDerivative.query.filter_by(path=first).count() == 0
+
+
+def test_replacing_with_the_same_image_keeps_it(app):
+    path = save_profile_picture(_upload())
+    db.session.commit()
+    again = save_profile_picture(_upload(), old_filename=path)
+    db.session.commit()
+
+    assert again == path
+    assert os.path.exists(os.path.join(app.static_folder, path))
+    assert MediaObject.query.filter_by(path=path).one().ref_count == 1
+
+
+def _own_submission(client):
+    user = User(username="u", email="u@example.com", license_agreed=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.now(timezone.utc)
+    game = Game(title="G", start_date=now - timedelta(days=1),
+                end_date=now + timedelta(days=1), admin_id=user.id)
+    quest = Quest(title="Q", game=game)
+    submission = QuestSubmission(quest=quest, user_id=user.id)
+    db.session.add_all([game, quest, submission])
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    return submission.id
+
+
+def _put_photo(client, submission_id):
+    buf = BytesIO()
+    Image.new("RGB", (200, 100), (200, 30, 30)).save(buf, "PNG")
+    buf.seek(0)
+    return client.put(
+        f"/quests/submission/{submission_id}/photo",
+        data={"photo": (buf, "photo.png", "image/png")},
+    )
+
+
+def test_replacing_a_submission_photo_with_itself_keeps_one_reference(app):
+    client = app.test_client()
+    submission_id = _own_submission(client)
+
+    assert _put_photo(client, submission_id).status_code == 200
+    assert _put_photo(client, submission_id).status_code == 200
+    path = db.session.get(QuestSubmission, submission_id).image_url
+    assert MediaObject.query.filter_by(path=path).one().ref_count == 1
+
+
+def test_deleting_a_resubmitted_photo_frees_it(app):
+    client = app.test_client()
+    submission_id = _own_submission(client)
+    _put_photo(client, submission_id)
+    _put_photo(client, submission_id)
+    path = db.session.get(QuestSubmission, submission_id).image_url
+
+    resp = client.delete(f"/quests/quest/delete_submission/{submission_id}")
+    assert resp.status_code == 200
+    assert MediaObject.query.filter_by(path=path).count() == 0
+    assert not os.path.exists(os.path.join(app.static_folder, path))
@@ -0,0 +1,240 @@
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from PIL import Image
+from redis.exceptions import RedisError
+from werkzeug.datastructures import FileStorage
+
+from app import create_app, db
+from app.models import ImageDerivative, MediaObject
+from app.models.game import Game
+from app.models.quest import Quest, QuestSubmission, SubmissionStage
+from app.models.user import User
+from app.utils import file_uploads, media_storage
+from app.utils.file_uploads import delete_media_file, save_submission_image
+from app.utils.image_derivatives import derivative_path
+from app.utils.submission_pipeline import run_stage
+
+BASE_URL = "https://storage.googleapis.com/bucket"
+
+
+class FakeQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, func, *args, **kwargs):
+        self.jobs.append((func, args))
+
+    def run(self):
+        jobs, self.jobs = self.jobs, []
+        return [func(*args) for func, args in jobs]
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    """A GCS bucket backed by a local directory."""
+    root = tmp_path / "bucket"
+
+    class FakeBlob:
+        def __init__(self, name):
+            self.name = name
+            self.path = root / name
+
+        def upload_from_filename(self, filename, content_type=None, if_generation_match=None, retry=None):
+            if if_generation_match == 0 and self.path.exists():
+                raise PreconditionFailed("exists")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(filename, self.path)
+
+        def update_storage_class(self, storage_class):
+            pass
+
+        def make_public(self):
+            pass
+
+        def download_to_filename(self, filename):
+            shutil.copyfile(self.path, filename)
+
+        def delete(self, retry=None):
+            if not self.path.exists():
+                raise NotFound("missing")
+            self.path.unlink()
+
+    class FakeBucket:
+        def blob(self, name):
+            return FakeBlob(name)
+
+        def copy_blob(self, blob, bucket, new_name):
+            copy = FakeBlob(new_name)
+            copy.path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(blob.path, copy.path)
+            return copy
+
+    class FakeClient:
+        def bucket(self, name):
+            return FakeBucket()
+
+    monkeypatch.setattr(media_storage.storage, "Client", FakeClient)
+    return root
+
+
+@pytest.fixture
+def app(tmp_path, bucket):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "GCS_BUCKET": "bucket",
+        "USE_TASK_QUEUE": True,
+    })
+    app.static_folder = str(tmp_path / "static")
+    app.task_queue = FakeQueue()
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _quest():
+    now = datetime.now(timezone.utc)
+    user = User(username="u", email="u@example.com", license_agreed=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    game = Game(
+        title="G",
+        start_date=now - timedelta(days=1),
+        end_date=now + timedelta(days=1),
+        admin_id=user.id,
+    )
+    quest = Quest(title="q", game=game)
+    db.session.add_all([game, quest])
+    db.session.commit()
+    return user, quest
+
+
+def _upload():
+    buf = BytesIO()
+    Image.new("RGB", (200, 100), (200, 30, 30)).save(buf, "PNG")
+    buf.seek(0)
+    return FileStorage(stream=buf, filename="photo.png", content_type="image/png")
+
+
+def test_submission_photo_moves_to_bucket_after_commit(app, bucket):
+    user, quest = _quest()
+    path = save_submission_image(_upload())
+    local = os.path.join(app.static_folder, path)
+    assert os.path.exists(local)
+    assert app.task_queue.jobs == []
+
+    submission = QuestSubmission(quest_id=quest.id, user_id=user.id, image_url=path)
+    db.session.add(submission)
+    db.session.commit()
+    url = f"{BASE_URL}/{path}"
+    assert app.task_queue.run() == [url]
+
+    assert db.session.get(QuestSubmission, submission.id).image_url == url
+    assert MediaObject.query.one().path == url
+    assert ImageDerivative.query.one().path == url
+    assert not os.path.exists(local)
+    assert not os.path.exists(local.rsplit(".", 1)[0])
+    derivative = derivative_path(path, 160, "jpeg")
+    assert (bucket / path).exists() and (bucket / derivative).exists()
+
+    # The same photo reuses the bucket copy without another upload.
+    assert save_submission_image(_upload()) == url
+    db.session.commit()
+    assert app.task_queue.jobs == []
+
+    delete_media_file(url)
+    delete_media_file(url)
+    db.session.commit()
+    app.task_queue.run()
+    assert not (bucket / path).exists() and not (bucket / derivative).exists()
+
+
+def test_offload_runs_inline_when_queueing_fails(app, bucket, monkeypatch):
+    user, quest = _quest()
+    path = save_submission_image(_upload())
+
+    def redis_down(*args, **kwargs):
+        raise RedisError("down")
+
+    monkeypatch.setattr(app.task_queue, "enqueue", redis_down)
+    submission = QuestSubmission(quest_id=quest.id, user_id=user.id, image_url=path)
+    db.session.add(submission)
+    db.session.commit()
+
+    db.session.expire_all()
+    assert db.session.get(QuestSubmission, submission.id).image_url == f"{BASE_URL}/{path}"
+    assert (bucket / path).exists()
+    assert not os.path.exists(os.path.join(app.static_folder, path))
+
+
+def test_unreferenced_uploads_are_not_kept(app, bucket):
+    user, quest = _quest()
+    path = save_submission_image(_upload())
+    db.session.rollback()
+    assert app.task_queue.jobs == []
+
+    path = save_submission_image(_upload())
+    submission = QuestSubmission(quest_id=quest.id, user_id=user.id, image_url=path)
+    db.session.add(submission)
+    db.session.commit()
+    # Removed before the worker got to it.
+    db.session.delete(submission)
+    MediaObject.query.delete()
+    db.session.commit()
+
+    assert app.task_queue.run() == [None]
+    assert not (bucket / path).exists()
+    assert not os.path.exists(os.path.join(app.static_folder, path))
+
+
+def test_pending_video_stays_private_until_transcode_commits(app, bucket, monkeypatch):
+    user, quest = _quest()
+    incoming = bucket / "uploads/incoming/1/clip.mp4"
+    incoming.parent.mkdir(parents=True)
+    incoming.write_bytes(b"\x00" * 100)
+    published = []
+    monkeypatch.setattr(
+        media_storage, "_publish_blob", lambda blob, key: published.append(key)
+    )
+    pending = media_storage.get_storage().move(
+        "uploads/incoming/1/clip.mp4", "videos/pending/clip.mp4"
+    )
+    assert pending == f"{BASE_URL}/videos/pending/clip.mp4"
+    assert published == []
+
+    submission = QuestSubmission(
+        quest_id=quest.id, user_id=user.id, video_url=pending, video_status="pending"
+    )
+    submission.stages.append(SubmissionStage(stage="video", status="pending"))
+    db.session.add(submission)
+    db.session.commit()
+    app.config["FFMPEG_PATH"] = "/nonexistent/ffmpeg"
+
+    def stopped(path):
+        raise RuntimeError("worker stopped")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(file_uploads, "probe_video", stopped)
+        with pytest.raises(RuntimeError):
+            run_stage(submission.id, "video")
+    # The retry needs the upload.
+    assert (bucket / "videos/pending/clip.mp4").exists()
+
+    monkeypatch.setattr(file_uploads, "probe_video", lambda path: None)
+    run_stage(submission.id, "video")
+    submission = db.session.get(QuestSubmission, submission.id)
+    assert submission.video_status == "ready"
+    assert submission.video_url.startswith("videos/verifications/")
+    assert not (bucket / "videos/pending/clip.mp4").exists()
+    os.remove(os.path.join(app.static_folder, submission.video_url))
@@ -0,0 +1,135 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from app import create_app, db
+from app.models.game import Game
+from app.models.quest import Quest, QuestSubmission
+from app.models.user import User
+from app.utils import public_album
+from app.utils.redis_store import RedisError
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _setup(count=3):
+    now = datetime.now(timezone.utc)
+    user = User(username="rider", email="rider@example.com", license_agreed=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+
+    game = Game(title="G", start_date=now - timedelta(days=5),
+                end_date=now + timedelta(days=5), admin_id=user.id)
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Ride", game=game)
+    db.session.add(quest)
+    db.session.commit()
+
+    db.session.add_all([
+        QuestSubmission(quest_id=quest.id, user_id=user.id, comment=f"s{i}",
+                        timestamp=now - timedelta(minutes=i))
+        for i in range(count)
+    ])
+    db.session.commit()
+    return game
+
+
+def test_public_album_is_shared_and_cacheable(client):
+    game = _setup()
+
+    resp = client.get(f"/quests/album/{game.album_code}")
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == "public, max-age=60, s-maxage=600"
+    assert resp.headers["Surrogate-Key"] == f"album-{game.id}"
+    assert "Cookie" not in resp.headers.get("Vary", "")
+    data = resp.get_json()
+    assert [s["comment"] for s in data["submissions"]] == ["s0", "s1", "s2"]
+    assert "liked_by_current_user" not in data["submissions"][0]
+
+    cached = client.get(
+        f"/quests/album/{game.album_code}",
+        headers={"If-None-Match": resp.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+    assert client.get("/quests/album/zzzz").status_code == 404
+
+
+def test_precomputed_album_is_served_without_building(client, monkeypatch):
+    game = _setup()
+    version = public_album.refresh_album(game.id)
+    assert version == 1
+
+    def fail(*_args):
+        raise AssertionError("page should come from the cache")
+
+    # Warm the album code lookup, then serve only stored pages.
+    client.get(f"/quests/album/{game.album_code}")
+    monkeypatch.setattr(public_album, "build_page", fail)
+    monkeypatch.setattr(public_album.Game, "query", None)
+    data = client.get(f"/quests/album/{game.album_code}").get_json()
+    assert len(data["submissions"]) == 3
+
+
+def test_deleting_a_submission_refreshes_the_album(client):
+    game = _setup()
+    owner = User.query.filter_by(username="rider").one()
+    first = client.get(f"/quests/album/{game.album_code}")
+
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(owner.id)
+        sess["_fresh"] = True
+    submission = QuestSubmission.query.filter_by(comment="s0").one()
+    resp = client.delete(f"/quests/quest/delete_submission/{submission.id}")
+    assert resp.status_code == 200
+
+    with client.session_transaction() as sess:
+        sess.clear()
+    after = client.get(f"/quests/album/{game.album_code}")
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert [s["comment"] for s in after.get_json()["submissions"]] == ["s1", "s2"]
+
+
+def test_album_without_version_is_tagged_by_content(client, monkeypatch):
+    game = _setup()
+    first = client.get(f"/quests/album/{game.album_code}")
+    assert "like_count" not in first.get_json()["submissions"][0]
+
+    def down():
+        raise RedisError("down")
+
+    monkeypatch.setattr(public_album, "get_redis", down)
+    same = client.get(f"/quests/album/{game.album_code}")
+    assert same.headers["ETag"] == first.headers["ETag"]
+
+    quest = Quest.query.one()
+    db.session.add(QuestSubmission(quest_id=quest.id, user_id=game.admin_id, comment="new"))
+    db.session.commit()
+    # No refresh can bump the version while Redis is down.
+    after = client.get(
+        f"/quests/album/{game.album_code}",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+    assert after.status_code == 200
+    assert after.get_json()["submissions"][0]["comment"] == "new"
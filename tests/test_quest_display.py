@@ -62,7 +62,7 @@ def test_prepare_quests_includes_unbadged_empty(app):
         db.session.add(sub)
         db.session.commit()
 
-        quests, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
+        quests, _, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
         ids = [q.id for q in quests]
         assert q1.id in ids
         assert q2.id in ids
@@ -100,7 +100,7 @@ def test_prepare_quests_includes_badgeless_quests(app):
         db.session.add(sub)
         db.session.commit()
 
-        quests, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
+        quests, _, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
         ids = [q.id for q in quests]
         assert q1.id in ids
         assert q2.id in ids
@@ -161,7 +161,7 @@ def test_prepare_quests_includes_calendar_quests(app):
         db.session.add(q_cal)
         db.session.commit()
 
-        quests, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
+        quests, _, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
         ids = [q.id for q in quests]
         assert q_cal.id in ids
 
@@ -236,13 +236,13 @@ def test_calendar_quest_can_verify_after_start(app):
         db.session.add(quest)
         db.session.commit()
 
-        quests, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
+        quests, _, _ = _prepare_quests(game, admin.id, [], datetime.now(timezone.utc))
         q = next(q for q in quests if q.id == quest.id)
         assert not q.can_verify
         assert q.next_eligible_time == start_time
 
         later = start_time + timedelta(minutes=1)
-        quests, _ = _prepare_quests(game, admin.id, [], later)
+        quests, _, _ = _prepare_quests(game, admin.id, [], later)
         q = next(q for q in quests if q.id == quest.id)
         assert q.can_verify
 
@@ -0,0 +1,154 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.game import Game
+from app.models.user import User, UserQuest
+from app.models.quest import Quest, QuestSubmission
+from app.utils.eligibility import bulk_quest_eligibility, quest_eligibility
+from app.utils.quest_stats import annotate_quest_stats
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+def _setup(n_quests=5):
+    now = datetime.now(timezone.utc)
+    user = User(username="u", email="u@example.com", license_agreed=True)
+    user.set_password("pw")
+    other = User(username="o", email="o@example.com", license_agreed=True)
+    other.set_password("pw")
+    db.session.add_all([user, other])
+    db.session.commit()
+
+    game = Game(
+        title="G",
+        start_date=now - timedelta(days=1),
+        end_date=now + timedelta(days=1),
+        admin_id=user.id,
+    )
+    db.session.add(game)
+    db.session.commit()
+
+    quests = [
+        Quest(title=f"q{i}", game=game, frequency="daily", completion_limit=2)
+        for i in range(n_quests)
+    ]
+    db.session.add_all(quests)
+    db.session.commit()
+    return now, user, other, game, quests
+
+
+def test_counts_and_period_stats(app):
+    now, user, other, game, quests = _setup()
+    q = quests[0]
+    db.session.add_all([
+        QuestSubmission(quest_id=q.id, user_id=user.id, timestamp=now - timedelta(hours=2)),
+        QuestSubmission(quest_id=q.id, user_id=user.id, timestamp=now - timedelta(days=3)),
+        QuestSubmission(quest_id=q.id, user_id=other.id, timestamp=now - timedelta(hours=1)),
+    ])
+    db.session.commit()
+
+    annotate_quest_stats(quests, game.id, user.id, [], now)
+
+    assert q.total_completions == 3
+    assert q.personal_completions == 2
+    assert q.completions_within_period == 1
+    assert q.first_completion_in_period == now - timedelta(hours=2)
+    # Only the submission inside the daily window counts toward the limit.
+    assert q.can_verify is True
+    assert q.next_eligible_time is None
+    assert quests[1].total_completions == 0
+    assert quests[1].can_verify is True
+
+
+def test_last_completion_from_user_quests(app):
+    now, user, _, game, quests = _setup(1)
+    q = quests[0]
+    earlier = now - timedelta(days=2)
+    uq = UserQuest(user_id=user.id, quest_id=q.id, completions=1, completed_at=earlier)
+
+    annotate_quest_stats(quests, game.id, user.id, [uq], now)
+
+    assert q.last_completion == earlier
+
+
+def test_query_count_independent_of_quest_count(app):
+    now, user, _, game, quests = _setup(20)
+    game_id, user_id = game.id, user.id
+    for quest in quests:
+        db.session.refresh(quest)
+    statements = []
+
+    def _count(*_args, **_kwargs):
+        statements.append(1)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        annotate_quest_stats(quests, game_id, user_id, [], now)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert len(statements) <= 2
+
+
+def test_limit_reached_within_period(app):
+    now, user, _, game, quests = _setup(2)
+    q = quests[0]
+    first = now - timedelta(hours=5)
+    last = now - timedelta(hours=1)
+    db.session.add_all([
+        QuestSubmission(quest_id=q.id, user_id=user.id, timestamp=first),
+        QuestSubmission(quest_id=q.id, user_id=user.id, timestamp=last),
+    ])
+    db.session.commit()
+
+    annotate_quest_stats(quests, game.id, user.id, [], now)
+    eligibility = quest_eligibility(user.id, q, now)
+
+    assert q.can_verify is False
+    assert eligibility.can_verify is False
+    assert eligibility.completions_in_period == 2
+    assert eligibility.next_eligible_time == first + timedelta(days=1)
+    assert q.next_eligible_time == eligibility.next_eligible_time
+    assert eligibility.last_relevant_completion == last
+
+
+def test_bulk_eligibility_single_statement(app):
+    now, user, _, game, quests = _setup(10)
+    user_id = user.id
+    db.session.add(QuestSubmission(quest_id=quests[0].id, user_id=user_id, timestamp=now))
+    db.session.commit()
+    for quest in quests:
+        db.session.refresh(quest)
+    statements = []
+
+    def _count(*_args, **_kwargs):
+        statements.append(1)
+
+    event.listen(db.engine, "before_cursor_execute", _count)
+    try:
+        result = bulk_quest_eligibility(user_id, quests, now)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _count)
+
+    assert len(statements) == 1
+    assert result[quests[0].id].completions_in_period == 1
+    assert all(e.can_verify for e in result.values())
@@ -1,5 +1,5 @@
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from app import create_app, db
 from app.models.game import Game
@@ -72,3 +72,57 @@ def test_quest_submissions_includes_quest_id(client):
     assert resp.status_code == 200
     data = resp.get_json()
     assert data and data[0]["quest_id"] == quest.id
+
+
+def _quest_with_submissions(client, count):
+    user = User(username="u", email="u@example.com", license_agreed=True, email_verified=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    login_as(client, user)
+
+    game = create_game(user)
+    quest = Quest(title="Q", game=game)
+    db.session.add(quest)
+    db.session.commit()
+
+    now = datetime.now(timezone.utc)
+    db.session.add_all([
+        QuestSubmission(
+            quest_id=quest.id,
+            user_id=user.id,
+            image_url=f"images/verifications/{i}.jpg",
+            comment=f"c{i}",
+            timestamp=now - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ])
+    db.session.commit()
+    return quest
+
+
+def test_quest_submissions_cursor_pagination(client):
+    quest = _quest_with_submissions(client, 3)
+
+    first = client.get(f"/quests/quest/{quest.id}/submissions?limit=2").get_json()
+    assert [s["comment"] for s in first["submissions"]] == ["c0", "c1"]
+    assert first["has_more"] and first["next_cursor"]
+    assert first["submissions"][0]["user_username"] == "u"
+
+    second = client.get(
+        f"/quests/quest/{quest.id}/submissions?limit=2&cursor={first['next_cursor']}"
+    ).get_json()
+    assert [s["comment"] for s in second["submissions"]] == ["c2"]
+    assert second["next_cursor"] is None
+
+
+def test_quest_submissions_thumbnail_fields(client):
+    quest = _quest_with_submissions(client, 2)
+
+    data = client.get(f"/quests/quest/{quest.id}/submissions?fields=thumbnails").get_json()
+    entry = data["submissions"][0]
+    assert set(entry) == {"id", "thumbnail_url", "image_srcset", "video_url", "video_status"}
+    assert entry["thumbnail_url"].endswith("images/verifications/0.jpg")
+
+    resp = client.get(f"/quests/quest/{quest.id}/submissions?fields=everything")
+    assert resp.status_code == 400
@@ -58,3 +58,84 @@ def test_resize_image_missing_file(client):
     )
     assert resp.status_code == 404
 
+
+
+@pytest.fixture
+def cached_client(app, tmp_path):
+    app.config["RESIZE_CACHE_DIR"] = str(tmp_path)
+    return app.test_client()
+
+
+def test_resize_image_cache_headers_and_304(cached_client, monkeypatch):
+    url = "/resize_image?path=images/default_badge.png&width=50"
+    first = cached_client.get(url, headers={"Accept": "image/webp"})
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert "Accept" in first.headers["Vary"]
+    etag = first.headers["ETag"]
+
+    import app.main as main_module
+
+    def _no_open(*args, **kwargs):
+        raise AssertionError("image decoded")
+
+    monkeypatch.setattr(main_module.Image, "open", _no_open)
+    resp = cached_client.get(
+        url, headers={"Accept": "image/webp", "If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+
+    hit = cached_client.get(url, headers={"Accept": "image/webp"})
+    assert hit.status_code == 200
+    assert hit.data == first.data
+    assert hit.headers["ETag"] == etag
+
+
+def test_resize_image_cache_varies_by_format(cached_client):
+    url = "/resize_image?path=images/default_badge.png&width=50"
+    webp = cached_client.get(url, headers={"Accept": "image/webp"})
+    jpeg = cached_client.get(url, headers={"Accept": "image/png"})
+    assert webp.headers["ETag"] != jpeg.headers["ETag"]
+    assert jpeg.mimetype == "image/jpeg"
+
+
+def test_resize_cache_evicts_least_recently_used(app, tmp_path):
+    import os
+    import time
+    from app.utils import image_cache
+
+    app.config["RESIZE_CACHE_DIR"] = str(tmp_path)
+    app.config["RESIZE_CACHE_MAX_BYTES"] = 250
+    old = image_cache.store("a" * 64, "jpg", b"x" * 100)
+    past = time.time() - 60
+    os.utime(old, (past, past))
+    image_cache.store("b" * 64, "jpg", b"x" * 100)
+    image_cache.store("c" * 64, "jpg", b"x" * 100)
+
+    assert image_cache.lookup("a" * 64, "jpg") is None
+    assert image_cache.lookup("c" * 64, "jpg") is not None
+
+
+def test_bucket_width_snaps_to_ladder():
+    from app.utils.image_resize import WIDTH_BUCKETS, bucket_width
+
+    assert bucket_width(1) == WIDTH_BUCKETS[0]
+    assert bucket_width(161) == 200
+    assert bucket_width(320) == 320
+    assert bucket_width(10_000) == WIDTH_BUCKETS[-1]
+
+
+def test_load_scaled_applies_exif_orientation():
+    from io import BytesIO
+    from PIL import ExifTags, Image
+    from app.utils.image_resize import load_scaled
+
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    buf = BytesIO()
+    Image.new("RGB", (1600, 800), "red").save(buf, "JPEG", exif=exif)
+    buf.seek(0)
+
+    with Image.open(buf) as img:
+        scaled = load_scaled(img, 200)
+        assert scaled.size == (200, 400)
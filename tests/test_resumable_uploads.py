@@ -0,0 +1,177 @@
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+from flask import g
+from PIL import Image
+
+from app import create_app, db
+from app.models import Game, Quest, QuestSubmission, UploadSession, User
+from app.utils.file_uploads import MAX_VIDEO_BYTES
+from app.utils.resumable_uploads import SESSION_TTL, part_path, purge_stale_uploads
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    import app.quests as quests_module
+
+    class _Naive(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.utcnow()
+
+    # SQLite returns naive game dates; compare them against naive "now".
+    monkeypatch.setattr(quests_module, "datetime", _Naive)
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    g.pop("_login_user", None)
+
+
+def _setup():
+    user = User(username="u", email="u@example.com", license_agreed=True, email_verified=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.now(timezone.utc)
+    game = Game(title="G", start_date=now - timedelta(days=1),
+                end_date=now + timedelta(days=1), admin_id=user.id)
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Q", game=game, verification_type="photo", points=5)
+    db.session.add(quest)
+    db.session.commit()
+    return user, quest
+
+
+def _png():
+    buf = BytesIO()
+    Image.new("RGB", (64, 48), "red").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _put(client, url, body, start, total):
+    return client.put(
+        url,
+        data=body,
+        headers={"Content-Range": f"bytes {start}-{start + len(body) - 1}/{total}"},
+    )
+
+
+def test_chunked_upload_resumes_and_submits(client, app):
+    user, quest = _setup()
+    login(client, user)
+    data = _png()
+
+    resp = client.post("/quests/uploads", json={
+        "filename": "ride.png", "content_type": "image/png", "size": len(data),
+    })
+    assert resp.status_code == 201
+    created = resp.get_json()
+    url = created["upload_url"]
+    assert created["offset"] == 0
+
+    half = len(data) // 2
+    assert _put(client, url, data[:half], 0, len(data)).get_json()["offset"] == half
+
+    # A chunk past the stored offset is refused with the offset to resume from.
+    gap = _put(client, url, data[half + 10:], half + 10, len(data))
+    assert gap.status_code == 409
+    assert gap.get_json()["offset"] == half
+
+    # Retrying an already stored chunk is harmless.
+    assert _put(client, url, data[:half], 0, len(data)).get_json()["offset"] == half
+    assert client.get(url).get_json()["offset"] == half
+
+    done = _put(client, url, data[half:], half, len(data)).get_json()
+    assert done["complete"] is True
+
+    upload = db.session.get(UploadSession, created["upload_id"])
+    part = part_path(upload)
+    resp = client.post(
+        f"/quests/quest/{quest.id}/submit",
+        data={"image_upload_id": created["upload_id"]},
+    )
+    assert resp.status_code == 200
+    submission = db.session.get(QuestSubmission, resp.get_json()["submission_id"])
+    try:
+        assert submission.image_url.startswith(os.path.join("images", "verifications"))
+        db.session.expire_all()
+        assert db.session.get(UploadSession, created["upload_id"]) is None
+        assert not os.path.exists(part)
+    finally:
+        stored = os.path.join(app.static_folder, submission.image_url)
+        os.remove(stored)
+        shutil.rmtree(os.path.splitext(stored)[0], ignore_errors=True)
+
+
+def test_uploads_are_validated_and_private(client, app):
+    user, quest = _setup()
+    other = User(username="o", email="o@example.com", license_agreed=True)
+    other.set_password("pw")
+    db.session.add(other)
+    db.session.commit()
+    login(client, user)
+
+    assert client.post("/quests/uploads", json={
+        "filename": "x.exe", "content_type": "application/octet-stream", "size": 10,
+    }).status_code == 400
+    assert client.post("/quests/uploads", json={
+        "filename": "clip.mp4", "content_type": "video/mp4", "size": MAX_VIDEO_BYTES + 1,
+    }).status_code == 400
+
+    created = client.post("/quests/uploads", json={
+        "filename": "ride.png", "content_type": "image/png", "size": 100,
+    }).get_json()
+
+    # An incomplete upload cannot be submitted and is kept for resuming.
+    resp = client.post(
+        f"/quests/quest/{quest.id}/submit",
+        data={"image_upload_id": created["upload_id"]},
+    )
+    assert resp.status_code == 400
+    assert db.session.get(UploadSession, created["upload_id"]) is not None
+
+    login(client, other)
+    assert client.get(created["upload_url"]).status_code == 404
+    assert client.delete(created["upload_url"]).status_code == 404
+
+
+def test_stale_uploads_are_purged(client, app):
+    user, _ = _setup()
+    login(client, user)
+    created = client.post("/quests/uploads", json={
+        "filename": "ride.png", "content_type": "image/png", "size": 100,
+    }).get_json()
+    upload = db.session.get(UploadSession, created["upload_id"])
+    part = part_path(upload)
+    assert os.path.exists(part)
+
+    assert purge_stale_uploads() == 0
+    upload.updated_at = datetime.now(timezone.utc) - SESSION_TTL - timedelta(minutes=1)
+    db.session.commit()
+    assert purge_stale_uploads() == 1
+    assert not os.path.exists(part)
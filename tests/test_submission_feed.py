@@ -0,0 +1,151 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.game import Game
+from app.models.quest import Quest, QuestSubmission, SubmissionLike
+from app.models.user import User
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _setup():
+    now = datetime.now(timezone.utc)
+    alice = User(username="alice", email="alice@example.com", license_agreed=True)
+    bob = User(username="bob", email="bob@example.com", license_agreed=True)
+    for user in (alice, bob):
+        user.set_password("pw")
+    db.session.add_all([alice, bob])
+    db.session.commit()
+
+    game = Game(title="G", start_date=now - timedelta(days=5),
+                end_date=now + timedelta(days=5), admin_id=alice.id)
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Ride", game=game)
+    db.session.add(quest)
+    db.session.commit()
+
+    # Two submissions share a timestamp so paging must break ties by id.
+    stamps = [now, now - timedelta(minutes=1), now - timedelta(minutes=1),
+              now - timedelta(minutes=2), now - timedelta(minutes=3)]
+    submissions = [
+        QuestSubmission(quest_id=quest.id, user_id=alice.id, comment=f"s{i}", timestamp=ts)
+        for i, ts in enumerate(stamps)
+    ]
+    db.session.add_all(submissions)
+    db.session.commit()
+
+    db.session.add_all([
+        SubmissionLike(submission_id=submissions[0].id, user_id=alice.id),
+        SubmissionLike(submission_id=submissions[0].id, user_id=bob.id),
+        SubmissionLike(submission_id=submissions[3].id, user_id=bob.id),
+    ])
+    submissions[0].like_count = 2
+    submissions[3].like_count = 1
+    db.session.commit()
+    return game, bob, submissions
+
+
+def test_album_cursor_walks_every_submission_once(client):
+    game, _, submissions = _setup()
+    base = f"/quests/quest/all_submissions?game_id={game.id}&album_code={game.album_code}&limit=2"
+
+    seen = []
+    url = base
+    while True:
+        data = client.get(url).get_json()
+        seen.extend(s["comment"] for s in data["submissions"])
+        assert data["has_more"] == (data["next_cursor"] is not None)
+        if not data["next_cursor"]:
+            break
+        url = f"{base}&cursor={data['next_cursor']}"
+
+    assert sorted(seen) == sorted(s.comment for s in submissions)
+    assert len(seen) == len(set(seen)) == 5
+    assert seen[0] == "s0" and seen[-1] == "s4"
+
+
+def test_album_batches_like_data(client):
+    game, bob, submissions = _setup()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(bob.id)
+        sess["_fresh"] = True
+
+    data = client.get(
+        f"/quests/quest/all_submissions?game_id={game.id}&album_code={game.album_code}"
+    ).get_json()
+    by_comment = {s["comment"]: s for s in data["submissions"]}
+    assert by_comment["s0"]["like_count"] == 2
+    assert by_comment["s3"]["like_count"] == 1
+    assert by_comment["s1"]["like_count"] == 0
+    assert {c for c, s in by_comment.items() if s["liked_by_current_user"]} == {"s0", "s3"}
+    assert by_comment["s0"]["user_username"] == "alice"
+
+
+def test_album_rejects_bad_cursor(client):
+    game, _, _ = _setup()
+    resp = client.get(
+        f"/quests/quest/all_submissions?game_id={game.id}"
+        f"&album_code={game.album_code}&cursor=not-a-cursor"
+    )
+    assert resp.status_code == 400
+
+
+def test_album_query_count_does_not_grow_with_submitters(client, app):
+    game, _, submissions = _setup()
+    url = f"/quests/quest/all_submissions?game_id={game.id}&album_code={game.album_code}"
+    quest_id = submissions[0].quest_id
+    submissions[0].user.profile_picture = "images/profile_pictures/alice.png"
+    db.session.commit()
+
+    def statements():
+        db.session.expire_all()
+        seen = []
+
+        def _count(*_args, **_kwargs):
+            seen.append(1)
+
+        event.listen(db.engine, "before_cursor_execute", _count)
+        try:
+            data = client.get(url).get_json()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _count)
+        assert all("user_profile_picture_srcset" in s for s in data["submissions"])
+        return len(seen)
+
+    before = statements()
+    for i in range(5):
+        user = User(
+            username=f"rider{i}", email=f"rider{i}@example.com",
+            license_agreed=True, profile_picture=f"images/profile_pictures/{i}.png",
+        )
+        user.set_password("pw")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(QuestSubmission(quest_id=quest_id, user_id=user.id, comment=f"r{i}"))
+    db.session.commit()
+
+    assert statements() == before
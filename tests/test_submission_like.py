@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, timezone
 
 import pytest
 from flask_login import login_user
+from sqlalchemy import event
 
 from app import create_app, db
 from app.models import Game, Quest, QuestSubmission, SubmissionLike, User
@@ -92,3 +93,83 @@ def test_submission_like_handles_unique_violation(app, users, monkeypatch):
     assert data["liked"] is True
     assert SubmissionLike.query.count() == 1
 
+
+
+def _submission(owner):
+    game = Game(
+        title="G",
+        start_date=datetime.now(timezone.utc) - timedelta(days=1),
+        end_date=datetime.now(timezone.utc) + timedelta(days=1),
+        admin_id=owner.id,
+        timezone="UTC",
+    )
+    quest = Quest(title="Q", game=game)
+    db.session.add_all([game, quest])
+    db.session.commit()
+    submission = QuestSubmission(quest_id=quest.id, user_id=owner.id)
+    db.session.add(submission)
+    db.session.commit()
+    return submission
+
+
+def test_submission_like_maintains_counter(app, users):
+    owner, liker = users
+    submission = _submission(owner)
+
+    with app.test_request_context(method="POST"):
+        login_user(liker)
+        data = submission_like(submission.id).get_json()
+    assert data["like_count"] == 1
+    assert db.session.get(QuestSubmission, submission.id).like_count == 1
+
+    with app.test_request_context(method="DELETE"):
+        login_user(liker)
+        data = submission_like(submission.id).get_json()
+    assert data["like_count"] == 0
+    assert SubmissionLike.query.count() == 0
+
+
+def test_concurrent_unlikes_decrement_once(app, users):
+    owner, liker = users
+    submission_id = _submission(owner).id
+    with app.test_request_context(method="POST"):
+        login_user(liker)
+        submission_like(submission_id)
+
+    fired = []
+
+    def other_request_unlikes_first(conn, cursor, statement, *args):
+        # The other request removes the row between our read and our DELETE.
+        if statement.startswith("DELETE FROM submission_likes") and not fired:
+            fired.append(statement)
+            cursor.execute("DELETE FROM submission_likes WHERE submission_id = ?", (submission_id,))
+            cursor.execute(
+                "UPDATE quest_submission SET like_count = like_count - 1 WHERE id = ?",
+                (submission_id,),
+            )
+
+    event.listen(db.engine, "before_cursor_execute", other_request_unlikes_first)
+    try:
+        with app.test_request_context(method="DELETE"):
+            login_user(liker)
+            data = submission_like(submission_id).get_json()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", other_request_unlikes_first)
+
+    assert fired
+    assert data["like_count"] == 0
+    db.session.expire_all()
+    assert db.session.get(QuestSubmission, submission_id).like_count == 0
+
+
+def test_repair_submission_counts_fixes_drift(app, users):
+    owner, liker = users
+    submission = _submission(owner)
+    db.session.add(SubmissionLike(submission_id=submission.id, user_id=liker.id))
+    db.session.commit()
+    assert submission.like_count == 0
+
+    result = app.test_cli_runner().invoke(args=["repair-submission-counts"])
+    assert "Corrected counters of 1 submissions." in result.output
+    db.session.expire_all()
+    assert db.session.get(QuestSubmission, submission.id).like_count == 1
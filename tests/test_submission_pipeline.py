@@ -0,0 +1,349 @@
+import os
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+
+from flask import g
+
+from app import create_app, db
+from app.models import Game, Notification, Quest, QuestSubmission, SubmissionStage, User
+from app.utils import submission_pipeline
+from app.utils.submission_pipeline import run_stage
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAIL_SERVER": None,
+    })
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    import app.quests as quests_module
+
+    class _Naive(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.utcnow()
+
+    # SQLite returns naive game dates; compare them against naive "now".
+    monkeypatch.setattr(quests_module, "datetime", _Naive)
+    return app.test_client()
+
+
+class RecordingQueue:
+    """Collects enqueued jobs instead of sending them to Redis."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, func, *args, **kwargs):
+        self.jobs.append((func, args, kwargs))
+        return kwargs.get("job_id")
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    # The fixture's app context outlives requests; drop Flask-Login's cache.
+    g.pop("_login_user", None)
+
+
+def _setup():
+    user = User(username="u", email="u@example.com", license_agreed=True, email_verified=True)
+    user.set_password("pw")
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.now(timezone.utc)
+    game = Game(
+        title="G",
+        start_date=now - timedelta(days=1),
+        end_date=now + timedelta(days=1),
+        admin_id=user.id,
+    )
+    db.session.add(game)
+    db.session.commit()
+    quest = Quest(title="Q", game=game, verification_type="comment", points=5)
+    db.session.add(quest)
+    db.session.commit()
+    return user, quest
+
+
+def _submit(client, quest, **headers):
+    return client.post(
+        f"/quests/quest/{quest.id}/submit",
+        data={"verificationComment": "done"},
+        headers=headers,
+    )
+
+
+def test_inline_pipeline_runs_all_stages(client, app):
+    user, quest = _setup()
+    login(client, user)
+
+    resp = _submit(client, quest)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["success"] is True
+    assert data["processing"] is False
+    assert data["total_points"] == 5
+
+    status = client.get(data["status_url"]).get_json()
+    assert status["status"] == "done"
+    assert {s["stage"] for s in status["stages"]} == {"badges", "notification"}
+    assert Notification.query.filter_by(type="quest_complete").count() == 1
+
+
+def test_queued_pipeline_returns_accepted_and_is_idempotent(client, app):
+    user, quest = _setup()
+    queue = RecordingQueue()
+    app.task_queue = queue
+    app.config["USE_TASK_QUEUE"] = True
+    login(client, user)
+
+    resp = _submit(client, quest, Prefer="respond-async")
+    assert resp.status_code == 202
+    data = resp.get_json()
+    assert data["processing"] is True
+    assert [args[1] for _, args, _ in queue.jobs] == ["badges", "notification"]
+    assert queue.jobs[1][2]["depends_on"] is not None
+    assert client.get(data["status_url"]).get_json()["status"] == "processing"
+
+    for func, args, _ in queue.jobs:
+        func(*args)
+    for func, args, _ in queue.jobs:
+        func(*args)
+
+    assert client.get(data["status_url"]).get_json()["status"] == "done"
+    assert Notification.query.filter_by(type="quest_complete").count() == 1
+
+
+def test_queued_pipeline_keeps_legacy_status_without_prefer(client, app):
+    user, quest = _setup()
+    app.task_queue = RecordingQueue()
+    app.config["USE_TASK_QUEUE"] = True
+    login(client, user)
+
+    resp = _submit(client, quest)
+    assert resp.status_code == 200
+    assert resp.get_json()["processing"] is True
+
+
+def test_failed_stage_is_retried(client, app, monkeypatch):
+    user, quest = _setup()
+    login(client, user)
+
+    def _boom(submission):
+        raise RuntimeError("social API down")
+
+    with monkeypatch.context() as patch:
+        patch.setitem(submission_pipeline._HANDLERS, "notification", _boom)
+        data = _submit(client, quest).get_json()
+    submission_id = data["submission_id"]
+
+    stage = SubmissionStage.query.filter_by(
+        submission_id=submission_id, stage="notification"
+    ).one()
+    assert stage.status == "failed"
+    assert stage.attempts == 1
+    assert client.get(data["status_url"]).get_json()["status"] == "failed"
+
+    run_stage(submission_id, "notification")
+    db.session.expire_all()
+    stage = SubmissionStage.query.filter_by(
+        submission_id=submission_id, stage="notification"
+    ).one()
+    assert stage.status == "done"
+    assert stage.attempts == 2
+
+
+def test_album_is_refreshed_when_last_stage_fails(client, app, monkeypatch):
+    user, quest = _setup()
+    login(client, user)
+    refreshed = []
+    monkeypatch.setattr("app.tasks.enqueue_album_refresh", refreshed.append)
+
+    def _boom(submission):
+        raise RuntimeError("notification store down")
+
+    with monkeypatch.context() as patch:
+        patch.setitem(submission_pipeline._HANDLERS, "notification", _boom)
+        data = _submit(client, quest).get_json()
+
+    assert client.get(data["status_url"]).get_json()["status"] == "failed"
+    assert refreshed == [quest.game_id]
+
+
+def test_queued_stage_failure_is_rerun_by_retry(client, app, monkeypatch):
+    user, quest = _setup()
+    queue = RecordingQueue()
+    app.task_queue = queue
+    app.config["USE_TASK_QUEUE"] = True
+    login(client, user)
+    attempts = []
+
+    def _flaky(submission):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("temporary failure")
+        return None
+
+    monkeypatch.setitem(submission_pipeline._HANDLERS, "notification", _flaky)
+    data = _submit(client, quest).get_json()
+    func, args, kwargs = queue.jobs[1]
+    assert args[1] == "notification"
+    assert kwargs["retry"].max == 3
+
+    queue.jobs[0][0](*queue.jobs[0][1])
+    with pytest.raises(RuntimeError):
+        func(*args)
+    assert client.get(data["status_url"]).get_json()["status"] == "failed"
+
+    # What the worker's scheduler does once the retry interval has passed.
+    func(*args)
+    status = client.get(data["status_url"]).get_json()
+    assert status["status"] == "done"
+    assert [s["attempts"] for s in status["stages"] if s["stage"] == "notification"] == [2]
+
+
+def test_worker_runs_scheduler_for_retry_intervals(app, monkeypatch):
+    import rq_worker
+
+    started = {}
+
+    class RecordingWorker:
+        def __init__(self, queues, connection):
+            pass
+
+        def work(self, **kwargs):
+            started.update(kwargs)
+
+    class FakeQueue:
+        connection = None
+
+    class PushedContext:
+        def push(self):
+            pass
+
+    # The fixture already pushed a context for this app.
+    monkeypatch.setattr(app, "app_context", PushedContext)
+    monkeypatch.setattr(rq_worker, "create_app", lambda: app)
+    monkeypatch.setattr(rq_worker, "init_queue", lambda _app: FakeQueue())
+    monkeypatch.setattr(rq_worker, "Worker", RecordingWorker)
+    monkeypatch.setattr("sys.argv", ["rq_worker.py"])
+    rq_worker.main()
+
+    assert started == {"with_scheduler": True}
+
+
+def test_status_requires_owner(client, app):
+    user, quest = _setup()
+    other = User(username="o", email="o@example.com", license_agreed=True, email_verified=True)
+    other.set_password("pw")
+    db.session.add(other)
+    db.session.commit()
+    login(client, user)
+    submission_id = _submit(client, quest).get_json()["submission_id"]
+
+    login(client, other)
+    resp = client.get(f"/quests/submission/{submission_id}/status")
+    assert resp.status_code == 403
+    assert db.session.get(QuestSubmission, submission_id) is not None
+
+
+def test_video_is_transcoded_on_video_queue(client, app):
+    user, quest = _setup()
+    quest.verification_type = "video"
+    db.session.commit()
+    queue, video_queue = RecordingQueue(), RecordingQueue()
+    app.task_queue = queue
+    app.video_queue = video_queue
+    app.config["USE_TASK_QUEUE"] = True
+    app.config["FFMPEG_PATH"] = "/nonexistent/ffmpeg"
+    login(client, user)
+
+    resp = client.post(
+        f"/quests/quest/{quest.id}/submit",
+        data={"video": (BytesIO(b"\x00" * 100), "clip.mp4", "video/mp4")},
+        headers={"Prefer": "respond-async"},
+    )
+    assert resp.status_code == 202
+    data = resp.get_json()
+    assert data["video_status"] == "pending"
+    assert [args[1] for _, args, _ in video_queue.jobs] == ["video"]
+    assert "video" not in [args[1] for _, args, _ in queue.jobs]
+
+    for func, args, _ in video_queue.jobs + queue.jobs:
+        func(*args)
+
+    status = client.get(data["status_url"]).get_json()
+    submission = db.session.get(QuestSubmission, data["submission_id"])
+    try:
+        assert status["video_status"] == "ready"
+        assert submission.video_url.startswith(os.path.join("videos", "verifications"))
+    finally:
+        os.remove(os.path.join(app.static_folder, submission.video_url))
+
+
+def test_lost_video_job_fails_stage_and_removes_upload(client, app):
+    from rq.timeouts import JobTimeoutException
+
+    user, quest = _setup()
+    quest.verification_type = "video"
+    db.session.commit()
+    queue, video_queue = RecordingQueue(), RecordingQueue()
+    app.task_queue = queue
+    app.video_queue = video_queue
+    app.config["USE_TASK_QUEUE"] = True
+    login(client, user)
+
+    data = client.post(
+        f"/quests/quest/{quest.id}/submit",
+        data={"video": (BytesIO(b"\x00" * 100), "clip.mp4", "video/mp4")},
+        headers={"Prefer": "respond-async"},
+    ).get_json()
+    submission_id = data["submission_id"]
+    pending = os.path.join(
+        app.static_folder, db.session.get(QuestSubmission, submission_id).video_url
+    )
+    assert os.path.exists(pending)
+    _, args, kwargs = video_queue.jobs[0]
+    callback = kwargs["on_failure"].func
+
+    class Job:
+        def __init__(self, retries_left):
+            self.args = args
+            self.retries_left = retries_left
+
+    def _timed_out(retries_left):
+        # The worker was stopped mid-transcode with the stage still running.
+        SubmissionStage.query.filter_by(submission_id=submission_id, stage="video").update(
+            {"status": "running"}
+        )
+        db.session.commit()
+        callback(Job(retries_left), None, JobTimeoutException, JobTimeoutException("timeout"), None)
+        db.session.expire_all()
+        return SubmissionStage.query.filter_by(submission_id=submission_id, stage="video").one()
+
+    # The retry can claim the stage without waiting for STALE_AFTER.
+    assert _timed_out(2).status == "failed"
+    assert db.session.get(QuestSubmission, submission_id).video_status == "pending"
+    assert os.path.exists(pending)
+
+    stage = _timed_out(0)
+    assert (stage.status, stage.error) == ("failed", "timeout")
+    assert db.session.get(QuestSubmission, submission_id).video_status == "failed"
+    assert not os.path.exists(pending)
@@ -12,11 +12,12 @@ from app.utils.file_uploads import (
 from app.utils import get_int_param, MAX_IMAGE_DIMENSION
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     app = create_app({
         "TESTING": True,
         "WTF_CSRF_ENABLED": False,
     })
+    app.static_folder = str(tmp_path / "static")
     ctx = app.app_context()
     ctx.push()
     yield app
@@ -76,6 +77,28 @@ def test_save_submission_video_no_ffmpeg(app, monkeypatch):
     assert path.endswith(".mp4")
 
 
+def test_probe_video_reads_metadata_in_one_call(app, monkeypatch):
+    """A single JSON ffprobe call yields dimensions and duration."""
+    import json
+    import subprocess
+    from types import SimpleNamespace
+    from app.utils import file_uploads
+
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        out = {"streams": [{"width": 640, "height": 360}], "format": {"duration": "4.5"}}
+        return SimpleNamespace(stdout=json.dumps(out).encode())
+
+    monkeypatch.setattr(file_uploads, "_get_ffprobe_bin", lambda: "/usr/bin/ffprobe")
+    monkeypatch.setattr(subprocess, "run", fake_run)
+
+    meta = file_uploads.probe_video("clip.mp4")
+    assert meta == {"width": 640, "height": 360, "duration": 4.5}
+    assert len(calls) == 1
+
+
 def test_save_submission_video_disallowed_mimetype(app):
     """Reject videos with disallowed MIME types."""
     from io import BytesIO